@@ -0,0 +1,151 @@
+"""
+Measures Lambda cold-start cost per route. Every route runs in a fresh
+Python process, which times:
+
+- init:   importing lambda_function (the Lambda init phase)
+- import: loading the route's handler module on first use
+- first:  the first invocation (creates the shared DynamoDB handles)
+- warm:   a second invocation in the same process
+
+Data lives in the in-memory DynamoDB backend with no simulated latency,
+so the figures are pure Python start-up work. --eager imports every
+handler module during init, as the route table used to, for comparison.
+
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --eager --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+def child(case_name, eager):
+    from fixtures import Dataset, load_function, route_cases
+    load_function()
+    # Event shapes only; the real dataset is loaded after the handler import
+    shapes = route_cases(Dataset(1, other_doctors=0, templates=0))
+    cases = {name: (make_event, target) for name, make_event, target in shapes}
+
+    modules_before = len(sys.modules)
+    started = time.perf_counter()
+    import lambda_function
+    if eager:
+        from utils.handler_loader import load_handler
+        targets = [target for handlers in lambda_function.route_handlers.values() for target in handlers.values()]
+        for target in targets + [lambda_function.ADD_USER_HANDLER]:
+            load_handler(target)
+    init_ms = (time.perf_counter() - started) * 1000
+
+    from utils.handler_loader import load_handler
+    make_event, target = cases[case_name]
+    event = make_event(0)
+    if target is None:
+        if event.get('triggerSource'):
+            target = lambda_function.ADD_USER_HANDLER
+        else:
+            target = lambda_function.route_handlers[event['resource']][event['httpMethod']]
+
+    started = time.perf_counter()
+    handler = load_handler(target)
+    import_ms = (time.perf_counter() - started) * 1000
+    modules_loaded = len(sys.modules) - modules_before
+
+    # Seed data only now, so the handler import above paid for boto3 itself
+    from utils.dynamo_utils import registry
+    dataset = Dataset(20)
+    dataset.load(registry.resource())
+    cases = {name: (make_event, target) for name, make_event, target in route_cases(dataset)}
+    make_event = cases[case_name][0]
+
+    def invoke(event):
+        if cases[case_name][1] is not None:
+            return handler(event, None)
+        return lambda_function.lambda_handler(event, None)
+
+    started = time.perf_counter()
+    invoke(make_event(1))
+    first_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    invoke(make_event(2))
+    warm_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        'initMs': round(init_ms, 2),
+        'importMs': round(import_ms, 2),
+        'firstMs': round(first_ms, 2),
+        'warmMs': round(warm_ms, 2),
+        'coldMs': round(init_ms + import_ms + first_ms, 2),
+        'modules': modules_loaded,
+    }
+
+def measure(case_name, eager, runs):
+    samples = []
+    for _ in range(runs):
+        command = [sys.executable, os.path.abspath(__file__), '--child', case_name]
+        if eager:
+            command.append('--eager')
+        output = subprocess.run(
+            command, check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    # Median run of each figure
+    return {
+        key: sorted(sample[key] for sample in samples)[len(samples) // 2]
+        for key in samples[0]
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='Fresh processes per route; the median is reported')
+    parser.add_argument('--eager', action='store_true', help='Import every handler during init')
+    parser.add_argument('--routes', default='', help='Comma-separated substrings selecting routes')
+    parser.add_argument('--json', dest='json_path', help='Write results to this JSON file')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        import contextlib
+        import io
+        import logging
+        logging.disable(logging.CRITICAL)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = child(args.child, args.eager)
+        print(json.dumps(result))
+        return 0
+
+    from fixtures import Dataset, load_function, route_cases
+    load_function()
+    routes = [route.strip() for route in args.routes.split(',') if route.strip()]
+    names = [
+        name for name, _, _ in route_cases(Dataset(1, other_doctors=0, templates=0))
+        if not routes or any(route in name for route in routes)
+    ]
+
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    startup_ms = (time.perf_counter() - started) * 1000
+    print(f"Python interpreter start-up: {startup_ms:.1f} ms ({'eager' if args.eager else 'lazy'} handler loading)")
+
+    header = f"{'route':<52} {'init ms':>8} {'import ms':>9} {'first ms':>9} {'cold ms':>8} {'warm ms':>8} {'modules':>7}"
+    print(header)
+    print('-' * len(header))
+    results = {}
+    for name in names:
+        stats = measure(name, args.eager, args.runs)
+        results[name] = stats
+        print(
+            f"{name:<52} {stats['initMs']:>8.1f} {stats['importMs']:>9.1f} {stats['firstMs']:>9.1f} "
+            f"{stats['coldMs']:>8.1f} {stats['warmMs']:>8.1f} {stats['modules']:>7}"
+        )
+
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump(results, output, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
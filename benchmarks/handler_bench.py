@@ -0,0 +1,225 @@
+"""
+Benchmarks every DoctorApp_admin route through lambda_handler against the
+in-memory DynamoDB backend, at several dataset sizes.
+
+For each route and size it reports p50/p95/p99 latency, peak memory
+allocated per request (tracemalloc) and DynamoDB calls per request.
+Routes whose DB calls grow with the dataset (N+1 query patterns) are
+flagged, and --baseline compares against a previous --json run.
+
+    python benchmarks/handler_bench.py --sizes 50,500 --iterations 30
+    python benchmarks/handler_bench.py --json run.json
+    python benchmarks/handler_bench.py --baseline run.json --check
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import sys
+import time
+import tracemalloc
+
+from fixtures import Dataset, load_function, route_cases
+
+load_function()
+
+import lambda_function  # noqa: E402
+from utils.dynamo_utils import registry  # noqa: E402
+from utils.handler_loader import load_handler  # noqa: E402
+from utils.dynamo_memory import InMemoryDynamoDB  # noqa: E402
+from utils.identity import user_cache  # noqa: E402
+from utils.template_catalog import template_catalog  # noqa: E402
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def db_calls(backend):
+    return {operation: counters['calls'] for operation, counters in backend.stats().items()}
+
+def invoke(event, handler):
+    # Handlers print and log freely; keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        if handler is not None:
+            return load_handler(handler)(event, None)
+        return lambda_function.lambda_handler(event, None)
+
+def run_case(backend, make_event, handler, iterations, warmup, alloc_samples):
+    """
+    Runs one route: warmup requests, timed requests, then a few requests
+    under tracemalloc for allocation figures.
+    """
+    iteration = 0
+    for _ in range(warmup):
+        invoke(make_event(iteration), handler)
+        iteration += 1
+
+    latencies = []
+    calls = []
+    operations = {}
+    failures = 0
+    for _ in range(iterations):
+        event = make_event(iteration)
+        iteration += 1
+        before = db_calls(backend)
+        started = time.perf_counter()
+        response = invoke(event, handler)
+        latencies.append((time.perf_counter() - started) * 1000)
+        after = db_calls(backend)
+        request_calls = 0
+        for operation, count in after.items():
+            delta = count - before.get(operation, 0)
+            if delta:
+                operations[operation] = operations.get(operation, 0) + delta
+                request_calls += delta
+        calls.append(request_calls)
+        status = response.get('statusCode', 200) if isinstance(response, dict) else 200
+        if status >= 400:
+            failures += 1
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_samples):
+            event = make_event(iteration)
+            iteration += 1
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            invoke(event, handler)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50Ms': round(percentile(latencies, 0.50), 3),
+        'p95Ms': round(percentile(latencies, 0.95), 3),
+        'p99Ms': round(percentile(latencies, 0.99), 3),
+        'meanMs': round(sum(latencies) / len(latencies), 3),
+        'dbCallsPerRequest': round(sum(calls) / len(calls), 2),
+        'dbCallsByOperation': {
+            operation: round(count / iterations, 2) for operation, count in sorted(operations.items())
+        },
+        'peakAllocKb': round(percentile(peaks, 0.50) / 1024, 1) if peaks else None,
+        'errors': failures,
+    }
+
+def run(sizes, iterations, warmup, alloc_samples, latency_ms, jitter_ms, per_kb_ms, reports_per_patient, routes):
+    results = {}
+    for size in sizes:
+        backend = registry.use_backend(InMemoryDynamoDB(
+            latency_ms=latency_ms, latency_jitter_ms=jitter_ms, latency_per_kb_ms=per_kb_ms, seed=size
+        ))
+        dataset = Dataset(size, reports_per_patient=reports_per_patient)
+        dataset.load(backend)
+        # Every size starts with cold in-container caches
+        user_cache.clear()
+        template_catalog.invalidate()
+
+        results[size] = {}
+        for name, make_event, handler in route_cases(dataset):
+            if routes and not any(route in name for route in routes):
+                continue
+            results[size][name] = run_case(backend, make_event, handler, iterations, warmup, alloc_samples)
+            print(f"  measured {name} at size {size}", file=sys.stderr)
+    return results
+
+def find_scaling(results):
+    """
+    Routes whose DB calls per request grow with the dataset size, the
+    signature of an N+1 query pattern.
+    """
+    sizes = sorted(results)
+    if len(sizes) < 2:
+        return []
+    smallest, largest = results[sizes[0]], results[sizes[-1]]
+    flagged = []
+    for name, stats in largest.items():
+        if name not in smallest:
+            continue
+        small_calls = smallest[name]['dbCallsPerRequest']
+        large_calls = stats['dbCallsPerRequest']
+        if large_calls > max(small_calls * 1.5, small_calls + 2):
+            flagged.append(f"{name}: DB calls grow with data ({small_calls} at {sizes[0]} -> {large_calls} at {sizes[-1]})")
+    return flagged
+
+def compare(results, baseline, tolerance):
+    """
+    Regressions against a baseline run: any increase in DB calls per
+    request, or p95 latency above the baseline by more than `tolerance`.
+    """
+    regressions = []
+    for size, routes in results.items():
+        for name, stats in routes.items():
+            previous = baseline.get(str(size), {}).get(name)
+            if not previous:
+                continue
+            if stats['dbCallsPerRequest'] > previous['dbCallsPerRequest']:
+                regressions.append(
+                    f"{name} @ {size}: DB calls {previous['dbCallsPerRequest']} -> {stats['dbCallsPerRequest']}"
+                )
+            if stats['p95Ms'] > previous['p95Ms'] * (1 + tolerance):
+                regressions.append(f"{name} @ {size}: p95 {previous['p95Ms']}ms -> {stats['p95Ms']}ms")
+    return regressions
+
+def print_report(results):
+    header = f"{'route':<52} {'size':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db/req':>7} {'peak KB':>8} {'errors':>6}"
+    print(header)
+    print('-' * len(header))
+    for size, routes in results.items():
+        for name, stats in routes.items():
+            print(
+                f"{name:<52} {size:>6} {stats['p50Ms']:>8.2f} {stats['p95Ms']:>8.2f} {stats['p99Ms']:>8.2f} "
+                f"{stats['dbCallsPerRequest']:>7.1f} {stats['peakAllocKb'] or 0:>8.1f} {stats['errors']:>6}"
+            )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='50,500', help='Comma-separated patient counts for the benchmarked doctor')
+    parser.add_argument('--iterations', type=int, default=30, help='Timed requests per route and size')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed requests before measuring')
+    parser.add_argument('--alloc-samples', type=int, default=5, help='Requests measured under tracemalloc')
+    parser.add_argument('--reports-per-patient', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Simulated DynamoDB latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=1.0, help='Random extra latency per request')
+    parser.add_argument('--per-kb-ms', type=float, default=0.01, help='Simulated latency per KB transferred')
+    parser.add_argument('--routes', default='', help='Comma-separated substrings selecting routes')
+    parser.add_argument('--json', dest='json_path', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 increase over the baseline')
+    parser.add_argument('--check', action='store_true', help='Exit non-zero on regressions or N+1 patterns')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    routes = [route.strip() for route in args.routes.split(',') if route.strip()]
+    results = run(
+        sizes, args.iterations, args.warmup, args.alloc_samples,
+        args.latency_ms, args.jitter_ms, args.per_kb_ms, args.reports_per_patient, routes
+    )
+
+    print_report(results)
+    problems = find_scaling(results)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            problems.extend(compare(results, json.load(baseline_file), args.tolerance))
+    if problems:
+        print('\nFlagged:')
+        for problem in problems:
+            print(f"  {problem}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump({str(size): routes for size, routes in results.items()}, output, indent=2)
+    return 1 if args.check and problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Benchmarks response serialization of large report lists, as returned by
+the boto3 resource API (numbers as Decimal, e.g. in billingData).
+
+Compares the encoders handlers used before utils/response.py with it:
+
+- json.dumps(default=str): the usual workaround; Decimals become strings
+- json.dumps(cls=DecimalEncoder): JSONEncoder subclass converting Decimals
+- response.dumps (json):   the shared encoder on the stdlib backend
+- response.dumps (orjson): the shared encoder on orjson, if installed
+- response.dumps_bytes:    bytes output, as compression works on
+
+For every list size it reports p50/p95 time, output size and peak
+memory allocated while encoding.
+
+    python benchmarks/response_bench.py --sizes 100,1000,5000
+"""
+import argparse
+import decimal
+import json
+import sys
+import time
+import tracemalloc
+
+from fixtures import Dataset, load_function
+
+load_function()
+
+from config.constants import REPORT_TABLE  # noqa: E402
+from utils import response  # noqa: E402
+from utils.dynamo_memory import InMemoryDynamoDB  # noqa: E402
+
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, value):
+        if isinstance(value, decimal.Decimal):
+            return int(value) if value == value.to_integral_value() else float(value)
+        return super().default(value)
+
+def report_items(count):
+    """
+    `count` report items read back through the in-memory backend, so they
+    carry the same types as a real query.
+    """
+    reports_per_patient = 5
+    backend = InMemoryDynamoDB()
+    Dataset(-(-count // reports_per_patient), reports_per_patient=reports_per_patient, other_doctors=0, templates=0).load(backend)
+    table = backend.Table(REPORT_TABLE)
+    items = []
+    page = table.scan()
+    items.extend(page['Items'])
+    while 'LastEvaluatedKey' in page and len(items) < count:
+        page = table.scan(ExclusiveStartKey=page['LastEvaluatedKey'])
+        items.extend(page['Items'])
+    return items[:count]
+
+def with_backend(use_orjson, encode):
+    def run(value):
+        previous = response._use_orjson
+        response._use_orjson = use_orjson
+        try:
+            return encode(value)
+        finally:
+            response._use_orjson = previous
+    return run
+
+def encoders():
+    candidates = [
+        ('json.dumps(default=str)', lambda value: json.dumps(value, default=str)),
+        ('json.dumps(cls=DecimalEncoder)', lambda value: json.dumps(value, cls=DecimalEncoder)),
+        ('response.dumps (json)', with_backend(False, response.dumps)),
+    ]
+    if response.orjson is not None:
+        candidates.append(('response.dumps (orjson)', with_backend(True, response.dumps)))
+        candidates.append(('response.dumps_bytes (orjson)', with_backend(True, response.dumps_bytes)))
+    else:
+        print('orjson is not installed; skipping the native backend', file=sys.stderr)
+    return candidates
+
+def measure(encode, body, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        output = encode(body)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    try:
+        encode(body)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50Ms': round(timings[len(timings) // 2], 3),
+        'p95Ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'outputKb': round(len(output) / 1024, 1),
+        'peakAllocKb': round(peak / 1024, 1),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,1000,5000', help='Comma-separated report counts')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed encodes per encoder and size')
+    parser.add_argument('--json', dest='json_path', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    header = f"{'encoder':<32} {'reports':>7} {'p50 ms':>8} {'p95 ms':>8} {'out KB':>8} {'peak KB':>8}"
+    print(header)
+    print('-' * len(header))
+    results = {}
+    for size in [int(size) for size in args.sizes.split(',') if size]:
+        items = report_items(size)
+        body = {'message': 'Reports retrieved successfully', 'reports': items, 'count': len(items), 'hasMore': False}
+        results[size] = {}
+        for name, encode in encoders():
+            stats = measure(encode, body, args.iterations)
+            results[size][name] = stats
+            print(
+                f"{name:<32} {size:>7} {stats['p50Ms']:>8.2f} {stats['p95Ms']:>8.2f} "
+                f"{stats['outputKb']:>8.1f} {stats['peakAllocKb']:>8.1f}"
+            )
+
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump({str(size): stats for size, stats in results.items()}, output, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
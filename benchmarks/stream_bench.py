@@ -0,0 +1,137 @@
+"""
+Benchmarks POST /reports with the patient's derived attributes and the
+doctor feed written in the request (CHANGE_STREAM_PROCESSING off) against
+leaving them to the change stream consumer (on), using the local stream
+stand-in fed by the in-memory backend.
+
+For each mode it reports request p50/p95 and DB calls per request; for
+stream mode also how long the consumer took to catch up, and it checks
+that the patients' latestReportId and the doctor feed ended up the same
+as the synchronous path leaves them.
+
+    python benchmarks/stream_bench.py --reports 200 --batch-size 100
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+from fixtures import BENCH_DOCTOR_ID, Dataset, api_event, load_function
+
+load_function()
+
+import lambda_function  # noqa: E402
+from config.constants import PATIENT_TABLE, REPORT_TABLE, DOCTOR_FEED_TABLE  # noqa: E402
+from handlers.patientHandlers import addNewPatient  # noqa: E402
+from handlers.reportHandlers import addNewReport  # noqa: E402
+from utils.dynamo_utils import registry  # noqa: E402
+from utils.dynamo_memory import InMemoryDynamoDB  # noqa: E402
+from utils.local_stream import LocalChangeStream, LocalStreamPoller  # noqa: E402
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def report_events(dataset, count):
+    """
+    POST /reports events spread over the benchmarked doctor's patients,
+    complete so every report lands in the feed.
+    """
+    patients = [patient for patient in dataset.patients if patient['doctorId'] == BENCH_DOCTOR_ID]
+    for index in range(count):
+        patient = patients[index % len(patients)]
+        yield api_event('POST', '/reports', body={
+            'patientId': patient['patientId'],
+            'doctorId': BENCH_DOCTOR_ID,
+            'audioFile': f"s3://recordings/{patient['patientId']}/bench-{index}.m4a",
+            'transcription': 'Patient reports mild symptoms.',
+            'reportData': 'Assessment and plan.',
+            'billingData': {'code': '99213'},
+            'reportType': 'SOAP',
+        }, headers={'Accept-Encoding': 'identity'})
+
+def derived_state(backend):
+    """
+    What the derived data looks like: each patient's latest report and the
+    set of feed entries.
+    """
+    latest = {
+        patient['patientId']: patient.get('latestReportId')
+        for patient in backend.Table(PATIENT_TABLE).items()
+    }
+    feed = {(entry['doctorId'], entry['feedKey'], entry.get('name')) for entry in backend.Table(DOCTOR_FEED_TABLE).items()}
+    return latest, feed
+
+def run_mode(stream_mode, args):
+    addNewReport.CHANGE_STREAM_PROCESSING = stream_mode
+    addNewPatient.CHANGE_STREAM_PROCESSING = stream_mode
+    backend = registry.use_backend(InMemoryDynamoDB(latency_ms=args.latency_ms, seed=1))
+    dataset = Dataset(args.patients, other_doctors=0, templates=0)
+    dataset.load(backend)
+    stream = LocalChangeStream()
+    for table_name in (PATIENT_TABLE, REPORT_TABLE):
+        backend.enable_stream(table_name, stream)
+
+    latencies = []
+    calls = 0
+    for event in report_events(dataset, args.reports):
+        before = backend.stats()
+        started = time.perf_counter()
+        response = lambda_function.lambda_handler(event, None)
+        latencies.append((time.perf_counter() - started) * 1000)
+        calls += sum(stats['calls'] for stats in backend.stats().values()) - sum(stats['calls'] for stats in before.values())
+        if response['statusCode'] != 200:
+            raise RuntimeError(f"POST /reports failed: {response['body']}")
+
+    result = {
+        'p50Ms': round(percentile(latencies, 0.50), 3),
+        'p95Ms': round(percentile(latencies, 0.95), 3),
+        'dbCallsPerRequest': round(calls / len(latencies), 2),
+    }
+    if stream_mode:
+        poller = LocalStreamPoller(stream, lambda_function.lambda_handler, batch_size=args.batch_size)
+        started = time.perf_counter()
+        drained = poller.drain()
+        result['catchUpMs'] = round((time.perf_counter() - started) * 1000, 1)
+        result['streamRecords'] = drained['records']
+        result['batches'] = drained['polls']
+        result['deadLetters'] = drained['deadLetters']
+    return result, derived_state(backend)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patients', type=int, default=100, help='Patients of the benchmarked doctor')
+    parser.add_argument('--reports', type=int, default=200, help='Reports posted per mode')
+    parser.add_argument('--batch-size', type=int, default=100, help='Stream records per consumer batch')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Simulated DynamoDB latency per request')
+    parser.add_argument('--json', dest='json_path', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    sync_result, sync_state = run_mode(False, args)
+    stream_result, stream_state = run_mode(True, args)
+
+    # Report ids are random, so compare which patients point at a report
+    # posted by the benchmark and how many feed entries there are
+    def shape(state):
+        latest, feed = state
+        return sorted(patient for patient, report in latest.items() if report and '-report-' not in report), len(feed)
+    consistent = shape(sync_state) == shape(stream_state)
+
+    print(f"{'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'db/req':>7} {'catch-up ms':>12} {'batches':>8}")
+    for name, result in (('sync', sync_result), ('stream', stream_result)):
+        print(
+            f"{name:<8} {result['p50Ms']:>8.2f} {result['p95Ms']:>8.2f} {result['dbCallsPerRequest']:>7.1f} "
+            f"{result.get('catchUpMs', 0):>12.1f} {result.get('batches', 0):>8}"
+        )
+    print(f"derived data consistent: {consistent}; dead letters: {stream_result['deadLetters']}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as output:
+            json.dump({'sync': sync_result, 'stream': stream_result, 'consistent': consistent}, output, indent=2)
+    return 0 if consistent and not stream_result['deadLetters'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Backfills the canonical timestamp attributes on existing patients and
+reports. Items written before utils/timestamps.py carry naive
+datetime.utcnow().isoformat() strings, or whatever reportDate the client
+sent; this rewrites each timestamp attribute as the canonical UTC string
+("2024-05-01T10:30:00.000Z") and adds its epoch-millisecond companion
+(reportDateMs, createdAtMs, ...), exactly as the handlers now write them.
+
+Tables are read with a parallel scan and only items that change are
+updated. Every update is conditional on the item still holding the value
+that was read, so items rewritten concurrently by the API are skipped and
+counted as conflicts; running the tool again picks them up. Values that
+cannot be parsed are left alone and listed in the summary.
+
+    python scripts/backfill_timestamps.py --dry-run
+    python scripts/backfill_timestamps.py --tables DoctorApp_Reports --segments 8 --workers 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'functions', 'DoctorApp_admin')
+
+# Reported unparsable values per table, so a bad table doesn't flood the output
+MAX_INVALID_SAMPLES = 20
+
+def load_function(function_dir=FUNCTION_DIR):
+    """
+    Makes the Lambda function directory importable, so the tool uses the
+    function's tables, constants and DynamoDB settings.
+
+    :param function_dir: The Lambda function source directory.
+    """
+    function_dir = os.path.abspath(function_dir)
+    if function_dir not in sys.path:
+        sys.path.insert(0, function_dir)
+
+def timestamp_attributes():
+    """
+    The timestamp attributes of each table that gets backfilled.
+    """
+    from config.constants import PATIENT_TABLE, REPORT_TABLE
+    return {
+        PATIENT_TABLE: ['createdAt', 'updatedAt', 'latestReportDate'],
+        REPORT_TABLE: ['reportDate', 'createdAt', 'updatedAt'],
+    }
+
+def plan_update(item, attributes):
+    """
+    Works out the attributes of an item that need rewriting.
+
+    :param item: Item as read by the scan.
+    :param attributes: Timestamp attributes of the item's table.
+    :return: Tuple of (changes, invalid): a dict of attribute name to new
+             value, and a dict of attribute name to unparsable value.
+    """
+    from utils.timestamps import MS_SUFFIX, to_epoch_ms, to_iso
+
+    changes = {}
+    invalid = {}
+    for attribute in attributes:
+        value = item.get(attribute)
+        if value is None or value == '':
+            continue
+        try:
+            epoch_ms = to_epoch_ms(value)
+        except ValueError:
+            invalid[attribute] = value
+            continue
+        canonical = to_iso(epoch_ms)
+        if value != canonical:
+            changes[attribute] = canonical
+        if item.get(attribute + MS_SUFFIX) != epoch_ms:
+            changes[attribute + MS_SUFFIX] = epoch_ms
+    return changes, invalid
+
+def apply_update(table, key_attributes, item, changes):
+    """
+    Writes the planned changes, conditional on the item still existing and
+    its rewritten attributes still holding the values that were read.
+
+    :return: True when the item was updated, False on a conflict.
+    """
+    from boto3.dynamodb.conditions import Attr
+    from botocore.exceptions import ClientError
+
+    names = {}
+    values = {}
+    assignments = []
+    for index, (attribute, value) in enumerate(sorted(changes.items())):
+        names[f'#a{index}'] = attribute
+        values[f':v{index}'] = value
+        assignments.append(f'#a{index} = :v{index}')
+
+    condition = Attr(key_attributes[0]).exists()
+    for attribute in changes:
+        if attribute in item:
+            condition = condition & Attr(attribute).eq(item[attribute])
+        else:
+            condition = condition & Attr(attribute).not_exists()
+
+    try:
+        table.update_item(
+            {attribute: item[attribute] for attribute in key_attributes},
+            UpdateExpression='SET ' + ', '.join(assignments),
+            ConditionExpression=condition,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return False
+        raise
+    return True
+
+def backfill_table(table_name, attributes, dry_run=False, segments=None, workers=8, max_items=None):
+    """
+    Backfills one table.
+
+    :param table_name: Table to backfill.
+    :param attributes: Timestamp attributes of the table.
+    :param dry_run: Count the changes without writing them.
+    :param segments: Parallel scan segments; defaults to SCAN_TOTAL_SEGMENTS.
+    :param workers: Threads issuing updates.
+    :param max_items: Optional number of items to scan, for trial runs.
+    :return: Dict of counters: scanned, updated, unchanged, conflicts,
+             invalid, plus invalidSamples and durationMs.
+    """
+    from config.constants import TABLE_PRIMARY_KEYS
+    from utils.dynamo_utils import DynamoDBTable
+    from utils.timestamps import MS_SUFFIX
+
+    key_attributes = TABLE_PRIMARY_KEYS[table_name]
+    projected = list(dict.fromkeys(key_attributes + attributes + [attribute + MS_SUFFIX for attribute in attributes]))
+    names = {f'#p{index}': attribute for index, attribute in enumerate(projected)}
+
+    table = DynamoDBTable(table_name)
+    stats = {'scanned': 0, 'updated': 0, 'unchanged': 0, 'conflicts': 0, 'invalid': 0, 'invalidSamples': []}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def record(outcome):
+        with lock:
+            stats[outcome] += 1
+
+    def update(item, changes):
+        record('updated' if apply_update(table, key_attributes, item, changes) else 'conflicts')
+
+    items = table.iter_parallel_scan(
+        total_segments=segments,
+        ProjectionExpression=', '.join(names),
+        ExpressionAttributeNames=names,
+    )
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        try:
+            for item in items:
+                stats['scanned'] += 1
+                changes, invalid = plan_update(item, attributes)
+                if invalid:
+                    stats['invalid'] += 1
+                    if len(stats['invalidSamples']) < MAX_INVALID_SAMPLES:
+                        stats['invalidSamples'].append({
+                            'key': {attribute: item[attribute] for attribute in key_attributes},
+                            'values': invalid,
+                        })
+                if not changes:
+                    record('unchanged')
+                elif dry_run:
+                    record('updated')
+                else:
+                    # Bounded backlog, so a fast scan doesn't queue the whole table
+                    pending.add(executor.submit(update, item, changes))
+                    if len(pending) >= workers * 4:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                if max_items and stats['scanned'] >= max_items:
+                    break
+        finally:
+            items.close()
+        for future in pending:
+            future.result()
+
+    stats['durationMs'] = round((time.perf_counter() - started) * 1000, 1)
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--function-dir', default=FUNCTION_DIR, help='Lambda function whose tables and settings are used')
+    parser.add_argument('--tables', help='Comma-separated tables to backfill (default: patients and reports)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+    parser.add_argument('--segments', type=int, help='Parallel scan segments (default: SCAN_TOTAL_SEGMENTS)')
+    parser.add_argument('--workers', type=int, default=8, help='Threads issuing updates')
+    parser.add_argument('--max-items', type=int, help='Stop after scanning this many items per table')
+    args = parser.parse_args(argv)
+
+    load_function(args.function_dir)
+    tables = timestamp_attributes()
+    selected = [name for name in args.tables.split(',') if name] if args.tables else list(tables)
+    unknown = [name for name in selected if name not in tables]
+    if unknown:
+        parser.error(f"no timestamp attributes known for: {', '.join(unknown)}")
+
+    failed = False
+    for table_name in selected:
+        stats = backfill_table(
+            table_name, tables[table_name], dry_run=args.dry_run,
+            segments=args.segments, workers=args.workers, max_items=args.max_items
+        )
+        verb = 'would update' if args.dry_run else 'updated'
+        print(
+            f"{table_name}: scanned {stats['scanned']}, {verb} {stats['updated']}, "
+            f"unchanged {stats['unchanged']}, conflicts {stats['conflicts']}, "
+            f"invalid {stats['invalid']} ({stats['durationMs']} ms)"
+        )
+        for sample in stats['invalidSamples']:
+            print(f"  unparsable: {sample['key']} {sample['values']}")
+        failed = failed or stats['conflicts'] > 0 or stats['invalid'] > 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Builds the per-doctor report feed (utils/doctor_feed.py) from the patients
+and reports tables. Run it once to populate the feed for reports written
+before the feed existed, and again after any write the handlers could not
+mirror into it (they log "Doctor feed not updated").
+
+Patients are read first, with a parallel scan projecting only the fields
+the feed copies, then reports are scanned and their feed entries written
+in batches as they arrive. Entries are replaced whole, so rerunning is
+safe. Reports without a doctorId or reportDate cannot be placed in a feed
+and are counted as skipped.
+
+    python scripts/rebuild_doctor_feed.py --dry-run
+    python scripts/rebuild_doctor_feed.py --segments 8
+"""
+import argparse
+import sys
+import time
+
+from backfill_timestamps import FUNCTION_DIR, load_function
+
+# Feed entries buffered before a batch write
+WRITE_BATCH_ITEMS = 500
+
+def projection(fields):
+    names = {f'#p{index}': field for index, field in enumerate(fields)}
+    return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+def rebuild(dry_run=False, segments=None):
+    """
+    Writes a feed entry for every report.
+
+    :param dry_run: Count the entries without writing them.
+    :param segments: Parallel scan segments; defaults to SCAN_TOTAL_SEGMENTS.
+    :return: Dict of counters: patients, reports, written, skipped, failed
+             and durationMs.
+    """
+    from config.constants import PATIENT_TABLE, REPORT_TABLE, DOCTOR_FEED_TABLE
+    from utils.dynamo_utils import DynamoDBTable
+    from utils.doctor_feed import FEED_PATIENT_FIELDS, FEED_REPORT_FIELDS, feed_entry
+
+    started = time.perf_counter()
+    stats = {'patients': 0, 'reports': 0, 'written': 0, 'skipped': 0, 'failed': 0}
+
+    patients = {}
+    for patient in DynamoDBTable(PATIENT_TABLE).iter_parallel_scan(total_segments=segments, **projection(FEED_PATIENT_FIELDS)):
+        patients[patient['patientId']] = patient
+    stats['patients'] = len(patients)
+
+    feed_table = DynamoDBTable(DOCTOR_FEED_TABLE)
+    pending = []
+
+    def flush():
+        if not dry_run:
+            failures = feed_table.batch_put_items(pending)
+            for entry, error in failures:
+                print(f"  failed: {entry['doctorId']}/{entry['feedKey']}: {error}", file=sys.stderr)
+            stats['failed'] += len(failures)
+            stats['written'] += len(pending) - len(failures)
+        else:
+            stats['written'] += len(pending)
+        pending.clear()
+
+    report_fields = ['doctorId', 'patientId'] + [field for field in FEED_REPORT_FIELDS if field != 'patientId']
+    for report in DynamoDBTable(REPORT_TABLE).iter_parallel_scan(total_segments=segments, **projection(report_fields)):
+        stats['reports'] += 1
+        if not report.get('doctorId') or not report.get('reportDate') or not report.get('patientId'):
+            stats['skipped'] += 1
+            continue
+        pending.append(feed_entry(report, patients.get(report['patientId'], {})))
+        if len(pending) >= WRITE_BATCH_ITEMS:
+            flush()
+    flush()
+
+    stats['durationMs'] = round((time.perf_counter() - started) * 1000, 1)
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--function-dir', default=FUNCTION_DIR, help='Lambda function whose tables and settings are used')
+    parser.add_argument('--dry-run', action='store_true', help='Count the feed entries without writing them')
+    parser.add_argument('--segments', type=int, help='Parallel scan segments (default: SCAN_TOTAL_SEGMENTS)')
+    args = parser.parse_args(argv)
+
+    load_function(args.function_dir)
+    stats = rebuild(dry_run=args.dry_run, segments=args.segments)
+    verb = 'would write' if args.dry_run else 'wrote'
+    print(
+        f"{stats['patients']} patients, {stats['reports']} reports: {verb} {stats['written']} feed entries, "
+        f"skipped {stats['skipped']}, failed {stats['failed']} ({stats['durationMs']} ms)"
+    )
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
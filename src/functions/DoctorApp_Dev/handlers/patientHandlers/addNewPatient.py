@@ -2,11 +2,29 @@ import json
 import uuid
 import logging
 from utils.dynamo_utils import DynamoDBTable
+from utils.timestamps import now_ms, stamp
+from utils.response import generate_response
 from config.constants import PATIENT_TABLE
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+def assign_patient_id(body):
+    """
+    Assign a unique patientId if not provided, and canonical timestamps:
+    createdAt as given by the client (e.g. when replacing a patient) or
+    now, and updatedAt always now.
+
+    :raises ValueError: If a given createdAt is not a recognizable timestamp.
+    """
+    updated_at = now_ms()
+    created_at = body['createdAt'] if body.get('createdAt') is not None else updated_at
+    stamp(body, 'createdAt', created_at)
+    stamp(body, 'updatedAt', updated_at)
+    if 'patientId' not in body or not body['patientId']:
+        body['patientId'] = str(uuid.uuid4())
+    return body
+
 def addNewPatient(event, context):
     try:
         logger.info("Processing addNewPatient request")
@@ -14,50 +32,37 @@ def addNewPatient(event, context):
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         if not body:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Invalid request body."}),
-            }
+            return generate_response(400, {"message": "Invalid request body."})
 
         # Validate required fields
         required_fields = ['doctorId', 'name', 'dateOfBirth', 'email', 'gender']
         missing_fields = [field for field in required_fields if field not in body]
         
         if missing_fields:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({
-                    "message": "Missing required fields",
-                    "fields": missing_fields
-                }),
-            }
+            return generate_response(400, {
+                "message": "Missing required fields",
+                "fields": missing_fields
+            })
 
         # Assign a unique patientId if not provided
-        if 'patientId' not in body or not body['patientId']:
-            body['patientId'] = str(uuid.uuid4())
+        try:
+            assign_patient_id(body)
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
 
         # Save to DynamoDB using the utility class
         table = DynamoDBTable(PATIENT_TABLE)
         table.put_item(body)
 
         logger.info(f"Patient added successfully: {body['patientId']}")
-        return {
-            "statusCode": 201,
-             "headers": {
-                "Access-Control-Allow-Origin": "*",  
-            },
-            "body": json.dumps({
-                "message": "Patient created successfully",
-                "patient": body
-            }),
-        }
+        return generate_response(201, {
+            "message": "Patient created successfully",
+            "patient": body
+        })
 
     except Exception as e:
         logger.error(f"Error in addNewPatient: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            }),
-        }
\ No newline at end of file
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
\ No newline at end of file
@@ -1,10 +1,8 @@
 import json
-import boto3
 import logging
-
-# Set up DynamoDB client
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('doctorApp_patients')
+from utils.dynamo_utils import DynamoDBTable, take
+from utils.response import generate_response
+from config.constants import PATIENT_TABLE, QUERY_ITEM_BUDGET
 
 # Set up logging
 logger = logging.getLogger()
@@ -13,23 +11,18 @@ logger.setLevel(logging.INFO)
 def getAllPatients(event):
     try:
         # Scan DynamoDB table to retrieve all patients
-        response = table.scan()
-        patients = response.get('Items', [])
+        table = DynamoDBTable(PATIENT_TABLE)
+        segment_stats = []
+        patients, has_more = take(table.iter_parallel_scan(segment_stats=segment_stats), QUERY_ITEM_BUDGET)
+        logger.info(f"Patient scan segments: {json.dumps(segment_stats)}")
+        if has_more:
+            logger.warning(f"Patient scan truncated at {QUERY_ITEM_BUDGET} items")
 
         if not patients:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"message": "No patients found"})
-            }
+            return generate_response(404, {"message": "No patients found"})
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps(patients)
-        }
+        return generate_response(200, patients)
 
     except Exception as e:
         logger.error(f"Error retrieving patients: {e}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"message": "Internal Server Error", "error": str(e)})
-        }
+        return generate_response(500, {"message": "Internal Server Error", "error": str(e)})
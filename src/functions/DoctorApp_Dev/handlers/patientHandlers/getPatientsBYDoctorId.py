@@ -1,7 +1,9 @@
 import json
 import logging
 from utils.dynamo_utils import DynamoDBTable
-from config.constants import PATIENT_TABLE
+from utils.projection import parse_fields, apply_projection
+from utils.response import generate_response
+from config.constants import PATIENT_TABLE, PATIENT_LIST_FIELDS
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
@@ -16,10 +18,13 @@ def getPatientsBYDoctorId(event, context):
         doctor_id = event.get('pathParameters', {}).get('doctorId')
         
         if not doctor_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Doctor ID is required."}),
-            }
+            return generate_response(400, {"message": "Doctor ID is required."})
+
+        # Requested fields, lean list view by default
+        try:
+            fields = parse_fields(event, default=PATIENT_LIST_FIELDS, required=['patientId'])
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
 
         # Initialize DynamoDB table
         table = DynamoDBTable(PATIENT_TABLE)
@@ -30,6 +35,7 @@ def getPatientsBYDoctorId(event, context):
             'KeyConditionExpression': Key('doctorId').eq(doctor_id),
             # 'Limit': 20
         }
+        apply_projection(query_params, fields)
 
         try:
             logger.info(f"Querying DynamoDB for doctor_id: {doctor_id}")
@@ -48,37 +54,25 @@ def getPatientsBYDoctorId(event, context):
             #     }
 
             logger.info(f"Successfully retrieved {len(items)} patients")
-            return {
-                "statusCode": 200,
-                 "headers": {
-                "Access-Control-Allow-Origin": "*",  
-            },
-                "body": json.dumps({
-                    "message": "Patients retrieved successfully",
-                    "doctorId": doctor_id,
-                    "patients": items,
-                    "count": len(items),
-                    "hasMore": 'LastEvaluatedKey' in response
-                }),
-            }
+            return generate_response(200, {
+                "message": "Patients retrieved successfully",
+                "doctorId": doctor_id,
+                "patients": items,
+                "count": len(items),
+                "hasMore": 'LastEvaluatedKey' in response
+            })
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
             logger.error(f"DynamoDB error: {error_code} - {str(e)}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": "Database error occurred",
-                    "error": error_code
-                }),
-            }
+            return generate_response(500, {
+                "message": "Database error occurred",
+                "error": error_code
+            })
 
     except Exception as e:
         logger.error(f"Error in getPatientsBYDoctorId: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            }),
-        }
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
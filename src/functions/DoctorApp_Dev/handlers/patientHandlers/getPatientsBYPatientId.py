@@ -1,6 +1,7 @@
-import json
 import logging
 from utils.dynamo_utils import DynamoDBTable
+from utils.projection import parse_fields, apply_projection
+from utils.response import generate_response
 from config.constants import PATIENT_TABLE
 from botocore.exceptions import ClientError
 
@@ -19,12 +20,17 @@ def getPatientsBYPatientId(event, context):
         
         if not patient_id:
             logger.error("Patient ID missing in request")
-            return {
-                "statusCode": 400,
-                "body": json.dumps({
-                    "message": "Patient ID is required"
-                })
-            }
+            return generate_response(400, {
+                "message": "Patient ID is required"
+            })
+            
+        # Requested fields, whole patient by default
+        try:
+            fields = parse_fields(event, required=['patientId'])
+        except ValueError as e:
+            return generate_response(400, {
+                "message": str(e)
+            })
             
         # Initialize DynamoDB table
         table = DynamoDBTable(PATIENT_TABLE)
@@ -33,48 +39,32 @@ def getPatientsBYPatientId(event, context):
             # Get patient record
             response = table.get_item({
                 "patientId": patient_id
-            })
+            }, **apply_projection({}, fields))
             
             patient = response.get('Item')
             
             if not patient:
                 logger.info(f"No patient found with ID: {patient_id}")
-                return {
-                    "statusCode": 404,
-                    "body": json.dumps({
-                        "message": f"Patient with ID {patient_id} not found"
-                    })
-                }
+                return generate_response(404, {
+                    "message": f"Patient with ID {patient_id} not found"
+                })
             
             logger.info(f"Successfully retrieved patient data for ID: {patient_id}")
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*"
-                },
-                "body": json.dumps({
-                    "patient": patient
-                })
-            }
+            return generate_response(200, {
+                "patient": patient
+            })
             
         except ClientError as e:
             error_message = e.response['Error']['Message']
             logger.error(f"DynamoDB error: {error_message}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": "Failed to retrieve patient data",
-                    "error": error_message
-                })
-            }
+            return generate_response(500, {
+                "message": "Failed to retrieve patient data",
+                "error": error_message
+            })
             
     except Exception as e:
         logger.error(f"Unexpected error in getPatientsBYPatientId: {str(e)}", exc_info=True)
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Internal server error",
-                "error": str(e)
-            })
-        }
\ No newline at end of file
+        return generate_response(500, {
+            "message": "Internal server error",
+            "error": str(e)
+        })
\ No newline at end of file
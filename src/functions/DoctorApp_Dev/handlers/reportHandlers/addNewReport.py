@@ -1,9 +1,12 @@
 import json
 import uuid
 import logging
-from datetime import datetime
 from utils.dynamo_utils import DynamoDBTable
-from config.constants import REPORT_TABLE
+from utils.timestamps import now_ms, stamp
+from utils.response import generate_response
+from utils import doctor_feed
+from utils.report_audio import check_audio_key, is_inline_audio, store_inline_audio
+from config.constants import REPORT_TABLE, PATIENT_TABLE, CHANGE_STREAM_PROCESSING
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -19,42 +22,60 @@ def addNewReport(event, context):
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         if not body:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Invalid request body"})
-            }
+            return generate_response(400, {"message": "Invalid request body"})
         
         # Validate required fields
-        required_fields = ['audioFile', 'patientId', 'doctorId']
+        required_fields = ['patientId', 'doctorId']
         missing_fields = [field for field in required_fields if field not in body]
+        # The recording comes as an uploaded audioKey or, from older
+        # clients, as audioFile
+        if not body.get('audioKey') and not body.get('audioFile'):
+            missing_fields.append('audioKey')
         if missing_fields:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({
-                    "message": "Missing required fields",
-                    "fields": missing_fields
-                })
-            }
+            return generate_response(400, {
+                "message": "Missing required fields",
+                "fields": missing_fields
+            })
         
         # Generate unique report ID
         report_id = str(uuid.uuid4())
+        created_at = now_ms()
         
         # Prepare report data with initial status
         report_data = {
             'reportId': report_id,
             'patientId': body['patientId'],
             'doctorId': body['doctorId'],
-            'audioFile': body['audioFile'],
             'transcription': body.get('transcription', ''),
             'reportData': body.get('reportData', ''),
             'additionalNotes': body.get('additionalNotes', ''),
-            'reportDate': body.get('reportDate', datetime.utcnow().isoformat()),
             'reportType': body.get('reportType', 'Unknown'),
             'billingData': body.get('billingData', {}),
             'currentStatus': 'Pending',  # Initial status
-            'createdAt': datetime.utcnow().isoformat(),
-            'updatedAt': datetime.utcnow().isoformat()
         }
+
+        # Timestamps are stored as canonical UTC strings plus epoch-ms
+        # numbers (reportDateMs, createdAtMs, updatedAtMs)
+        try:
+            stamp(report_data, 'reportDate', body.get('reportDate') or created_at)
+        except ValueError:
+            return generate_response(400, {"message": "reportDate must be an ISO 8601 timestamp or epoch milliseconds"})
+        stamp(report_data, 'createdAt', created_at)
+        stamp(report_data, 'updatedAt', created_at)
+
+        # The recording itself lives in the blob store and the report keeps
+        # a pointer: the uploaded audioKey, or a legacy audioFile reference.
+        # Audio still sent inline in audioFile is moved to the store first
+        try:
+            if body.get('audioKey'):
+                check_audio_key(body['doctorId'], body['audioKey'])
+                report_data['audioKey'] = body['audioKey']
+            elif is_inline_audio(body['audioFile']):
+                report_data['audioKey'] = store_inline_audio(body['doctorId'], body['audioFile'])
+            else:
+                report_data['audioFile'] = body['audioFile']
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
         
         # Determine report status based on required processing fields
         if not body.get('transcription'):
@@ -71,32 +92,36 @@ def addNewReport(event, context):
         table.put_item(report_data)
         
         logger.info(f"Report added successfully: {report_id}")
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Access-Control-Allow-Origin": "*",
-            },
-            "body": json.dumps({
-                "message": "Report saved successfully",
-                "report": report_data
-            })
-        }
+
+        # Add the report to the doctor's feed, served by DoctorApp_admin;
+        # with change stream processing the stream consumer does this. The
+        # report is saved either way; a missing feed entry is restored by
+        # scripts/rebuild_doctor_feed.py
+        if not CHANGE_STREAM_PROCESSING:
+            try:
+                patient_response = DynamoDBTable(PATIENT_TABLE).get_item(
+                    {'patientId': report_data['patientId']},
+                    ProjectionExpression='patientId, #name, gender, dateOfBirth, email',
+                    ExpressionAttributeNames={'#name': 'name'}
+                )
+                doctor_feed.put_report(report_data, patient_response.get('Item', {}))
+            except Exception as e:
+                logger.error(f"Doctor feed not updated for report {report_id}: {str(e)}")
+
+        return generate_response(200, {
+            "message": "Report saved successfully",
+            "report": report_data
+        })
         
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in request body: {str(e)}")
-        return {
-            "statusCode": 400,
-            "body": json.dumps({
-                "message": "Invalid JSON in request body",
-                "error": str(e)
-            })
-        }
+        return generate_response(400, {
+            "message": "Invalid JSON in request body",
+            "error": str(e)
+        })
     except Exception as e:
         logger.error(f"Error in addNewReport: {str(e)}", exc_info=True)
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            })
-        }
\ No newline at end of file
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
\ No newline at end of file
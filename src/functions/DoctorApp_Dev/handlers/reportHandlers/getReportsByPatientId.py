@@ -1,7 +1,8 @@
-import json
 import logging
-from utils.dynamo_utils import DynamoDBTable
-from config.constants import REPORT_TABLE
+from utils.dynamo_utils import DynamoDBTable, take
+from utils.projection import parse_fields, apply_projection
+from utils.response import generate_response
+from config.constants import REPORT_TABLE, QUERY_ITEM_BUDGET, REPORT_LIST_FIELDS
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
@@ -19,13 +20,13 @@ def getReportsByPatientId(event, context):
         patient_id = event.get('pathParameters', {}).get('patientId')
         
         if not patient_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                },
-                "body": json.dumps({"message": "Patient ID is required."}),
-            }
+            return generate_response(400, {"message": "Patient ID is required."})
+
+        # Requested fields, lean list view by default
+        try:
+            fields = parse_fields(event, default=REPORT_LIST_FIELDS, required=['reportId'])
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
 
         # Initialize DynamoDB table
         table = DynamoDBTable(REPORT_TABLE)
@@ -35,53 +36,39 @@ def getReportsByPatientId(event, context):
             'IndexName': 'patientId-index',  # Name of your GSI
             'KeyConditionExpression': Key('patientId').eq(patient_id)
         }
+        apply_projection(query_params, fields)
 
         try:
             logger.info(f"Querying DynamoDB for patient_id: {patient_id}")
-            response = table.query(**query_params)
-            
-            items = response.get('Items', [])
+            items, has_more = take(table.iter_query(**query_params), QUERY_ITEM_BUDGET)
             
             # Check if we got any results
             if not items:
-                return {
-                    "statusCode": 404,
-                    "body": json.dumps({
-                        "message": "No reports found for the given patient.",
-                        "patientId": patient_id
-                    }),
-                }
+                return generate_response(404, {
+                    "message": "No reports found for the given patient.",
+                    "patientId": patient_id
+                })
 
             logger.info(f"Successfully retrieved reports for patient: {patient_id}")
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                },
-                "body": json.dumps({
-                    "message": "Reports retrieved successfully",
-                    "patientId": patient_id,
-                    "reports": items
-                }),
-            }
+            return generate_response(200, {
+                "message": "Reports retrieved successfully",
+                "patientId": patient_id,
+                "reports": items,
+                "count": len(items),
+                "hasMore": has_more
+            })
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
             logger.error(f"DynamoDB error: {error_code} - {str(e)}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": "Database error occurred",
-                    "error": error_code
-                }),
-            }
+            return generate_response(500, {
+                "message": "Database error occurred",
+                "error": error_code
+            })
 
     except Exception as e:
         logger.error(f"Error in getReportsByPatientId: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            }),
-        }
\ No newline at end of file
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
\ No newline at end of file
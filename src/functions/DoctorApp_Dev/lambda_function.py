@@ -1,46 +1,56 @@
-import json
+# First import: with INIT_PROFILE=true it times every import after it
+from utils.init_profiler import init_profiler
 import logging
-from handlers.userHandlers.getUserByEmail import getUserByEmail
-from handlers.patientHandlers.addNewPatient import addNewPatient
-from handlers.patientHandlers.getPatientsBYDoctorId import getPatientsBYDoctorId
-from handlers.patientHandlers.getPatientsBYPatientId import getPatientsBYPatientId
-from handlers.reportHandlers.addNewReport import addNewReport
-from handlers.reportHandlers.getReportById import getReportById
-from handlers.reportHandlers.getReportsByPatientId import getReportsByPatientId
-from handlers.userHandlers.addUser import addUser
-from handlers.templateHandlers.getAlltemplates import getAlltemplates
+from utils.handler_loader import load_handler
+from utils.request_log import log_request
+from utils.response import compress_response, generate_response
+from config.constants import BLOB_BACKEND, BLOB_URL_SECRET
+
+init_profiler.mark('imports')
+
+# The local blob store signs its URLs with BLOB_URL_SECRET; without one,
+# fail the cold start here rather than the first request that needs it
+if BLOB_BACKEND == 'local' and not BLOB_URL_SECRET:
+    raise RuntimeError("BLOB_URL_SECRET must be set when BLOB_BACKEND is local")
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Define route handlers
+# Cognito PostConfirmation trigger handler
+ADD_USER_HANDLER = "handlers.userHandlers.addUser:addUser"
+
+# Define route handlers as "module:function" targets; each handler module is
+# imported on first use, so a cold start only pays for the route it serves
 route_handlers = {
     "/user/{emailid}": {
-        "GET": getUserByEmail
+        "GET": "handlers.userHandlers.getUserByEmail:getUserByEmail"
     },
     "/patients": {
-        "POST": addNewPatient
+        "POST": "handlers.patientHandlers.addNewPatient:addNewPatient"
     },
     "/patients/{doctorId}": {
-        "GET": getPatientsBYDoctorId
+        "GET": "handlers.patientHandlers.getPatientsBYDoctorId:getPatientsBYDoctorId"
     },
     "/patient/{patientId}": {
-        "GET": getPatientsBYPatientId
+        "GET": "handlers.patientHandlers.getPatientsBYPatientId:getPatientsBYPatientId"
     },
     "/reports": {
-        "POST": addNewReport
+        "POST": "handlers.reportHandlers.addNewReport:addNewReport"
     },
     "/reports/{reportId}": {
-        "GET": getReportById
+        "GET": "handlers.reportHandlers.getReportById:getReportById"
     },
      "/patient/{patientId}/reports": {
-        "GET": getReportsByPatientId
+        "GET": "handlers.reportHandlers.getReportsByPatientId:getReportsByPatientId"
     },
     "/templates": {
-        "GET": getAlltemplates
+        "GET": "handlers.templateHandlers.getAlltemplates:getAlltemplates"
     },
 }
 
+init_profiler.mark('route_table')
+
+@init_profiler.profile_first_invocation
 def lambda_handler(event, context):
     """
     Main Lambda handler function that processes incoming events
@@ -52,7 +62,7 @@ def lambda_handler(event, context):
     Returns:
         dict: Response containing statusCode and body
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    log_request(event)
 
     # Handle Cognito trigger events
     if event.get('triggerSource') == 'PostConfirmation_ConfirmSignUp':
@@ -61,17 +71,14 @@ def lambda_handler(event, context):
             user_email = event['request']['userAttributes']['email']
             
             # Add user to database
-            add_user_response = addUser(user_email, event)
+            add_user_response = load_handler(ADD_USER_HANDLER)(user_email, event)
             return add_user_response
 
         except Exception as e:
             logger.error(f"Error processing user sign-up: {e}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": "Failed to add user after sign-up."
-                })
-            }
+            return generate_response(500, {
+                "message": "Failed to add user after sign-up."
+            })
 
     # Handle API Gateway events
     resource = event.get('resource')
@@ -80,35 +87,32 @@ def lambda_handler(event, context):
     # Validate request
     if not resource or not method:
         logger.error("Invalid request: Missing resource or method.")
-        return {
-            "statusCode": 400,
-            "body": json.dumps({
-                "message": "Invalid request. Resource or method missing."
-            })
-        }
+        return generate_response(400, {
+            "message": "Invalid request. Resource or method missing."
+        })
 
     # Get appropriate handler
     handlers = route_handlers.get(resource, {})
-    handler = handlers.get(method)
+    target = handlers.get(method)
 
     # Execute handler if found
-    if handler:
+    if target:
         try:
-            return handler(event, context)
+            return compress_response(load_handler(target)(event, context), event)
         except Exception as e:
             logger.error(f"Handler error: {e}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": "Internal server error."
-                })
-            }
+            # Imported here: by now the handler has already loaded botocore
+            from utils.dynamo_retry import is_throttle_error
+            if is_throttle_error(e):
+                return generate_response(503, {
+                    "message": "Service is busy, please retry."
+                }, headers={"Retry-After": "1"})
+            return generate_response(500, {
+                "message": "Internal server error."
+            })
 
     # Handle route not found
     logger.warning(f"No route found for resource: {resource}, method: {method}")
-    return {
-        "statusCode": 404,
-        "body": json.dumps({
-            "message": "Route not found"
-        })
-    }
+    return generate_response(404, {
+        "message": "Route not found"
+    })
@@ -0,0 +1,93 @@
+import logging
+from boto3.dynamodb.conditions import Key
+from utils.dynamo_utils import DynamoDBTable
+from config.constants import DOCTOR_FEED_TABLE, DOCTOR_FEED_PATIENT_INDEX
+
+logger = logging.getLogger()
+
+# The fields a feed entry carries: the patient's, copied on every report of
+# the patient, and the report's own
+FEED_PATIENT_FIELDS = ['patientId', 'name', 'gender', 'dateOfBirth', 'email']
+FEED_REPORT_FIELDS = ['reportId', 'currentStatus', 'reportType', 'updatedAt', 'reportDate']
+
+# Only reports with this status get the sparse completeFeedKey attribute
+FEED_LISTED_STATUS = 'Complete'
+
+def feed_key(report):
+    """
+    Sort key of a report's feed entry. Canonical reportDate strings sort
+    in time order and the reportId keeps reports with the same date apart.
+    """
+    return f"{report['reportDate']}#{report['reportId']}"
+
+def feed_entry(report, patient):
+    """
+    Builds the feed entry of a report: the same merged record
+    GET /trans-reports/{doctorId} used to assemble per request, plus the
+    doctorId/feedKey keys and, for listed reports, completeFeedKey.
+
+    :param report: Report item; needs doctorId, reportId and reportDate.
+    :param patient: Patient item, or an empty dict when unknown.
+    :return: The feed item.
+    """
+    entry = {'doctorId': report['doctorId'], 'feedKey': feed_key(report)}
+    for field in FEED_PATIENT_FIELDS:
+        if patient.get(field) is not None:
+            entry[field] = patient[field]
+    entry['patientId'] = report['patientId']
+    for field in FEED_REPORT_FIELDS:
+        if report.get(field) is not None:
+            entry[field] = report[field]
+    if report.get('currentStatus') == FEED_LISTED_STATUS:
+        entry['completeFeedKey'] = entry['feedKey']
+    return entry
+
+def put_report(report, patient):
+    """
+    Writes (or replaces) the feed entry of a report.
+
+    :param report: The report item as saved.
+    :param patient: The report's patient item.
+    :return: The feed item written.
+    """
+    entry = feed_entry(report, patient)
+    DynamoDBTable(DOCTOR_FEED_TABLE).put_item(entry)
+    return entry
+
+def delete_report(report):
+    """
+    Removes the feed entry of a report, e.g. after the report was deleted
+    or its doctorId or reportDate, and with them the entry's key, changed.
+
+    :param report: The report item as it was when the entry was written.
+    """
+    DynamoDBTable(DOCTOR_FEED_TABLE).delete_item({'doctorId': report['doctorId'], 'feedKey': feed_key(report)})
+
+def update_patient(patient):
+    """
+    Copies a patient's fields onto the feed entries of all their reports,
+    after the patient record was overwritten. The entries are read from the
+    patientId index and rewritten in batches.
+
+    :param patient: The patient item as saved.
+    :return: List of (entry, error message) tuples for entries that could
+             not be written; empty when everything succeeded.
+    """
+    table = DynamoDBTable(DOCTOR_FEED_TABLE)
+    entries = list(table.iter_query(
+        IndexName=DOCTOR_FEED_PATIENT_INDEX,
+        KeyConditionExpression=Key('patientId').eq(patient['patientId'])
+    ))
+    if not entries:
+        return []
+
+    for entry in entries:
+        for field in FEED_PATIENT_FIELDS:
+            if patient.get(field) is None:
+                entry.pop(field, None)
+            else:
+                entry[field] = patient[field]
+    failures = table.batch_put_items(entries)
+    for entry, error in failures:
+        logger.error(f"Feed entry {entry['doctorId']}/{entry['feedKey']} not updated: {error}")
+    return failures
@@ -0,0 +1,1161 @@
+import copy
+import random
+import re
+import threading
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+from config.constants import (
+    TABLE_KEY_SCHEMAS,
+    DYNAMODB_MEMORY_LATENCY_MS,
+    DYNAMODB_MEMORY_LATENCY_JITTER_MS,
+    DYNAMODB_MEMORY_LATENCY_PER_KB_MS,
+    DYNAMODB_MEMORY_THROTTLE_RATE,
+)
+
+# DynamoDB service limits enforced by the in-memory backend
+PAGE_SIZE_LIMIT = 1024 * 1024
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_SIZE_LIMIT = 16 * 1024 * 1024
+BATCH_WRITE_MAX_ITEMS = 25
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+_TOKEN_PATTERN = re.compile(
+    r'\s*(?:(?P<op><>|<=|>=|[=<>(),.\[\]+-])'
+    r'|(?P<name>#[A-Za-z0-9_]+)'
+    r'|(?P<value>:[A-Za-z0-9_]+)'
+    r'|(?P<number>\d+)'
+    r'|(?P<word>[A-Za-z_][A-Za-z0-9_]*))'
+)
+_COMPARATORS = {'=', '<>', '<', '<=', '>', '>='}
+_MISSING = object()
+
+
+def _client_error(code, message, operation):
+    return ClientError(
+        {'Error': {'Code': code, 'Message': message}, 'ResponseMetadata': {'HTTPStatusCode': 400}},
+        operation
+    )
+
+def _validation_error(message, operation):
+    return _client_error('ValidationException', message, operation)
+
+def _normalize(value):
+    """
+    Round-trips a value through the boto3 type serializer, so stored data
+    looks exactly like what the real service hands back (ints become
+    Decimal, floats are rejected, and so on).
+    """
+    return _deserializer.deserialize(_serializer.serialize(value))
+
+def _dynamo_type(value):
+    if isinstance(value, bool):
+        return 'BOOL'
+    if isinstance(value, (Decimal, int)):
+        return 'N'
+    if isinstance(value, str):
+        return 'S'
+    if isinstance(value, (bytes, bytearray, Binary)):
+        return 'B'
+    if value is None:
+        return 'NULL'
+    if isinstance(value, dict):
+        return 'M'
+    if isinstance(value, list):
+        return 'L'
+    if isinstance(value, set):
+        return _serializer.serialize(value).popitem()[0]
+    raise TypeError(f"Unsupported type {type(value)}")
+
+def _order(value):
+    """
+    Sort order of a key value: numbers numerically, strings and binary by
+    their bytes, as DynamoDB orders sort keys.
+    """
+    if isinstance(value, str):
+        return (1, value.encode('utf-8'))
+    if isinstance(value, Binary):
+        return (2, bytes(value.value))
+    if isinstance(value, (bytes, bytearray)):
+        return (2, bytes(value))
+    return (0, value)
+
+def _size(value):
+    """
+    Approximates DynamoDB's item size accounting, in bytes.
+    """
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (Decimal, int)):
+        return len(str(value).lstrip('-').replace('.', '')) // 2 + 1
+    if isinstance(value, Binary):
+        return len(value.value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return 3 + sum(len(name.encode('utf-8')) + _size(item) + 1 for name, item in value.items())
+    if isinstance(value, list):
+        return 3 + sum(_size(item) + 1 for item in value)
+    if isinstance(value, set):
+        return sum(_size(item) for item in value)
+    return 0
+
+def item_size(item):
+    return sum(len(name.encode('utf-8')) + _size(value) for name, value in item.items())
+
+
+class _ExpressionParser:
+    def __init__(self, expression, names, values, operation):
+        """
+        Recursive-descent parser for DynamoDB condition, key condition,
+        update and projection expressions.
+        """
+        self.expression = expression
+        self.names = names or {}
+        self.values = values or {}
+        self.operation = operation
+        self.tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = _TOKEN_PATTERN.match(expression, position)
+            if not match or match.end() == position:
+                raise self.error(f"Syntax error near: {expression[position:position + 20]!r}")
+            kind = match.lastgroup
+            self.tokens.append((kind, match.group(kind)))
+            position = match.end()
+        self.position = 0
+
+    def error(self, message):
+        return _validation_error(f"Invalid expression {self.expression!r}: {message}", self.operation)
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            raise self.error("unexpected end of expression")
+        self.position += 1
+        return token
+
+    def expect(self, text):
+        kind, token = self.next()
+        if token != text:
+            raise self.error(f"expected {text!r}, got {token!r}")
+
+    def is_keyword(self, keyword, offset=0):
+        kind, token = self.peek(offset)
+        return kind == 'word' and token.upper() == keyword
+
+    def at_end(self):
+        return self.position >= len(self.tokens)
+
+    def finish(self):
+        if not self.at_end():
+            raise self.error(f"unexpected token {self.peek()[1]!r}")
+
+    # Operands
+
+    def parse_path(self):
+        path = [self._parse_name()]
+        while True:
+            kind, token = self.peek()
+            if token == '.':
+                self.next()
+                path.append(self._parse_name())
+            elif token == '[':
+                self.next()
+                kind, index = self.next()
+                if kind != 'number':
+                    raise self.error("list index must be a number")
+                self.expect(']')
+                path.append(int(index))
+            else:
+                return path
+
+    def _parse_name(self):
+        kind, token = self.next()
+        if kind == 'name':
+            if token not in self.names:
+                raise self.error(f"undefined attribute name {token}")
+            return self.names[token]
+        if kind == 'word':
+            return token
+        raise self.error(f"expected an attribute name, got {token!r}")
+
+    def parse_value(self):
+        kind, token = self.next()
+        if kind != 'value':
+            raise self.error(f"expected a value placeholder, got {token!r}")
+        if token not in self.values:
+            raise self.error(f"undefined attribute value {token}")
+        return ('value', self.values[token])
+
+    def parse_operand(self):
+        kind, token = self.peek()
+        if kind == 'value':
+            return self.parse_value()
+        if kind == 'word' and token == 'size' and self.peek(1)[1] == '(':
+            self.next()
+            self.expect('(')
+            path = self.parse_path()
+            self.expect(')')
+            return ('size', path)
+        return ('path', self.parse_path())
+
+    # Conditions
+
+    def parse_condition(self):
+        condition = self.parse_condition_or()
+        self.finish()
+        return condition
+
+    def parse_condition_or(self):
+        condition = self._parse_and()
+        while self.is_keyword('OR'):
+            self.next()
+            condition = ('or', condition, self._parse_and())
+        return condition
+
+    def _parse_and(self):
+        condition = self._parse_not()
+        while self.is_keyword('AND'):
+            self.next()
+            condition = ('and', condition, self._parse_not())
+        return condition
+
+    def _parse_not(self):
+        if self.is_keyword('NOT'):
+            self.next()
+            return ('not', self._parse_not())
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        kind, token = self.peek()
+        if token == '(':
+            self.next()
+            condition = self.parse_condition_or()
+            self.expect(')')
+            return condition
+        if kind == 'word' and token != 'size' and self.peek(1)[1] == '(':
+            return self._parse_function()
+
+        left = self.parse_operand()
+        if self.is_keyword('BETWEEN'):
+            self.next()
+            low = self.parse_operand()
+            if not self.is_keyword('AND'):
+                raise self.error("BETWEEN needs AND")
+            self.next()
+            return ('between', left, low, self.parse_operand())
+        if self.is_keyword('IN'):
+            self.next()
+            self.expect('(')
+            options = [self.parse_operand()]
+            while self.peek()[1] == ',':
+                self.next()
+                options.append(self.parse_operand())
+            self.expect(')')
+            return ('in', left, options)
+        kind, comparator = self.next()
+        if comparator not in _COMPARATORS:
+            raise self.error(f"expected a comparator, got {comparator!r}")
+        return ('compare', comparator, left, self.parse_operand())
+
+    def _parse_function(self):
+        kind, function = self.next()
+        if function not in ('attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with', 'contains'):
+            raise self.error(f"invalid function name {function}")
+        self.expect('(')
+        args = [('path', self.parse_path())]
+        if function not in ('attribute_exists', 'attribute_not_exists'):
+            self.expect(',')
+            args.append(self.parse_operand())
+        self.expect(')')
+        return ('function', function, args)
+
+    # Updates and projections
+
+    def parse_update(self):
+        actions = []
+        seen = set()
+        while not self.at_end():
+            kind, clause = self.next()
+            clause = (clause or '').upper()
+            if clause not in ('SET', 'REMOVE', 'ADD', 'DELETE') or clause in seen:
+                raise self.error(f"unexpected clause {clause!r}")
+            seen.add(clause)
+            while True:
+                path = self.parse_path()
+                if clause == 'SET':
+                    self.expect('=')
+                    actions.append(('SET', path, self._parse_set_value()))
+                elif clause == 'REMOVE':
+                    actions.append(('REMOVE', path, None))
+                else:
+                    actions.append((clause, path, self.parse_value()))
+                if self.peek()[1] != ',':
+                    break
+                self.next()
+        if not actions:
+            raise self.error("empty update expression")
+        return actions
+
+    def _parse_set_value(self):
+        value = self._parse_set_operand()
+        kind, token = self.peek()
+        if token in ('+', '-'):
+            self.next()
+            return (token, value, self._parse_set_operand())
+        return value
+
+    def _parse_set_operand(self):
+        kind, token = self.peek()
+        if kind == 'word' and token in ('if_not_exists', 'list_append') and self.peek(1)[1] == '(':
+            self.next()
+            self.expect('(')
+            first = ('path', self.parse_path()) if token == 'if_not_exists' else self._parse_set_operand()
+            self.expect(',')
+            second = self._parse_set_operand()
+            self.expect(')')
+            return (token, first, second)
+        if kind == 'value':
+            return self.parse_value()
+        return ('path', self.parse_path())
+
+    def parse_projection(self):
+        paths = [self.parse_path()]
+        while self.peek()[1] == ',':
+            self.next()
+            paths.append(self.parse_path())
+        self.finish()
+        return paths
+
+
+def _get_path(item, path):
+    value = item
+    for element in path:
+        if isinstance(element, int):
+            if not isinstance(value, list) or element >= len(value):
+                return _MISSING
+            value = value[element]
+        else:
+            if not isinstance(value, dict) or element not in value:
+                return _MISSING
+            value = value[element]
+    return value
+
+def _evaluate_operand(operand, item, operation):
+    kind = operand[0]
+    if kind == 'value':
+        return operand[1]
+    if kind == 'path':
+        return _get_path(item, operand[1])
+    if kind == 'size':
+        value = _get_path(item, operand[1])
+        if value is _MISSING or isinstance(value, (bool, Decimal, int)) or value is None:
+            return _MISSING
+        if isinstance(value, Binary):
+            return Decimal(len(value.value))
+        return Decimal(len(value))
+    if kind == 'if_not_exists':
+        value = _get_path(item, operand[1][1])
+        return value if value is not _MISSING else _evaluate_operand(operand[2], item, operation)
+    if kind == 'list_append':
+        first = _evaluate_operand(operand[1], item, operation)
+        second = _evaluate_operand(operand[2], item, operation)
+        if not isinstance(first, list) or not isinstance(second, list):
+            raise _validation_error("list_append needs two lists", operation)
+        return first + second
+    if kind in ('+', '-'):
+        first = _evaluate_operand(operand[1], item, operation)
+        second = _evaluate_operand(operand[2], item, operation)
+        if _MISSING in (first, second):
+            raise _validation_error("An operand in the update expression does not exist", operation)
+        if _dynamo_type(first) != 'N' or _dynamo_type(second) != 'N':
+            raise _validation_error("Incorrect operand type for operator", operation)
+        return first + second if kind == '+' else first - second
+    raise _validation_error(f"Unsupported operand {kind}", operation)
+
+def _compare(comparator, left, right):
+    if left is _MISSING or right is _MISSING:
+        return comparator == '<>'
+    same_type = _dynamo_type(left) == _dynamo_type(right)
+    if comparator == '=':
+        return same_type and left == right
+    if comparator == '<>':
+        return not same_type or left != right
+    if not same_type or _dynamo_type(left) not in ('N', 'S', 'B'):
+        return False
+    left, right = _order(left), _order(right)
+    if comparator == '<':
+        return left < right
+    if comparator == '<=':
+        return left <= right
+    if comparator == '>':
+        return left > right
+    return left >= right
+
+def _evaluate_condition(condition, item, operation):
+    kind = condition[0]
+    if kind == 'and':
+        return _evaluate_condition(condition[1], item, operation) and _evaluate_condition(condition[2], item, operation)
+    if kind == 'or':
+        return _evaluate_condition(condition[1], item, operation) or _evaluate_condition(condition[2], item, operation)
+    if kind == 'not':
+        return not _evaluate_condition(condition[1], item, operation)
+    if kind == 'compare':
+        return _compare(
+            condition[1],
+            _evaluate_operand(condition[2], item, operation),
+            _evaluate_operand(condition[3], item, operation)
+        )
+    if kind == 'between':
+        value = _evaluate_operand(condition[1], item, operation)
+        return (
+            _compare('>=', value, _evaluate_operand(condition[2], item, operation))
+            and _compare('<=', value, _evaluate_operand(condition[3], item, operation))
+        )
+    if kind == 'in':
+        value = _evaluate_operand(condition[1], item, operation)
+        return any(_compare('=', value, _evaluate_operand(option, item, operation)) for option in condition[2])
+
+    function, args = condition[1], condition[2]
+    value = _evaluate_operand(args[0], item, operation)
+    if function == 'attribute_exists':
+        return value is not _MISSING
+    if function == 'attribute_not_exists':
+        return value is _MISSING
+    if value is _MISSING:
+        return False
+    argument = _evaluate_operand(args[1], item, operation)
+    if function == 'attribute_type':
+        return _dynamo_type(value) == argument
+    if function == 'begins_with':
+        if isinstance(value, str) and isinstance(argument, str):
+            return value.startswith(argument)
+        if _dynamo_type(value) == 'B' and _dynamo_type(argument) == 'B':
+            return _order(value)[1].startswith(_order(argument)[1])
+        return False
+    # contains
+    if isinstance(value, str):
+        return isinstance(argument, str) and argument in value
+    if isinstance(value, (set, list)):
+        return argument in value
+    return False
+
+def _set_path(item, path, value, operation):
+    parent = _get_path(item, path[:-1]) if len(path) > 1 else item
+    last = path[-1]
+    if isinstance(last, int):
+        if not isinstance(parent, list):
+            raise _validation_error("The document path provided in the update expression is invalid for update", operation)
+        if last < len(parent):
+            parent[last] = value
+        else:
+            parent.append(value)
+    else:
+        if not isinstance(parent, dict):
+            raise _validation_error("The document path provided in the update expression is invalid for update", operation)
+        parent[last] = value
+
+def _remove_path(item, path):
+    parent = _get_path(item, path[:-1]) if len(path) > 1 else item
+    last = path[-1]
+    if isinstance(last, int):
+        if isinstance(parent, list) and last < len(parent):
+            del parent[last]
+    elif isinstance(parent, dict):
+        parent.pop(last, None)
+
+def _project(item, paths):
+    projected = {}
+    for path in paths:
+        value = _get_path(item, path)
+        if value is _MISSING:
+            continue
+        target = projected
+        for element, following in zip(path, path[1:]):
+            container = [] if isinstance(following, int) else {}
+            if isinstance(target, list):
+                target.append(container)
+                target = container
+            else:
+                target = target.setdefault(element, container)
+        if isinstance(target, list):
+            target.append(copy.deepcopy(value))
+        else:
+            target[path[-1]] = copy.deepcopy(value)
+    return projected
+
+
+class _ExpressionContext:
+    def __init__(self, params, operation):
+        """
+        Resolves the expressions of one request. boto3 condition objects
+        are built into expression strings with the same builder the real
+        resource uses, so both forms go through a single parser.
+        """
+        self.operation = operation
+        self.names = dict(params.get('ExpressionAttributeNames') or {})
+        self.values = {
+            placeholder: _normalize(value)
+            for placeholder, value in (params.get('ExpressionAttributeValues') or {}).items()
+        }
+        self._builder = ConditionExpressionBuilder()
+
+    def _parser(self, expression, is_key_condition=False):
+        if isinstance(expression, ConditionBase):
+            built = self._builder.build_expression(expression, is_key_condition=is_key_condition)
+            self.names.update(built.attribute_name_placeholders)
+            self.values.update({
+                placeholder: _normalize(value)
+                for placeholder, value in built.attribute_value_placeholders.items()
+            })
+            expression = built.condition_expression
+        return _ExpressionParser(expression, self.names, self.values, self.operation)
+
+    def condition(self, expression, is_key_condition=False):
+        if expression is None:
+            return None
+        return self._parser(expression, is_key_condition).parse_condition()
+
+    def update(self, expression):
+        parser = self._parser(expression)
+        actions = parser.parse_update()
+        parser.finish()
+        return actions
+
+    def projection(self, expression):
+        if not expression:
+            return None
+        return self._parser(expression).parse_projection()
+
+
+class InMemoryTable:
+    def __init__(self, backend, table_name, partition_key, sort_key=None, indexes=None):
+        """
+        Thread-safe in-memory DynamoDB table with the boto3 Table interface
+        (get_item, put_item, update_item, delete_item, query, scan).
+
+        Items are kept per index partition and sorted on demand, queries and
+        scans are paginated at Limit items or 1 MB of evaluated data, and
+        scan segments split the table by a hash of the partition key like
+        the real service.
+
+        :param backend: The owning InMemoryDynamoDB.
+        :param table_name: The name of the table.
+        :param partition_key: Partition key attribute.
+        :param sort_key: Optional sort key attribute.
+        :param indexes: Dict of GSI name to (partition key, sort key or None).
+        """
+        self.backend = backend
+        self.table_name = self.name = table_name
+        self.key_schema = (partition_key, sort_key)
+        self.indexes = {None: self.key_schema}
+        self.indexes.update(indexes or {})
+        self._lock = threading.RLock()
+        self._items = {}
+        self._partitions = {index_name: {} for index_name in self.indexes}
+        self._sorted = {}
+        # Receives item changes once InMemoryDynamoDB.enable_stream() is called
+        self.stream = None
+
+    # Boto3 Table interface
+
+    def get_item(self, Key, **params):
+        with self.backend.request('GetItem') as request:
+            context = _ExpressionContext(params, 'GetItem')
+            projection = context.projection(params.get('ProjectionExpression'))
+            with self._lock:
+                item = self._items.get(self._base_key(_normalize(Key), 'GetItem'))
+                response = {}
+                if item is not None:
+                    request.read(item_size(item))
+                    response['Item'] = _project(item, projection) if projection else copy.deepcopy(item)
+            return response
+
+    def put_item(self, Item, **params):
+        with self.backend.request('PutItem') as request:
+            item = _normalize(Item)
+            request.write(item_size(item))
+            context = _ExpressionContext(params, 'PutItem')
+            condition = context.condition(params.get('ConditionExpression'))
+            with self._lock:
+                key = self._base_key(item, 'PutItem', whole_item=True)
+                old = self._items.get(key)
+                self._check_condition(condition, old)
+                self._store(key, old, item)
+            if params.get('ReturnValues', 'NONE') == 'ALL_OLD' and old is not None:
+                return {'Attributes': copy.deepcopy(old)}
+            return {}
+
+    def update_item(self, Key, **params):
+        with self.backend.request('UpdateItem') as request:
+            context = _ExpressionContext(params, 'UpdateItem')
+            actions = context.update(params['UpdateExpression'])
+            condition = context.condition(params.get('ConditionExpression'))
+            return_values = params.get('ReturnValues', 'NONE')
+            with self._lock:
+                key = self._base_key(_normalize(Key), 'UpdateItem')
+                old = self._items.get(key)
+                self._check_condition(condition, old)
+                current = old or _normalize(Key)
+                item = copy.deepcopy(current)
+                updated = self._apply_update(actions, current, item)
+                request.write(item_size(item))
+                self._store(key, old, item)
+
+            if return_values == 'ALL_NEW':
+                return {'Attributes': copy.deepcopy(item)}
+            if return_values == 'ALL_OLD':
+                return {'Attributes': copy.deepcopy(old)} if old is not None else {}
+            if return_values in ('UPDATED_NEW', 'UPDATED_OLD'):
+                source = item if return_values == 'UPDATED_NEW' else (old or {})
+                attributes = {name: copy.deepcopy(source[name]) for name in updated if name in source}
+                return {'Attributes': attributes} if attributes else {}
+            return {}
+
+    def delete_item(self, Key, **params):
+        with self.backend.request('DeleteItem') as request:
+            context = _ExpressionContext(params, 'DeleteItem')
+            condition = context.condition(params.get('ConditionExpression'))
+            with self._lock:
+                key = self._base_key(_normalize(Key), 'DeleteItem')
+                old = self._items.get(key)
+                self._check_condition(condition, old)
+                if old is not None:
+                    request.write(item_size(old))
+                    self._store(key, old, None)
+            if params.get('ReturnValues', 'NONE') == 'ALL_OLD' and old is not None:
+                return {'Attributes': copy.deepcopy(old)}
+            return {}
+
+    def query(self, **params):
+        with self.backend.request('Query') as request:
+            index_name = params.get('IndexName')
+            partition_key, sort_key = self._index_schema(index_name, 'Query')
+            if index_name and params.get('ConsistentRead'):
+                raise _validation_error("Consistent reads are not supported on global secondary indexes", 'Query')
+            context = _ExpressionContext(params, 'Query')
+            if 'KeyConditionExpression' not in params:
+                raise _validation_error("Either the KeyConditions or KeyConditionExpression parameter must be specified", 'Query')
+            key_condition = context.condition(params['KeyConditionExpression'], is_key_condition=True)
+            partition_value = self._partition_value(key_condition, partition_key, sort_key)
+
+            with self._lock:
+                orders, items = self._sorted_partition(index_name, _order(partition_value))
+                return self._read_page(
+                    request, context, params, orders, items, key_condition,
+                    self._query_order(index_name), forward=params.get('ScanIndexForward', True)
+                )
+
+    def scan(self, **params):
+        with self.backend.request('Scan') as request:
+            index_name = params.get('IndexName')
+            self._index_schema(index_name, 'Scan')
+            segment = params.get('Segment')
+            total_segments = params.get('TotalSegments')
+            if (segment is None) != (total_segments is None):
+                raise _validation_error("Segment and TotalSegments must be specified together", 'Scan')
+            if total_segments is not None and not (0 <= segment < total_segments <= 1000000):
+                raise _validation_error("Segment must be in [0, TotalSegments)", 'Scan')
+            context = _ExpressionContext(params, 'Scan')
+
+            with self._lock:
+                orders, items = self._sorted_scan(index_name)
+                if total_segments is not None:
+                    selected = [
+                        position for position, order in enumerate(orders)
+                        if order[0] % total_segments == segment
+                    ]
+                    orders = [orders[position] for position in selected]
+                    items = [items[position] for position in selected]
+                return self._read_page(
+                    request, context, params, orders, items, None,
+                    self._scan_order(index_name), forward=True
+                )
+
+    # Helpers for offline setups
+
+    def load(self, items):
+        """
+        Stores items directly, without latency, throttling or accounting.
+        """
+        with self._lock:
+            for item in items:
+                item = _normalize(item)
+                key = self._base_key(item, 'PutItem', whole_item=True)
+                self._store(key, self._items.get(key), item, publish=False)
+
+    def items(self):
+        with self._lock:
+            return [copy.deepcopy(item) for item in self._items.values()]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._partitions = {index_name: {} for index_name in self.indexes}
+            self._sorted.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    # Internals
+
+    def _base_key(self, key, operation, whole_item=False):
+        partition_key, sort_key = self.key_schema
+        expected = {partition_key} | ({sort_key} if sort_key else set())
+        if not expected.issubset(key) or (not whole_item and set(key) != expected):
+            raise _validation_error("The provided key element does not match the schema", operation)
+        for name in expected:
+            if _dynamo_type(key[name]) not in ('S', 'N', 'B'):
+                raise _validation_error("The provided key element does not match the schema", operation)
+        return (_order(key[partition_key]), _order(key[sort_key]) if sort_key else ())
+
+    def _key_of(self, item, index_name):
+        """
+        Key attributes of an item for LastEvaluatedKey: the table key plus
+        the index key when reading an index.
+        """
+        names = [name for name in self.key_schema + self.indexes[index_name] if name]
+        return {name: copy.deepcopy(item[name]) for name in dict.fromkeys(names)}
+
+    def _index_schema(self, index_name, operation):
+        if index_name not in self.indexes:
+            raise _validation_error(
+                f"The table does not have the specified index: {index_name}", operation
+            )
+        return self.indexes[index_name]
+
+    def _check_condition(self, condition, item):
+        if condition is not None and not _evaluate_condition(condition, item or {}, 'ConditionalCheck'):
+            raise _client_error(
+                'ConditionalCheckFailedException', 'The conditional request failed', 'ConditionalCheck'
+            )
+
+    def _apply_update(self, actions, current, item):
+        partition_key, sort_key = self.key_schema
+        updated = []
+        for action, path, operand in actions:
+            if path[0] in (partition_key, sort_key):
+                raise _validation_error(
+                    f"Cannot update attribute {path[0]}. This attribute is part of the key", 'UpdateItem'
+                )
+            updated.append(path[0])
+            if action == 'SET':
+                _set_path(item, path, copy.deepcopy(_evaluate_operand(operand, current, 'UpdateItem')), 'UpdateItem')
+            elif action == 'REMOVE':
+                _remove_path(item, path)
+            elif action == 'ADD':
+                value = _get_path(item, path)
+                argument = operand[1]
+                if value is _MISSING:
+                    _set_path(item, path, copy.deepcopy(argument), 'UpdateItem')
+                elif _dynamo_type(value) == _dynamo_type(argument) == 'N':
+                    _set_path(item, path, value + argument, 'UpdateItem')
+                elif isinstance(value, set) and _dynamo_type(value) == _dynamo_type(argument):
+                    _set_path(item, path, value | argument, 'UpdateItem')
+                else:
+                    raise _validation_error("Incorrect operand type for ADD", 'UpdateItem')
+            else:
+                value = _get_path(item, path)
+                if value is _MISSING:
+                    continue
+                if not isinstance(value, set) or _dynamo_type(value) != _dynamo_type(operand[1]):
+                    raise _validation_error("Incorrect operand type for DELETE", 'UpdateItem')
+                remaining = value - operand[1]
+                if remaining:
+                    _set_path(item, path, remaining, 'UpdateItem')
+                else:
+                    _remove_path(item, path)
+        return list(dict.fromkeys(updated))
+
+    def _store(self, key, old, item, publish=True):
+        # Like DynamoDB Streams, writes that change nothing publish nothing
+        if publish and self.stream is not None and old != item:
+            self.stream.publish(self.table_name, self._key_of(item if item is not None else old, None), old, item)
+        for index_name, (partition_key, sort_key) in self.indexes.items():
+            for image, add in ((old, False), (item, True)):
+                if image is None or partition_key not in image or (sort_key and sort_key not in image):
+                    continue
+                partition = _order(image[partition_key])
+                members = self._partitions[index_name].setdefault(partition, {})
+                if add:
+                    members[key] = image
+                else:
+                    members.pop(key, None)
+                    if not members:
+                        del self._partitions[index_name][partition]
+                self._sorted.pop((index_name, partition), None)
+            self._sorted.pop((index_name, None), None)
+        if item is None:
+            self._items.pop(key, None)
+        else:
+            self._items[key] = item
+
+    def _query_order(self, index_name):
+        sort_key = self.indexes[index_name][1]
+        base_order = self._base_order
+
+        def order(item):
+            return ((_order(item[sort_key]) if sort_key else ()), base_order(item))
+        return order
+
+    def _scan_order(self, index_name):
+        partition_key = self.indexes[index_name][0]
+        base_order = self._base_order
+
+        def order(item):
+            partition_hash = zlib.crc32(repr(_order(item[partition_key])).encode('utf-8'))
+            return (partition_hash, base_order(item))
+        return order
+
+    def _base_order(self, item):
+        partition_key, sort_key = self.key_schema
+        return (_order(item[partition_key]), _order(item[sort_key]) if sort_key else ())
+
+    def _sorted_partition(self, index_name, partition):
+        cached = self._sorted.get((index_name, partition))
+        if cached is None:
+            members = self._partitions[index_name].get(partition, {})
+            cached = self._sort(members.values(), self._query_order(index_name))
+            self._sorted[(index_name, partition)] = cached
+        return cached
+
+    def _sorted_scan(self, index_name):
+        cached = self._sorted.get((index_name, None))
+        if cached is None:
+            members = (
+                item for partition in self._partitions[index_name].values()
+                for item in partition.values()
+            )
+            cached = self._sort(members, self._scan_order(index_name))
+            self._sorted[(index_name, None)] = cached
+        return cached
+
+    def _sort(self, items, order):
+        pairs = sorted(((order(item), item) for item in items), key=lambda pair: pair[0])
+        return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+    def _partition_value(self, key_condition, partition_key, sort_key):
+        leaves = []
+        pending = [key_condition]
+        while pending:
+            node = pending.pop()
+            if node[0] == 'and':
+                pending.extend(node[1:])
+            else:
+                leaves.append(node)
+
+        partition_value = _MISSING
+        for leaf in leaves:
+            if leaf[0] == 'function':
+                path = leaf[2][0][1]
+                allowed = leaf[1] == 'begins_with' and path == [sort_key]
+            elif leaf[0] in ('compare', 'between'):
+                operand = leaf[2] if leaf[0] == 'compare' else leaf[1]
+                path = operand[1] if operand[0] == 'path' else None
+                if leaf[0] == 'compare' and leaf[1] == '=' and path == [partition_key] and leaf[3][0] == 'value':
+                    partition_value = leaf[3][1]
+                    continue
+                allowed = path == [sort_key] and (leaf[0] == 'between' or leaf[1] != '<>')
+            else:
+                allowed = False
+            if not allowed:
+                raise _validation_error("Query key condition not supported", 'Query')
+        if partition_value is _MISSING:
+            raise _validation_error("Query condition missed key schema element", 'Query')
+        return partition_value
+
+    def _read_page(self, request, context, params, orders, items, key_condition, order, forward):
+        operation = request.operation
+        limit = params.get('Limit')
+        if limit is not None and limit < 1:
+            raise _validation_error("Limit must be at least 1", operation)
+        filter_condition = context.condition(params.get('FilterExpression'))
+        projection = context.projection(params.get('ProjectionExpression'))
+        start_key = params.get('ExclusiveStartKey')
+
+        if forward:
+            start = bisect_right(orders, order(_normalize(start_key))) if start_key else 0
+            candidates = (items[position] for position in range(start, len(items)))
+            remaining = len(items) - start
+        else:
+            end = bisect_left(orders, order(_normalize(start_key))) if start_key else len(items)
+            candidates = (items[position] for position in range(end - 1, -1, -1))
+            remaining = end
+
+        matched = []
+        scanned = 0
+        read_bytes = 0
+        last_item = None
+        for item in candidates:
+            remaining -= 1
+            # Items outside the sort key range are never read
+            if key_condition is not None and not _evaluate_condition(key_condition, item, operation):
+                continue
+            scanned += 1
+            read_bytes += item_size(item)
+            if filter_condition is None or _evaluate_condition(filter_condition, item, operation):
+                matched.append(item)
+            if (limit is not None and scanned >= limit) or (read_bytes >= PAGE_SIZE_LIMIT and remaining):
+                last_item = item
+                break
+        request.read(read_bytes)
+
+        response = {'Count': len(matched), 'ScannedCount': scanned}
+        if params.get('Select') != 'COUNT':
+            response['Items'] = [
+                _project(item, projection) if projection else copy.deepcopy(item)
+                for item in matched
+            ]
+        if last_item is not None:
+            response['LastEvaluatedKey'] = self._key_of(last_item, params.get('IndexName'))
+        return response
+
+
+class _Request:
+    def __init__(self, backend, operation):
+        self.backend = backend
+        self.operation = operation
+        self.read_bytes = 0
+        self.write_bytes = 0
+
+    def read(self, size):
+        self.read_bytes += size
+
+    def write(self, size):
+        self.write_bytes += size
+
+    def __enter__(self):
+        self.backend.maybe_throttle(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.backend.record(self, failed=exc_type is not None)
+        return False
+
+
+class InMemoryDynamoDB:
+    def __init__(self, schemas=None, latency_ms=None, latency_jitter_ms=None,
+                 latency_per_kb_ms=None, operation_latency_ms=None, throttle_rate=None, seed=None):
+        """
+        In-memory stand-in for the boto3 DynamoDB service resource, for
+        benchmarks and load tests without an AWS account. It offers
+        Table(name), batch_get_item and batch_write_item with the same
+        request and response shapes, errors (botocore ClientError) and
+        service limits as the real resource.
+
+        Every request sleeps for a simulated network latency:
+        latency_ms + uniform(0, latency_jitter_ms) + latency_per_kb_ms per
+        KB read or written. Sleeping happens outside the table locks, so
+        concurrent callers overlap like they would against the service.
+
+        :param schemas: Dict of table name to {'key': (partition, sort),
+                        'indexes': {name: (partition, sort)}}; defaults to
+                        TABLE_KEY_SCHEMAS.
+        :param latency_ms: Base latency per request in milliseconds.
+        :param latency_jitter_ms: Random extra latency per request.
+        :param latency_per_kb_ms: Extra latency per KB of data.
+        :param operation_latency_ms: Per-operation overrides of latency_ms,
+                        e.g. {'Query': 8, 'BatchWriteItem': 25}.
+        :param throttle_rate: Probability that a request fails with
+                        ProvisionedThroughputExceededException, or that a
+                        batch key/item comes back unprocessed.
+        :param seed: Optional seed for the jitter and throttle randomness.
+        """
+        self.latency_ms = DYNAMODB_MEMORY_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_jitter_ms = DYNAMODB_MEMORY_LATENCY_JITTER_MS if latency_jitter_ms is None else latency_jitter_ms
+        self.latency_per_kb_ms = DYNAMODB_MEMORY_LATENCY_PER_KB_MS if latency_per_kb_ms is None else latency_per_kb_ms
+        self.operation_latency_ms = dict(operation_latency_ms or {})
+        self.throttle_rate = DYNAMODB_MEMORY_THROTTLE_RATE if throttle_rate is None else throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tables = {}
+        self.reset_stats()
+        for table_name, schema in (TABLE_KEY_SCHEMAS if schemas is None else schemas).items():
+            self.create_table(table_name, *schema['key'], indexes=schema.get('indexes'))
+
+    @property
+    def meta(self):
+        # DynamoDBRegistry.client() reads resource.meta.client; the
+        # in-memory backend only speaks the resource-level interface
+        return _Meta(self)
+
+    def create_table(self, table_name, partition_key, sort_key=None, indexes=None):
+        """
+        Creates (or replaces) an empty table.
+
+        :return: The InMemoryTable.
+        """
+        with self._lock:
+            table = InMemoryTable(self, table_name, partition_key, sort_key, indexes)
+            self._tables[table_name] = table
+            return table
+
+    def enable_stream(self, table_name, stream):
+        """
+        Publishes every change to a table's items to `stream`, like
+        enabling DynamoDB Streams with NEW_AND_OLD_IMAGES. Items added
+        with InMemoryTable.load() are not published.
+
+        :param table_name: The table to stream.
+        :param stream: A utils.local_stream.LocalChangeStream, or None to
+                       stop streaming.
+        """
+        self.Table(table_name).stream = stream
+
+    def Table(self, table_name):
+        table = self._tables.get(table_name)
+        if table is None:
+            raise _client_error(
+                'ResourceNotFoundException', f"Requested resource not found: Table: {table_name} not found", 'DescribeTable'
+            )
+        return table
+
+    def tables(self):
+        return dict(self._tables)
+
+    def batch_get_item(self, RequestItems, **params):
+        with self.request('BatchGetItem') as request:
+            total_keys = sum(len(table_request.get('Keys', [])) for table_request in RequestItems.values())
+            if total_keys > BATCH_GET_MAX_KEYS:
+                raise _validation_error(f"Too many items requested for the BatchGetItem call", 'BatchGetItem')
+            responses = {}
+            unprocessed = {}
+            response_bytes = 0
+            for table_name, table_request in RequestItems.items():
+                table = self._batch_table(table_name, 'BatchGetItem')
+                keys = table_request.get('Keys', [])
+                signatures = [table._base_key(_normalize(key), 'BatchGetItem') for key in keys]
+                if len(set(signatures)) != len(signatures):
+                    raise _validation_error("Provided list of item keys contains duplicates", 'BatchGetItem')
+                context = _ExpressionContext(table_request, 'BatchGetItem')
+                projection = context.projection(table_request.get('ProjectionExpression'))
+
+                found = responses.setdefault(table_name, [])
+                with table._lock:
+                    for key, signature in zip(keys, signatures):
+                        if self._unlucky() or response_bytes >= BATCH_GET_SIZE_LIMIT:
+                            pending = unprocessed.setdefault(table_name, dict(table_request, Keys=[]))
+                            pending['Keys'].append(key)
+                            continue
+                        item = table._items.get(signature)
+                        if item is not None:
+                            size = item_size(item)
+                            response_bytes += size
+                            request.read(size)
+                            found.append(_project(item, projection) if projection else copy.deepcopy(item))
+            return {'Responses': responses, 'UnprocessedKeys': unprocessed}
+
+    def batch_write_item(self, RequestItems, **params):
+        with self.request('BatchWriteItem') as request:
+            total_requests = sum(len(requests) for requests in RequestItems.values())
+            if total_requests > BATCH_WRITE_MAX_ITEMS:
+                raise _validation_error(
+                    "Too many items requested for the BatchWriteItem call", 'BatchWriteItem'
+                )
+            unprocessed = {}
+            for table_name, requests in RequestItems.items():
+                table = self._batch_table(table_name, 'BatchWriteItem')
+                writes = []
+                for write_request in requests:
+                    if 'PutRequest' in write_request:
+                        item = _normalize(write_request['PutRequest']['Item'])
+                        writes.append((table._base_key(item, 'BatchWriteItem', whole_item=True), item, write_request))
+                    elif 'DeleteRequest' in write_request:
+                        key = _normalize(write_request['DeleteRequest']['Key'])
+                        writes.append((table._base_key(key, 'BatchWriteItem'), None, write_request))
+                    else:
+                        raise _validation_error("Each write request needs a PutRequest or DeleteRequest", 'BatchWriteItem')
+                if len({write[0] for write in writes}) != len(writes):
+                    raise _validation_error("Provided list of item keys contains duplicates", 'BatchWriteItem')
+
+                with table._lock:
+                    for key, item, write_request in writes:
+                        if self._unlucky():
+                            unprocessed.setdefault(table_name, []).append(write_request)
+                            continue
+                        old = table._items.get(key)
+                        request.write(item_size(item if item is not None else (old or {})))
+                        table._store(key, old, item)
+            return {'UnprocessedItems': unprocessed}
+
+    def request(self, operation):
+        """
+        Context manager that wraps one simulated request: it may throttle,
+        then records call counts, data volume and sleeps for the latency.
+        """
+        return _Request(self, operation)
+
+    def stats(self):
+        """
+        Returns per-operation counters: calls, errors, readBytes,
+        writeBytes and simulated latencyMs.
+        """
+        with self._lock:
+            return {operation: dict(counters) for operation, counters in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def maybe_throttle(self, request):
+        # Batch operations report throttling through unprocessed keys/items
+        if request.operation not in ('BatchGetItem', 'BatchWriteItem') and self._unlucky():
+            self.record(request, failed=True)
+            raise _client_error(
+                'ProvisionedThroughputExceededException',
+                'The level of configured provisioned throughput for the table was exceeded',
+                request.operation
+            )
+
+    def record(self, request, failed):
+        latency = self._sleep(request.operation, request.read_bytes + request.write_bytes)
+        with self._lock:
+            counters = self._stats.setdefault(request.operation, {
+                'calls': 0, 'errors': 0, 'readBytes': 0, 'writeBytes': 0, 'latencyMs': 0.0,
+            })
+            counters['calls'] += 1
+            counters['errors'] += 1 if failed else 0
+            counters['readBytes'] += request.read_bytes
+            counters['writeBytes'] += request.write_bytes
+            counters['latencyMs'] = round(counters['latencyMs'] + latency, 3)
+
+    def _sleep(self, operation, data_bytes):
+        latency = self.operation_latency_ms.get(operation, self.latency_ms)
+        if self.latency_jitter_ms:
+            with self._lock:
+                latency += self._random.uniform(0, self.latency_jitter_ms)
+        latency += self.latency_per_kb_ms * data_bytes / 1024
+        if latency > 0:
+            time.sleep(latency / 1000)
+        return latency
+
+    def _unlucky(self):
+        if not self.throttle_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.throttle_rate
+
+    def _batch_table(self, table_name, operation):
+        table = self._tables.get(table_name)
+        if table is None:
+            raise _client_error('ResourceNotFoundException', f"Requested resource not found: {table_name}", operation)
+        return table
+
+
+class _Meta:
+    def __init__(self, backend):
+        self.client = backend
@@ -0,0 +1,126 @@
+import json
+import logging
+import threading
+import time
+from utils.dynamo_utils import DynamoDBTable, take
+from utils.response import dumps
+from config.constants import (
+    TEMPLATE_TABLE,
+    TEMPLATE_KEY_ATTRIBUTE,
+    TEMPLATE_VERSION_MARKER_ID,
+    TEMPLATE_CACHE_TTL_SECONDS,
+    TEMPLATE_VERSION_CHECK_SECONDS,
+    QUERY_ITEM_BUDGET,
+)
+
+logger = logging.getLogger()
+
+class TemplateCatalog:
+    def __init__(self, table_name, ttl_seconds, version_check_seconds):
+        """
+        In-container cache of the report template catalog.
+
+        The catalog is scanned once per container and then served from
+        memory. It is reloaded when the TTL expires, or earlier when the
+        version marker item changes. Whoever edits templates bumps the
+        marker's `version` attribute. The marker is the item whose key
+        attribute equals TEMPLATE_VERSION_MARKER_ID, and its version is
+        read with a single GetItem at most every `version_check_seconds`.
+
+        :param table_name: The templates table.
+        :param ttl_seconds: Maximum age of the cached catalog.
+        :param version_check_seconds: Minimum interval between marker reads.
+        """
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self.version_check_seconds = version_check_seconds
+        self._lock = threading.Lock()
+        self._templates = None
+        self._body = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.last_refresh_ms = None
+
+    def get_catalog(self):
+        """
+        Returns the template list and its JSON serialization, refreshing
+        them first if needed.
+
+        :return: Tuple of (templates, JSON body string).
+        """
+        self._ensure_fresh()
+        return self._templates, self._body
+
+    def invalidate(self):
+        with self._lock:
+            self._templates = None
+            self._body = None
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'lastRefreshMs': self.last_refresh_ms,
+            'version': self._version,
+            'size': len(self._templates) if self._templates is not None else 0,
+        }
+
+    def _ensure_fresh(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._templates is None or now - self._loaded_at >= self.ttl_seconds:
+                self.misses += 1
+                self._refresh(now)
+                return
+
+            if now - self._checked_at >= self.version_check_seconds:
+                self._checked_at = now
+                if self._read_version() != self._version:
+                    self.misses += 1
+                    self._refresh(now)
+                    return
+
+            self.hits += 1
+
+    def _read_version(self):
+        try:
+            table = DynamoDBTable(self.table_name)
+            response = table.get_item(
+                {TEMPLATE_KEY_ATTRIBUTE: TEMPLATE_VERSION_MARKER_ID},
+                ProjectionExpression='#version',
+                ExpressionAttributeNames={'#version': 'version'}
+            )
+        except Exception as e:
+            # Keep the current version; the TTL still bounds staleness
+            logger.warning(f"Template version check failed: {str(e)}")
+            return self._version
+        return (response.get('Item') or {}).get('version')
+
+    def _refresh(self, now):
+        started = time.perf_counter()
+        table = DynamoDBTable(self.table_name)
+        version = self._read_version()
+        templates, has_more = take(table.iter_parallel_scan(), QUERY_ITEM_BUDGET)
+        if has_more:
+            logger.warning(f"Template scan truncated at {QUERY_ITEM_BUDGET} items")
+
+        self._templates = [
+            template for template in templates
+            if template.get(TEMPLATE_KEY_ATTRIBUTE) != TEMPLATE_VERSION_MARKER_ID
+        ]
+        self._body = dumps(self._templates)
+        self._version = version
+        self._loaded_at = now
+        self._checked_at = now
+        self.refreshes += 1
+        self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Template catalog refreshed: {json.dumps(self.stats(), default=str)}")
+
+
+# Shared for the life of the container
+template_catalog = TemplateCatalog(TEMPLATE_TABLE, TEMPLATE_CACHE_TTL_SECONDS, TEMPLATE_VERSION_CHECK_SECONDS)
@@ -0,0 +1,18 @@
+import os
+
+# Request logging (utils/request_log.py): level of the "request" logger, the
+# share of events logged (overridable per Cognito trigger source, e.g.
+# "PostConfirmation_ConfirmSignUp=0.1"), size caps, and fields redacted at
+# any depth of the event
+REQUEST_LOG_LEVEL = os.environ.get("REQUEST_LOG_LEVEL", "INFO").upper()
+REQUEST_LOG_SAMPLE_RATE = float(os.environ.get("REQUEST_LOG_SAMPLE_RATE", "1"))
+REQUEST_LOG_ROUTE_SAMPLE_RATES = {
+    route.strip(): float(rate)
+    for route, _, rate in (entry.rpartition("=") for entry in os.environ.get("REQUEST_LOG_ROUTE_SAMPLE_RATES", "").split(",") if entry)
+}
+REQUEST_LOG_MAX_CHARS = int(os.environ.get("REQUEST_LOG_MAX_CHARS", "8192"))
+REQUEST_LOG_MAX_FIELD_CHARS = int(os.environ.get("REQUEST_LOG_MAX_FIELD_CHARS", "256"))
+REQUEST_LOG_REDACT_FIELDS = os.environ.get(
+    "REQUEST_LOG_REDACT_FIELDS",
+    "email,name,given_name,family_name,phone_number,birthdate,address"
+).split(",")
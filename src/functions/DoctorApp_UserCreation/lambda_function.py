@@ -1,20 +1,31 @@
-import json
+# First import: with INIT_PROFILE=true it times every import after it
+from utils.init_profiler import init_profiler
 import boto3
 import os
 import logging  # Importing logging for structured log handling
 from datetime import datetime
 import uuid  # Importing uuid for unique user ID generation
+from utils.request_log import log_request, request_logger, RedactedJson
 
 # Initialize logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize DynamoDB resource
-dynamodb = boto3.resource('dynamodb')
-user_table = dynamodb.Table('DoctorApp_users')
+# DynamoDB Table handle, created on first use and reused while the
+# container stays warm
+_user_table = None
 
+def get_user_table():
+    global _user_table
+    if _user_table is None:
+        _user_table = boto3.resource('dynamodb').Table('DoctorApp_users')
+    return _user_table
+
+init_profiler.mark('imports')
+
+@init_profiler.profile_first_invocation
 def lambda_handler(event, context):
-    logger.info("Received event: %s", json.dumps(event))
+    log_request(event)
 
     try:
         # Check if the trigger source is PostConfirmation_ConfirmSignUp
@@ -23,7 +34,7 @@ def lambda_handler(event, context):
             
             # Get user attributes from the Cognito event
             user_attributes = event['request'].get('userAttributes', {})
-            logger.info("User attributes: %s", json.dumps(user_attributes))
+            request_logger.debug("User attributes: %s", RedactedJson(user_attributes))
             
             # Extract relevant information
             email = user_attributes.get('email')
@@ -47,14 +58,13 @@ def lambda_handler(event, context):
                 'updatedAt': current_time,
                 'status': 'ACTIVE',
             }
-            logger.info("User item to store: %s", json.dumps(user_item))
+            request_logger.debug("User item to store: %s", RedactedJson(user_item))
             
             # Store user in DynamoDB
-            user_table.put_item(Item=user_item)
+            get_user_table().put_item(Item=user_item)
             logger.info("User successfully stored in DynamoDB")
 
         # Return the event regardless of the trigger source
-        logger.info("Returning event: %s", json.dumps(event))
         return event
 
     except Exception as e:
@@ -0,0 +1,89 @@
+import json
+import logging
+import random
+from config.constants import (
+    REQUEST_LOG_LEVEL,
+    REQUEST_LOG_SAMPLE_RATE,
+    REQUEST_LOG_ROUTE_SAMPLE_RATES,
+    REQUEST_LOG_MAX_CHARS,
+    REQUEST_LOG_MAX_FIELD_CHARS,
+    REQUEST_LOG_REDACT_FIELDS,
+)
+
+# Request/payload logging has its own logger so its level can be set apart
+# from the root logger the handlers configure; records still propagate to
+# the Lambda log handler
+request_logger = logging.getLogger('request')
+request_logger.setLevel(REQUEST_LOG_LEVEL)
+
+_redact_fields = {field.lower() for field in REQUEST_LOG_REDACT_FIELDS}
+
+class RedactedJson:
+    def __init__(self, value):
+        """
+        Wraps a value for logging as JSON with PHI fields redacted, long
+        strings truncated and the whole line capped at REQUEST_LOG_MAX_CHARS.
+        Serialization happens in __str__, so when passed as a logging
+        argument it only runs if the record is actually emitted.
+
+        :param value: Event, body or item to log.
+        """
+        self.value = value
+
+    def __str__(self):
+        text = json.dumps(redact(self.value), default=str)
+        if len(text) > REQUEST_LOG_MAX_CHARS:
+            return f"{text[:REQUEST_LOG_MAX_CHARS]}...[truncated {len(text) - REQUEST_LOG_MAX_CHARS} chars]"
+        return text
+
+def redact(value):
+    """
+    Returns a copy of value safe to log: fields named in
+    REQUEST_LOG_REDACT_FIELDS (at any depth, case-insensitive) are replaced
+    by a placeholder and strings are cut to REQUEST_LOG_MAX_FIELD_CHARS.
+    Request bodies are redacted as strings, never parsed.
+    """
+    if isinstance(value, dict):
+        return {
+            key: _placeholder(item) if str(key).lower() in _redact_fields else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str) and len(value) > REQUEST_LOG_MAX_FIELD_CHARS:
+        return f"{value[:REQUEST_LOG_MAX_FIELD_CHARS]}...[{len(value)} chars]"
+    return value
+
+def _placeholder(value):
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes, list, dict)):
+        return f"[REDACTED {len(value)}]"
+    return "[REDACTED]"
+
+def route_key(event):
+    """
+    The key sampling rates are configured by: "METHOD /resource" for API
+    Gateway events, the trigger source for Cognito triggers.
+    """
+    if event.get('triggerSource'):
+        return event['triggerSource']
+    return f"{event.get('httpMethod')} {event.get('resource')}"
+
+def log_request(event, level=logging.INFO):
+    """
+    Logs the incoming event, redacted, if the request logger is enabled for
+    `level` and the request is sampled for its route. Nothing is serialized
+    otherwise.
+
+    :param event: The Lambda event.
+    :param level: Logging level of the record.
+    :return: True if the event was logged.
+    """
+    if not request_logger.isEnabledFor(level):
+        return False
+    rate = REQUEST_LOG_ROUTE_SAMPLE_RATES.get(route_key(event), REQUEST_LOG_SAMPLE_RATE)
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return False
+    request_logger.log(level, "Received event: %s", RedactedJson(event))
+    return True
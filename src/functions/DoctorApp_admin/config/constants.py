@@ -1,4 +1,230 @@
+import os
+
 USER_TABLE= "DoctorApp_users"
 PATIENT_TABLE="doctorApp_patients"
 REPORT_TABLE= "DoctorApp_Reports"
-DEFAULT_TEMPLATE="SOAP report"
\ No newline at end of file
+TEMPLATE_TABLE="reportTemplates"
+DOCTOR_FEED_TABLE=os.environ.get("DOCTOR_FEED_TABLE", "DoctorApp_doctorFeed")
+CURSOR_TABLE=os.environ.get("CURSOR_TABLE", "DoctorApp_cursors")
+DEFAULT_TEMPLATE="SOAP report"
+
+# DynamoDB connection tuning (override through the Lambda environment)
+DYNAMODB_MAX_POOL_CONNECTIONS=int(os.environ.get("DYNAMODB_MAX_POOL_CONNECTIONS", "50"))
+DYNAMODB_CONNECT_TIMEOUT=float(os.environ.get("DYNAMODB_CONNECT_TIMEOUT", "2"))
+DYNAMODB_READ_TIMEOUT=float(os.environ.get("DYNAMODB_READ_TIMEOUT", "5"))
+DYNAMODB_TCP_KEEPALIVE=os.environ.get("DYNAMODB_TCP_KEEPALIVE", "true").lower() == "true"
+# botocore-level attempts; retries, connection errors and timeouts
+# included, are handled by utils/dynamo_retry.py so they are not
+# multiplied by a second retry loop
+DYNAMODB_MAX_ATTEMPTS=int(os.environ.get("DYNAMODB_MAX_ATTEMPTS", "1"))
+
+# Adaptive retry and client-side rate limiting for DynamoDB calls
+DYNAMODB_RETRY_MAX_ATTEMPTS=int(os.environ.get("DYNAMODB_RETRY_MAX_ATTEMPTS", "8"))
+DYNAMODB_RETRY_BASE_DELAY=float(os.environ.get("DYNAMODB_RETRY_BASE_DELAY", "0.05"))
+DYNAMODB_RETRY_MAX_DELAY=float(os.environ.get("DYNAMODB_RETRY_MAX_DELAY", "2"))
+DYNAMODB_RATE_LIMIT_MAX=float(os.environ.get("DYNAMODB_RATE_LIMIT_MAX", "1000"))
+DYNAMODB_RATE_LIMIT_MIN=float(os.environ.get("DYNAMODB_RATE_LIMIT_MIN", "5"))
+DYNAMODB_RATE_DECREASE_FACTOR=float(os.environ.get("DYNAMODB_RATE_DECREASE_FACTOR", "0.5"))
+DYNAMODB_RATE_INCREASE_STEP=float(os.environ.get("DYNAMODB_RATE_INCREASE_STEP", "5"))
+
+# Upper bound on items a single list response will collect across pages
+QUERY_ITEM_BUDGET=int(os.environ.get("QUERY_ITEM_BUDGET", "5000"))
+
+# Parallel scan fan-out for full-table reads
+SCAN_TOTAL_SEGMENTS=int(os.environ.get("SCAN_TOTAL_SEGMENTS", "4"))
+SCAN_MAX_WORKERS=int(os.environ.get("SCAN_MAX_WORKERS", "8"))
+
+# Batch read/write tuning
+BATCH_GET_MAX_WORKERS=int(os.environ.get("BATCH_GET_MAX_WORKERS", "4"))
+BATCH_WRITE_MAX_WORKERS=int(os.environ.get("BATCH_WRITE_MAX_WORKERS", "8"))
+BATCH_MAX_RETRIES=int(os.environ.get("BATCH_MAX_RETRIES", "5"))
+
+# Concurrent fan-out of independent queries (DynamoDBTable.query_many);
+# keep it within DYNAMODB_MAX_POOL_CONNECTIONS
+QUERY_FANOUT_MAX_WORKERS=int(os.environ.get("QUERY_FANOUT_MAX_WORKERS", "16"))
+
+# Maximum rows accepted by a single bulk patient import
+BULK_IMPORT_MAX_ROWS=int(os.environ.get("BULK_IMPORT_MAX_ROWS", "10000"))
+
+# Default lean projections for list views (?fields=all returns whole items)
+REPORT_LIST_FIELDS=['reportId', 'patientId', 'doctorId', 'reportDate', 'reportType', 'currentStatus', 'createdAt', 'updatedAt']
+PATIENT_LIST_FIELDS=['patientId', 'doctorId', 'name', 'email', 'gender', 'dateOfBirth', 'latestReportId', 'latestReportDate', 'createdAt', 'updatedAt']
+
+# In-container cache of DoctorApp_users records resolved from authorizer claims
+USER_CACHE_TTL_SECONDS=int(os.environ.get("USER_CACHE_TTL_SECONDS", "300"))
+USER_CACHE_MAX_ENTRIES=int(os.environ.get("USER_CACHE_MAX_ENTRIES", "1000"))
+
+# Template catalog cache; templates are refreshed when the TTL expires or the
+# version marker item (TEMPLATE_KEY_ATTRIBUTE = TEMPLATE_VERSION_MARKER_ID) changes
+TEMPLATE_KEY_ATTRIBUTE=os.environ.get("TEMPLATE_KEY_ATTRIBUTE", "templateId")
+TEMPLATE_VERSION_MARKER_ID="__catalog_version__"
+TEMPLATE_CACHE_TTL_SECONDS=int(os.environ.get("TEMPLATE_CACHE_TTL_SECONDS", "900"))
+TEMPLATE_VERSION_CHECK_SECONDS=int(os.environ.get("TEMPLATE_VERSION_CHECK_SECONDS", "30"))
+
+# Primary key attributes per table
+TABLE_PRIMARY_KEYS={
+    USER_TABLE: ['email'],
+    PATIENT_TABLE: ['patientId'],
+    REPORT_TABLE: ['reportId'],
+    TEMPLATE_TABLE: [TEMPLATE_KEY_ATTRIBUTE],
+    DOCTOR_FEED_TABLE: ['doctorId', 'feedKey'],
+    CURSOR_TABLE: ['cursorId'],
+}
+
+# Optional read-through cache under DynamoDBTable.get_item/query. Off unless
+# tables are listed: the default backend is per container, so keep the TTL short
+DYNAMODB_CACHE_TABLES=[name for name in os.environ.get("DYNAMODB_CACHE_TABLES", "").split(",") if name]
+DYNAMODB_CACHE_TTL_SECONDS=int(os.environ.get("DYNAMODB_CACHE_TTL_SECONDS", "30"))
+DYNAMODB_CACHE_MAX_ENTRIES=int(os.environ.get("DYNAMODB_CACHE_MAX_ENTRIES", "2000"))
+
+# Key schema of every table and of the GSIs the handlers query, as
+# (partition key, sort key); used by the in-memory DynamoDB backend
+TABLE_KEY_SCHEMAS={
+    USER_TABLE: {
+        'key': ('email', None),
+        'indexes': {'email-index': ('email', None)},
+    },
+    PATIENT_TABLE: {
+        'key': ('patientId', None),
+        'indexes': {
+            'doctorId-index': ('doctorId', None),
+            'doctorId-name-index': ('doctorId', 'name'),
+            'doctorId-latestReportDate-index': ('doctorId', 'latestReportDate'),
+        },
+    },
+    REPORT_TABLE: {
+        'key': ('reportId', None),
+        'indexes': {
+            'patientId-index': ('patientId', None),
+            'doctorId-reportDate-index': ('doctorId', 'reportDate'),
+            'patientId-reportDate-index': ('patientId', 'reportDate'),
+        },
+    },
+    TEMPLATE_TABLE: {
+        'key': (TEMPLATE_KEY_ATTRIBUTE, None),
+    },
+    DOCTOR_FEED_TABLE: {
+        'key': ('doctorId', 'feedKey'),
+        'indexes': {
+            'doctorId-completeFeedKey-index': ('doctorId', 'completeFeedKey'),
+            'patientId-index': ('patientId', None),
+        },
+    },
+    CURSOR_TABLE: {
+        'key': ('cursorId', None),
+    },
+}
+
+# DynamoDB backend: "aws", or "memory" for the in-memory stand-in used by
+# benchmarks and load tests, with simulated per-request latency
+DYNAMODB_BACKEND=os.environ.get("DYNAMODB_BACKEND", "aws")
+DYNAMODB_MEMORY_LATENCY_MS=float(os.environ.get("DYNAMODB_MEMORY_LATENCY_MS", "0"))
+DYNAMODB_MEMORY_LATENCY_JITTER_MS=float(os.environ.get("DYNAMODB_MEMORY_LATENCY_JITTER_MS", "0"))
+DYNAMODB_MEMORY_LATENCY_PER_KB_MS=float(os.environ.get("DYNAMODB_MEMORY_LATENCY_PER_KB_MS", "0"))
+DYNAMODB_MEMORY_THROTTLE_RATE=float(os.environ.get("DYNAMODB_MEMORY_THROTTLE_RATE", "0"))
+
+# Request logging (utils/request_log.py): level of the "request" logger, the
+# share of requests whose event is logged (overridable per "METHOD /resource"
+# or Cognito trigger source, e.g. "POST /reports=0,GET /templates=0.1"),
+# size caps, and fields redacted at any depth of the event
+REQUEST_LOG_LEVEL=os.environ.get("REQUEST_LOG_LEVEL", "INFO").upper()
+REQUEST_LOG_SAMPLE_RATE=float(os.environ.get("REQUEST_LOG_SAMPLE_RATE", "1"))
+REQUEST_LOG_ROUTE_SAMPLE_RATES={
+    route.strip(): float(rate)
+    for route, _, rate in (entry.rpartition("=") for entry in os.environ.get("REQUEST_LOG_ROUTE_SAMPLE_RATES", "").split(",") if entry)
+}
+REQUEST_LOG_MAX_CHARS=int(os.environ.get("REQUEST_LOG_MAX_CHARS", "8192"))
+REQUEST_LOG_MAX_FIELD_CHARS=int(os.environ.get("REQUEST_LOG_MAX_FIELD_CHARS", "256"))
+REQUEST_LOG_REDACT_FIELDS=os.environ.get(
+    "REQUEST_LOG_REDACT_FIELDS",
+    "body,audioFile,Authorization,Cookie,email,name,phone,phone_number,phoneNumber,dob,dateOfBirth,address,gender,transcription,reportData,additionalNotes,billingData"
+).split(",")
+
+# Response JSON encoding (utils/response.py): "auto" uses orjson when it is
+# packaged with the function, "json" forces the stdlib encoder
+RESPONSE_JSON_BACKEND=os.environ.get("RESPONSE_JSON_BACKEND", "auto")
+RESPONSE_DEFAULT_HEADERS={
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+}
+
+# Response compression, negotiated from Accept-Encoding (br needs the
+# brotli package); bodies under the threshold are sent as is. Compressed
+# bodies are returned base64 encoded with isBase64Encoded set, which a REST
+# API proxy integration only decodes when the API's binaryMediaTypes
+# include the response types (e.g. "*/*"); clients get base64 text labelled
+# as gzip otherwise. Configure that before enabling it.
+RESPONSE_COMPRESSION_ENABLED=os.environ.get("RESPONSE_COMPRESSION_ENABLED", "false").lower() == "true"
+RESPONSE_COMPRESSION_MIN_BYTES=int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL=int(os.environ.get("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY=int(os.environ.get("RESPONSE_BROTLI_QUALITY", "5"))
+
+# Cursor pagination (utils/pagination.py). Clients get random cursor ids;
+# the LastEvaluatedKeys they stand for stay in CURSOR_TABLE (key cursorId,
+# DynamoDB TTL on expiresAt) for this long
+CURSOR_TTL_SECONDS=int(os.environ.get("CURSOR_TTL_SECONDS", "3600"))
+PATIENT_PAGE_DEFAULT_LIMIT=int(os.environ.get("PATIENT_PAGE_DEFAULT_LIMIT", "0"))
+PATIENT_PAGE_MAX_LIMIT=int(os.environ.get("PATIENT_PAGE_MAX_LIMIT", "1000"))
+
+# Patient report timeline (GET /patient/{patientId}/reports?view=timeline),
+# served from a (patientId, reportDate) GSI
+REPORT_TIMELINE_INDEX=os.environ.get("REPORT_TIMELINE_INDEX", "patientId-reportDate-index")
+REPORT_TIMELINE_DEFAULT_LIMIT=int(os.environ.get("REPORT_TIMELINE_DEFAULT_LIMIT", "100"))
+REPORT_TIMELINE_MAX_LIMIT=int(os.environ.get("REPORT_TIMELINE_MAX_LIMIT", "1000"))
+
+# Doctor report feed (getAllReportsByDoctorId): page size when neither
+# `limit` nor the event's pageSize is given, and the largest page served
+REPORT_FEED_DEFAULT_LIMIT=int(os.environ.get("REPORT_FEED_DEFAULT_LIMIT", "1000"))
+REPORT_FEED_MAX_LIMIT=int(os.environ.get("REPORT_FEED_MAX_LIMIT", "1000"))
+# Reports read up front from each patient's stream before the merge; later
+# pages of a stream are only read once the merge reaches them
+REPORT_STREAM_FIRST_LIMIT=int(os.environ.get("REPORT_STREAM_FIRST_LIMIT", "10"))
+
+# Per-doctor report feed (utils/doctor_feed.py): one item per report,
+# keyed (doctorId, "<reportDate>#<reportId>") and carrying the patient
+# fields, kept current by addNewReport and addNewPatient (in both
+# DoctorApp_admin and DoctorApp_Dev). Only Complete reports have
+# completeFeedKey, so its index holds just what
+# GET /trans-reports/{doctorId} lists
+DOCTOR_FEED_COMPLETE_INDEX=os.environ.get("DOCTOR_FEED_COMPLETE_INDEX", "doctorId-completeFeedKey-index")
+DOCTOR_FEED_PATIENT_INDEX=os.environ.get("DOCTOR_FEED_PATIENT_INDEX", "patientId-index")
+# Whether GET /trans-reports/{doctorId} reads the feed rather than the
+# reports table. Report status changes made outside these functions reach
+# the feed only through the change stream consumer, so turn it on once the
+# stream is deployed and scripts/rebuild_doctor_feed.py has run
+DOCTOR_FEED_READS=os.environ.get("DOCTOR_FEED_READS", "false").lower() == "true"
+
+# Change stream processing (handlers/streamHandlers/processChanges.py).
+# When true, addNewReport and addNewPatient leave the patients' derived
+# attributes and the doctor feed to the stream consumer instead of writing
+# them in the request; turn it on once the patients and reports tables
+# stream NEW_AND_OLD_IMAGES to this function with ReportBatchItemFailures
+CHANGE_STREAM_PROCESSING=os.environ.get("CHANGE_STREAM_PROCESSING", "false").lower() == "true"
+# Local stream stand-in (utils/local_stream.py): records per batch and
+# attempts before a failing record is set aside
+CHANGE_STREAM_BATCH_SIZE=int(os.environ.get("CHANGE_STREAM_BATCH_SIZE", "100"))
+CHANGE_STREAM_MAX_ATTEMPTS=int(os.environ.get("CHANGE_STREAM_MAX_ATTEMPTS", "3"))
+
+# Report audio blob storage (utils/blob_store.py): "s3", or "local" for a
+# filesystem stand-in. Clients upload to a presigned URL and reports keep
+# only the object key (audioKey), under AUDIO_KEY_PREFIX/<doctorId>/
+BLOB_BACKEND=os.environ.get("BLOB_BACKEND", "s3")
+AUDIO_BUCKET=os.environ.get("AUDIO_BUCKET", "doctorapp-report-audio")
+AUDIO_KEY_PREFIX=os.environ.get("AUDIO_KEY_PREFIX", "audio")
+AUDIO_CONTENT_TYPES=os.environ.get(
+    "AUDIO_CONTENT_TYPES",
+    "audio/mp4,audio/m4a,audio/x-m4a,audio/aac,audio/mpeg,audio/wav,audio/x-wav,audio/webm,audio/ogg"
+).split(",")
+AUDIO_MAX_BYTES=int(os.environ.get("AUDIO_MAX_BYTES", str(200 * 1024 * 1024)))
+BLOB_UPLOAD_URL_EXPIRES_SECONDS=int(os.environ.get("BLOB_UPLOAD_URL_EXPIRES_SECONDS", "900"))
+BLOB_DOWNLOAD_URL_EXPIRES_SECONDS=int(os.environ.get("BLOB_DOWNLOAD_URL_EXPIRES_SECONDS", "300"))
+# Local stand-in: files live under BLOB_LOCAL_DIR and URLs are signed with
+# BLOB_URL_SECRET for whatever serves BLOB_LOCAL_BASE_URL. The secret has no
+# default; with BLOB_BACKEND=local the function fails its cold start
+# without it (lambda_function.py)
+BLOB_LOCAL_DIR=os.environ.get("BLOB_LOCAL_DIR", "/tmp/doctorapp-blobs")
+BLOB_LOCAL_BASE_URL=os.environ.get("BLOB_LOCAL_BASE_URL", "http://localhost:8000/blobs")
+BLOB_URL_SECRET=os.environ.get("BLOB_URL_SECRET", "")
+# audioFile values sent inline (a data: URI or base64 longer than this) are
+# moved to the blob store by POST /reports; shorter values are references
+AUDIO_INLINE_MIN_CHARS=int(os.environ.get("AUDIO_INLINE_MIN_CHARS", "1024"))
@@ -1,13 +1,61 @@
 import json
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from utils.dynamo_utils import DynamoDBTable
-from config.constants import PATIENT_TABLE
-from datetime import datetime
+from utils.timestamps import now_ms, stamp
+from utils.response import generate_response
+from utils import doctor_feed
+from config.constants import PATIENT_TABLE, QUERY_FANOUT_MAX_WORKERS, CHANGE_STREAM_PROCESSING
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+REQUIRED_FIELDS = ['doctorId', 'name', 'dateOfBirth', 'email', 'gender']
+
+def get_missing_fields(body):
+    return [field for field in REQUIRED_FIELDS if field not in body]
+
+def assign_patient_id(body):
+    """
+    Assign a unique patientId if not provided, and canonical timestamps:
+    createdAt as given by the client (e.g. when replacing or importing a
+    patient) or now, and updatedAt always now.
+
+    :raises ValueError: If a given createdAt is not a recognizable timestamp.
+    """
+    updated_at = now_ms()
+    created_at = body['createdAt'] if body.get('createdAt') is not None else updated_at
+    stamp(body, 'createdAt', created_at)
+    stamp(body, 'updatedAt', updated_at)
+    if 'patientId' not in body or not body['patientId']:
+        body['patientId'] = str(uuid.uuid4())
+    return body
+
+def refresh_doctor_feed(patients):
+    """
+    Copies the saved details of existing patients onto their doctor feed
+    entries. Failures are logged rather than raised, since the patients are
+    already saved; scripts/rebuild_doctor_feed.py restores the feed.
+    Imports refresh many patients, so they run on a bounded pool. With
+    change stream processing the stream consumer does this instead.
+    """
+    if CHANGE_STREAM_PROCESSING:
+        return
+
+    def refresh(patient):
+        try:
+            doctor_feed.update_patient(patient)
+        except Exception as e:
+            logger.error(f"Doctor feed not updated for patient {patient['patientId']}: {str(e)}")
+
+    if len(patients) <= 1:
+        for patient in patients:
+            refresh(patient)
+        return
+    with ThreadPoolExecutor(max_workers=min(QUERY_FANOUT_MAX_WORKERS, len(patients))) as executor:
+        list(executor.map(refresh, patients))
+
 def addNewPatient(event, context):
     try:
         logger.info("Processing addNewPatient request")
@@ -15,52 +63,42 @@ def addNewPatient(event, context):
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         if not body:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Invalid request body."}),
-            }
+            return generate_response(400, {"message": "Invalid request body."})
 
         # Validate required fields
-        required_fields = ['doctorId', 'name', 'dateOfBirth', 'email', 'gender']
-        missing_fields = [field for field in required_fields if field not in body]
+        missing_fields = get_missing_fields(body)
         
         if missing_fields:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({
-                    "message": "Missing required fields",
-                    "fields": missing_fields
-                }),
-            }
+            return generate_response(400, {
+                "message": "Missing required fields",
+                "fields": missing_fields
+            })
 
         # Assign a unique patientId if not provided
-        if 'patientId' not in body or not body['patientId']:
-            body['patientId'] = str(uuid.uuid4())
-            body['createdAt'] = datetime.utcnow().isoformat()
-            body['updatedAt'] = datetime.utcnow().isoformat()
+        replaces_patient = bool(body.get('patientId'))
+        try:
+            assign_patient_id(body)
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
 
         # Save to DynamoDB using the utility class
         table = DynamoDBTable(PATIENT_TABLE)
         table.put_item(body)
 
+        # A given patientId may overwrite an existing patient, whose reports
+        # in the doctor feed carry the old details
+        if replaces_patient:
+            refresh_doctor_feed([body])
+
         logger.info(f"Patient added successfully: {body['patientId']}")
-        return {
-            "statusCode": 201,
-             "headers": {
-                "Access-Control-Allow-Origin": "*",  
-            },
-            "body": json.dumps({
-                "message": "Patient created successfully",
-                "patient": body
-            }),
-        }
+        return generate_response(201, {
+            "message": "Patient created successfully",
+            "patient": body
+        })
 
     except Exception as e:
         logger.error(f"Error in addNewPatient: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            }),
-        }
\ No newline at end of file
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
\ No newline at end of file
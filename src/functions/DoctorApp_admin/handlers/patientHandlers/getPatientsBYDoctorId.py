@@ -1,7 +1,10 @@
-import json
 import logging
 from utils.dynamo_utils import DynamoDBTable
-from config.constants import PATIENT_TABLE
+from utils.dynamo_retry import is_throttle_error
+from utils.projection import parse_fields, apply_projection
+from utils.pagination import parse_page, encode_cursor
+from utils.response import generate_response
+from config.constants import PATIENT_TABLE, PATIENT_LIST_FIELDS, PATIENT_PAGE_DEFAULT_LIMIT, PATIENT_PAGE_MAX_LIMIT
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
@@ -16,10 +19,7 @@ def getPatientsBYDoctorId(event, context):
         doctor_id = event.get('pathParameters', {}).get('doctorId')
         
         if not doctor_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Doctor ID is required."}),
-            }
+            return generate_response(400, {"message": "Doctor ID is required."})
         # Extract query string parameters
         query_string_parameters = event.get('queryStringParameters', {}) or {}
         sort_key = query_string_parameters.get('sortKey', 'name')
@@ -31,6 +31,9 @@ def getPatientsBYDoctorId(event, context):
             'latestReportDate': 'doctorId-latestReportDate-index',
         }
 
+        if sort_key not in index_mapping or sort_order not in ('asc', 'desc'):
+            return generate_response(400, {"message": "sortKey must be name or latestReportDate and sortOrder asc or desc."})
+
         # getting the index name
         index_name = index_mapping[sort_key]
         
@@ -43,6 +46,20 @@ def getPatientsBYDoctorId(event, context):
         
         logger.info(f"Sorting by {sort_key} in descending order")
 
+        # Requested fields, lean list view by default
+        try:
+            fields = parse_fields(event, default=PATIENT_LIST_FIELDS, required=['patientId'])
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
+
+        # Page size and position; a cursor is only valid for the doctor,
+        # index and sort order it was issued for
+        scope = {'doctorId': doctor_id, 'index': index_name, 'sortOrder': sort_order}
+        try:
+            limit, start_key = parse_page(event, scope, PATIENT_PAGE_DEFAULT_LIMIT, PATIENT_PAGE_MAX_LIMIT)
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
+
         # Initialize DynamoDB table
         table = DynamoDBTable(PATIENT_TABLE)
         
@@ -51,48 +68,48 @@ def getPatientsBYDoctorId(event, context):
             'KeyConditionExpression': Key('doctorId').eq(doctor_id),
             'ScanIndexForward': scan_index_forward,
         }
+        if limit:
+            query_params['Limit'] = limit
+        if start_key:
+            query_params['ExclusiveStartKey'] = start_key
+        apply_projection(query_params, fields)
 
         try:
             logger.info(f"Querying DynamoDB for doctor_id: {doctor_id}")
             response = table.query(**query_params)
             
             items = response.get('Items', [])
+            next_cursor = encode_cursor(response.get('LastEvaluatedKey'), scope)
 
             logger.info(f"Successfully retrieved {len(items)} patients")
-            return {
-                "statusCode": 200,
-                 "headers": {
-                "Access-Control-Allow-Origin": "*",  
-            },
-                "body": json.dumps({
-                    "message": "Patients retrieved successfully",
-                    "doctorId": doctor_id,
-                    "patients": items,
-                    "count": len(items),
-                    "hasMore": 'LastEvaluatedKey' in response,
-                    "usedIndex": index_name,
-                    "sortKey": sort_key,
-                    "sortOrder": sort_order
-                }),
-            }
+            return generate_response(200, {
+                "message": "Patients retrieved successfully",
+                "doctorId": doctor_id,
+                "patients": items,
+                "count": len(items),
+                "hasMore": next_cursor is not None,
+                "nextCursor": next_cursor,
+                "usedIndex": index_name,
+                "sortKey": sort_key,
+                "sortOrder": sort_order
+            })
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
             logger.error(f"DynamoDB error: {error_code} - {str(e)}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": "Database error occurred",
+            if is_throttle_error(e):
+                return generate_response(503, {
+                    "message": "Service is busy, please retry",
                     "error": error_code
-                }),
-            }
+                }, headers={"Retry-After": "1"})
+            return generate_response(500, {
+                "message": "Database error occurred",
+                "error": error_code
+            })
 
     except Exception as e:
         logger.error(f"Error in getPatientsBYDoctorId: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            }),
-        }
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
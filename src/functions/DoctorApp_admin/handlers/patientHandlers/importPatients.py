@@ -0,0 +1,163 @@
+import io
+import csv
+import json
+import time
+import base64
+import logging
+from decimal import Decimal
+from utils.dynamo_utils import DynamoDBTable
+from utils.response import generate_response
+from config.constants import PATIENT_TABLE, BULK_IMPORT_MAX_ROWS
+from handlers.patientHandlers.addNewPatient import get_missing_fields, assign_patient_id, refresh_doctor_feed
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def importPatients(event, context):
+    """
+    Bulk import patients from a CSV or NDJSON request body.
+
+    The format is taken from the `format` query parameter (csv|ndjson), then
+    the Content-Type header, and is otherwise sniffed from the body. Each row
+    is validated and assigned a patientId the same way as addNewPatient, and
+    valid rows are written with parallel BatchWriteItem chunks.
+    """
+    try:
+        logger.info("Processing importPatients request")
+        started = time.perf_counter()
+
+        text = event.get('body') or ''
+        if event.get('isBase64Encoded'):
+            text = base64.b64decode(text).decode('utf-8')
+        if not text.strip():
+            return generate_response(400, {"message": "Invalid request body."})
+
+        import_format = get_import_format(event, text)
+        rows = parse_csv(text) if import_format == 'csv' else parse_ndjson(text)
+
+        if len(rows) > BULK_IMPORT_MAX_ROWS:
+            return generate_response(413, {
+                "message": f"Too many rows, at most {BULK_IMPORT_MAX_ROWS} are accepted per import",
+                "rows": len(rows)
+            })
+
+        # Validate rows and assign patientIds
+        results = []
+        items = []
+        item_rows = {}
+        replaced_ids = set()
+        for row_number, (patient, error) in enumerate(rows, start=1):
+            if error:
+                results.append({"row": row_number, "status": "invalid", "error": error})
+                continue
+
+            missing_fields = get_missing_fields(patient)
+            if missing_fields:
+                results.append({"row": row_number, "status": "invalid", "fields": missing_fields})
+                continue
+
+            # A given patientId may overwrite an existing patient
+            replaces_patient = bool(patient.get('patientId'))
+            try:
+                assign_patient_id(patient)
+            except ValueError as e:
+                results.append({"row": row_number, "status": "invalid", "error": str(e)})
+                continue
+            patient_id = patient['patientId']
+            if replaces_patient:
+                replaced_ids.add(patient_id)
+            if patient_id in item_rows:
+                results.append({
+                    "row": row_number,
+                    "status": "invalid",
+                    "patientId": patient_id,
+                    "error": f"Duplicate patientId, already used by row {item_rows[patient_id]['row']}"
+                })
+                continue
+
+            result = {"row": row_number, "status": "created", "patientId": patient_id}
+            results.append(result)
+            item_rows[patient_id] = result
+            items.append(patient)
+
+        # Save to DynamoDB in parallel batches
+        table = DynamoDBTable(PATIENT_TABLE)
+        for patient, error in table.batch_put_items(items):
+            result = item_rows[patient['patientId']]
+            result['status'] = 'failed'
+            result['error'] = error
+
+        # Saved rows that may have overwritten a patient refresh the
+        # patient's doctor feed entries
+        refresh_doctor_feed([
+            patient for patient in items
+            if patient['patientId'] in replaced_ids and item_rows[patient['patientId']]['status'] == 'created'
+        ])
+
+        duration = time.perf_counter() - started
+        summary = {"total": len(rows), "created": 0, "invalid": 0, "failed": 0}
+        for result in results:
+            summary[result['status']] += 1
+
+        logger.info(f"Patient import finished: {json.dumps(summary)} in {duration:.3f}s")
+        return generate_response(200, {
+            "message": "Patient import processed",
+            "format": import_format,
+            "summary": summary,
+            "durationMs": round(duration * 1000, 2),
+            "rowsPerSecond": round(len(rows) / duration, 2) if duration else None,
+            "results": results
+        })
+
+    except Exception as e:
+        logger.error(f"Error in importPatients: {str(e)}")
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
+
+def get_import_format(event, text):
+    query_string_parameters = event.get('queryStringParameters', {}) or {}
+    requested = (query_string_parameters.get('format') or '').lower()
+    if requested in ('csv', 'ndjson'):
+        return requested
+
+    headers = {key.lower(): value for key, value in (event.get('headers') or {}).items()}
+    content_type = (headers.get('content-type') or '').lower()
+    if 'csv' in content_type:
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+
+    return 'ndjson' if text.lstrip().startswith('{') else 'csv'
+
+def parse_csv(text):
+    """
+    Parse CSV text with a header row into (patient, error) tuples.
+    Empty cells are treated as missing fields.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        ({key.strip(): value.strip() for key, value in row.items() if key and value}, None)
+        for row in reader
+    ]
+
+def parse_ndjson(text):
+    """
+    Parse newline-delimited JSON into (patient, error) tuples.
+    """
+    rows = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            # Numbers as Decimal, since boto3 rejects floats
+            patient = json.loads(line, parse_float=Decimal)
+        except json.JSONDecodeError as e:
+            rows.append((None, f"Invalid JSON: {str(e)}"))
+            continue
+        if not isinstance(patient, dict):
+            rows.append((None, "Row must be a JSON object"))
+            continue
+        rows.append((patient, None))
+    return rows
@@ -1,10 +1,12 @@
 import json
 import uuid
 import logging
-from datetime import datetime
 from utils.dynamo_utils import DynamoDBTable
-from config.constants import REPORT_TABLE
-import boto3
+from utils.timestamps import now_ms, stamp
+from utils import doctor_feed
+from utils.report_audio import check_audio_key, is_inline_audio, store_inline_audio
+from utils.response import generate_response
+from config.constants import REPORT_TABLE, PATIENT_TABLE, CHANGE_STREAM_PROCESSING
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger()
@@ -21,42 +23,60 @@ def addNewReport(event, context):
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         if not body:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Invalid request body"})
-            }
+            return generate_response(400, {"message": "Invalid request body"})
         
         # Validate required fields
-        required_fields = ['audioFile', 'patientId', 'doctorId']
+        required_fields = ['patientId', 'doctorId']
         missing_fields = [field for field in required_fields if field not in body]
+        # The recording comes as an uploaded audioKey or, from older
+        # clients, as audioFile
+        if not body.get('audioKey') and not body.get('audioFile'):
+            missing_fields.append('audioKey')
         if missing_fields:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({
-                    "message": "Missing required fields",
-                    "fields": missing_fields
-                })
-            }
+            return generate_response(400, {
+                "message": "Missing required fields",
+                "fields": missing_fields
+            })
         
         # Generate unique report ID
         report_id = str(uuid.uuid4())
+        created_at = now_ms()
         
         # Prepare report data with initial status
         report_data = {
             'reportId': report_id,
             'patientId': body['patientId'],
             'doctorId': body['doctorId'],
-            'audioFile': body['audioFile'],
             'transcription': body.get('transcription', ''),
             'reportData': body.get('reportData', ''),
             'additionalNotes': body.get('additionalNotes', ''),
-            'reportDate': body.get('reportDate', datetime.utcnow().isoformat()),
             'reportType': body.get('reportType', 'Unknown'),
             'billingData': body.get('billingData', {}),
             'currentStatus': 'Pending',  # Initial status
-            'createdAt': datetime.utcnow().isoformat(),
-            'updatedAt': datetime.utcnow().isoformat()
         }
+
+        # Timestamps are stored as canonical UTC strings plus epoch-ms
+        # numbers (reportDateMs, createdAtMs, updatedAtMs)
+        try:
+            stamp(report_data, 'reportDate', body.get('reportDate') or created_at)
+        except ValueError:
+            return generate_response(400, {"message": "reportDate must be an ISO 8601 timestamp or epoch milliseconds"})
+        stamp(report_data, 'createdAt', created_at)
+        stamp(report_data, 'updatedAt', created_at)
+
+        # The recording itself lives in the blob store and the report keeps
+        # a pointer: the uploaded audioKey, or a legacy audioFile reference.
+        # Audio still sent inline in audioFile is moved to the store first
+        try:
+            if body.get('audioKey'):
+                check_audio_key(body['doctorId'], body['audioKey'])
+                report_data['audioKey'] = body['audioKey']
+            elif is_inline_audio(body['audioFile']):
+                report_data['audioKey'] = store_inline_audio(body['doctorId'], body['audioFile'])
+            else:
+                report_data['audioFile'] = body['audioFile']
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
         
         # Determine report status based on required processing fields
         if not body.get('transcription'):
@@ -74,71 +94,72 @@ def addNewReport(event, context):
         
         logger.info(f"Report added successfully: {report_id}")
 
-        patient_data = {
-            'patientId': report_data['patientId'],
-            'doctorId': report_data['doctorId'],
-            'latestReportId': report_data['reportId'],
-            'latestReportDate': report_data['createdAt']
-        }
+        # With change stream processing the stream consumer derives the
+        # patient's latest report and the feed entry from this write
+        if not CHANGE_STREAM_PROCESSING:
+            patient_data = {
+                'patientId': report_data['patientId'],
+                'doctorId': report_data['doctorId'],
+                'latestReportId': report_data['reportId'],
+                'latestReportDate': report_data['createdAt'],
+                'latestReportDateMs': report_data['createdAtMs']
+            }
+
+            # update the Latest Report details to patient table 
+            patient_update = updatePatientLatestReport(patient_data)
+
+            # Add the report to the doctor's feed, with the patient record the
+            # update returned. The report is saved either way; a missing feed
+            # entry is restored by scripts/rebuild_doctor_feed.py
+            try:
+                doctor_feed.put_report(report_data, patient_update.get('updatedAttributes', {}))
+            except Exception as e:
+                logger.error(f"Doctor feed not updated for report {report_id}: {str(e)}")
         
-        # update the Latest Report details to patient table 
-        updatePatientLatestReport(patient_data)
-        
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Access-Control-Allow-Origin": "*",
-            },
-            "body": json.dumps({
-                "message": "Report saved successfully",
-                "report": report_data
-            })
-        }
+        return generate_response(200, {
+            "message": "Report saved successfully",
+            "report": report_data
+        })
         
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in request body: {str(e)}")
-        return {
-            "statusCode": 400,
-            "body": json.dumps({
-                "message": "Invalid JSON in request body",
-                "error": str(e)
-            })
-        }
+        return generate_response(400, {
+            "message": "Invalid JSON in request body",
+            "error": str(e)
+        })
     except Exception as e:
         logger.error(f"Error in addNewReport: {str(e)}", exc_info=True)
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            })
-        }
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
 
 def updatePatientLatestReport(report_data):
     try:
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table('doctorApp_patients')
+        table = DynamoDBTable(PATIENT_TABLE)
         
-        print('updatePatientLatestReport:',report_data)
+        logger.debug(f"updatePatientLatestReport: {report_data['patientId']} -> {report_data['latestReportId']}")
         
         # Prepare the update expression and attribute values
-        update_expression = "SET latestReportId = :rid, latestReportDate = :rdate"
+        update_expression = "SET latestReportId = :rid, latestReportDate = :rdate, latestReportDateMs = :rdatems"
         expression_attribute_values = {
             ':rid': report_data['latestReportId'],
-            ':rdate': report_data['latestReportDate']
+            ':rdate': report_data['latestReportDate'],
+            ':rdatems': report_data['latestReportDateMs']
         }
         
         # Perform the update operation
         response = table.update_item(
-            Key={
+            {
                 'patientId': report_data['patientId'],
             },
             UpdateExpression=update_expression,
             ExpressionAttributeValues=expression_attribute_values,
-            ReturnValues="UPDATED_NEW"
+            # The whole patient record, for the doctor feed entry
+            ReturnValues="ALL_NEW"
         )
 
-        print('updatePatientLatestReport:response:', response)
+        logger.debug(f"updatePatientLatestReport response: {response.get('Attributes')}")
         
         return {
             'statusCode': 200,
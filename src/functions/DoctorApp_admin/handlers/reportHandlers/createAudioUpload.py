@@ -0,0 +1,47 @@
+import json
+import logging
+from utils.blob_store import get_blob_store
+from utils.report_audio import new_audio_key, check_content_type
+from utils.response import generate_response
+from config.constants import BLOB_UPLOAD_URL_EXPIRES_SECONDS
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+def createAudioUpload(event, context):
+    """
+    Issue a presigned upload URL for a report recording. The client PUTs
+    the audio to uploadUrl with the given headers, then creates the report
+    with POST /reports and the returned audioKey.
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        doctor_id = body.get('doctorId')
+        content_type = body.get('contentType')
+        if not doctor_id or not content_type:
+            return generate_response(400, {
+                "message": "Missing required fields",
+                "fields": [field for field in ('doctorId', 'contentType') if not body.get(field)]
+            })
+        try:
+            check_content_type(content_type)
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
+
+        audio_key = new_audio_key(doctor_id, content_type)
+        upload_url = get_blob_store().upload_url(audio_key, content_type, BLOB_UPLOAD_URL_EXPIRES_SECONDS)
+        logger.info(f"Audio upload issued: {audio_key}")
+
+        return generate_response(201, {
+            "audioKey": audio_key,
+            "uploadUrl": upload_url,
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+            "expiresIn": BLOB_UPLOAD_URL_EXPIRES_SECONDS
+        })
+
+    except json.JSONDecodeError as e:
+        return generate_response(400, {"message": "Invalid JSON in request body", "error": str(e)})
+    except Exception as e:
+        logger.error(f"Error in createAudioUpload: {str(e)}")
+        return generate_response(500, {"message": "Error processing request", "error": str(e)})
@@ -1,49 +1,85 @@
-import json
-import boto3
+import heapq
+import logging
+from itertools import groupby, islice
 from boto3.dynamodb.conditions import Key, Attr
-from collections import defaultdict
-from datetime import datetime
+from utils.dynamo_utils import DynamoDBTable
+from utils.pagination import parse_page, encode_cursor
+from utils.response import generate_response
+from config.constants import (
+    PATIENT_TABLE,
+    REPORT_TABLE,
+    QUERY_ITEM_BUDGET,
+    REPORT_TIMELINE_INDEX,
+    REPORT_FEED_DEFAULT_LIMIT,
+    REPORT_FEED_MAX_LIMIT,
+    REPORT_STREAM_FIRST_LIMIT,
+)
 
-dynamodb = boto3.resource('dynamodb')
-patient_table = dynamodb.Table('doctorApp_patients')
-report_table = dynamodb.Table('DoctorApp_Reports')
+logger = logging.getLogger()
+
+def feed_order(report):
+    # Newest first; reportId breaks ties between reports with the same date
+    return (report.get('reportDate') or '', report.get('reportId') or '')
+
+def feed_stream(patient_id, reports, position, errors):
+    """
+    Puts one patient's report stream in feed order. The index sorts by
+    reportDate alone, so reports sharing a date are ordered by reportId.
+    A page that fails to load ends the stream and is recorded in `errors`.
+
+    :param patient_id: The patient the stream belongs to.
+    :param reports: Reports, newest reportDate first.
+    :param position: feed_order() of the last report served, or None.
+    :param errors: Dict of patientId -> exception to record failures in.
+    :return: Generator of reports after `position`, in feed order.
+    """
+    try:
+        for _, same_date in groupby(reports, key=lambda report: report.get('reportDate') or ''):
+            for report in sorted(same_date, key=feed_order, reverse=True):
+                if position is None or feed_order(report) < position:
+                    yield report
+    except Exception as e:
+        errors[patient_id] = e
 
 def getAllReportsByDoctorId(event, context):
     try:
         # Extract doctorId from path parameters
         doctor_id = event.get('pathParameters', {}).get('doctorId')
-        
+
         if not doctor_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Doctor ID is required."}),
-            }
+            return generate_response(400, {"message": "Doctor ID is required."})
+
+        # Page size and resume position; the cursor holds the last report
+        # served, as (reportDate, reportId)
+        scope = {'doctorId': doctor_id, 'feed': 'completeReports'}
+        try:
+            page_size, after = parse_page(
+                event, scope, int(event.get('pageSize', REPORT_FEED_DEFAULT_LIMIT)), REPORT_FEED_MAX_LIMIT
+            )
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
+        page_size = min(page_size or REPORT_FEED_DEFAULT_LIMIT, REPORT_FEED_MAX_LIMIT)
+
+        patient_table = DynamoDBTable(PATIENT_TABLE)
+        report_table = DynamoDBTable(REPORT_TABLE)
+
+        # 1. Get all patients for the doctor
+        patients = list(patient_table.iter_query(
+            max_items=QUERY_ITEM_BUDGET,
+            IndexName='doctorId-index',
+            KeyConditionExpression=Key('doctorId').eq(doctor_id),
+            ProjectionExpression='patientId, doctorId, dateOfBirth, email, #name, gender',
+            ExpressionAttributeNames={'#name': 'name'}
+        ))
 
-        page_size = event.get('pageSize', 1000)
-        last_evaluated_key = event.get('lastEvaluatedKey', None)
-        
-        # 1. Get all patients for the doctor in one query
-        patient_query_params = {
-            'IndexName': 'doctorId-index',
-            'KeyConditionExpression': Key('doctorId').eq(doctor_id),
-            # 'Limit': page_size
-        }
-        if last_evaluated_key:
-            patient_query_params['ExclusiveStartKey'] = last_evaluated_key
-            
-        patient_response = patient_table.query(**patient_query_params)
-        patients = patient_response['Items']
-        
         if not patients:
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'patientReports': [],
-                    'count': 0,
-                    # 'pageSize': page_size,
-                    'hasMore': False
-                })
-            }
+            return generate_response(200, {
+                'patientReports': [],
+                'count': 0,
+                'pageSize': page_size,
+                'hasMore': False,
+                'nextCursor': None
+            })
 
         # 2. Create a mapping of patient data
         patient_map = {
@@ -57,79 +93,75 @@ def getAllReportsByDoctorId(event, context):
             } for patient in patients
         }
 
-        # 3. Batch get reports for all patients using parallel queries
-        patient_reports = []
-        patient_ids = list(patient_map.keys())
-        
-        # Using BatchGet to fetch reports in parallel
-        def get_reports_batch(patient_ids_batch):
-            response = report_table.query(
-                IndexName='patientId-index',
-                KeyConditionExpression=Key('patientId').eq(patient_ids_batch),
-                FilterExpression=Attr('currentStatus').eq('Complete')
-            )
-            return response.get('Items', [])
-
-        # Process reports in batches of 10 (DynamoDB recommendation)
-        batch_size = 10
-        all_reports = []
-        for i in range(0, len(patient_ids), batch_size):
-            batch = patient_ids[i:i + batch_size]
-            for patient_id in batch:
-                reports = get_reports_batch(patient_id)
-                all_reports.extend(reports)
-
-        # 4. Combine patient and report data
-        for report in all_reports:
-            patient_id = report.get('patientId')
-            if patient_id in patient_map:
-                patient_data = patient_map[patient_id]
-                combined_record = {
-                    **patient_data,
-                    'reportId': report.get('reportId'),
-                    'currentStatus': report.get('currentStatus'),
-                    'reportType': report.get('reportType'),
-                    'updatedAt': report.get('updatedAt'),
-                    'reportDate': report.get('reportDate')
-                }
-                patient_reports.append(combined_record)
-
-        # Sort the patient_reports by reportDate in descending order (latest first)
-        sorted_patient_reports = sorted(
-            patient_reports,
-            key=lambda x: datetime.strptime(x['reportDate'], '%Y-%m-%dT%H:%M:%S.%fZ'),
-            reverse=True
+        # 3. One stream per patient, newest first from the reportDate
+        # index. Only the first REPORT_STREAM_FIRST_LIMIT reports of each
+        # are read up front; a stream reads its next page only when the
+        # merge below has used up the previous one, so a patient with a
+        # long history costs no more than the reports actually served.
+        # When resuming, reportDate <= the cursor's date re-reads the
+        # reports up to the last one served, which are skipped below
+        queries = {}
+        for patient_id in patient_map:
+            key_condition = Key('patientId').eq(patient_id)
+            if after:
+                key_condition = key_condition & Key('reportDate').lte(after['reportDate'])
+            queries[patient_id] = {
+                'IndexName': REPORT_TIMELINE_INDEX,
+                'KeyConditionExpression': key_condition,
+                'FilterExpression': Attr('currentStatus').eq('Complete'),
+                'ProjectionExpression': 'reportId, patientId, currentStatus, reportType, updatedAt, reportDate',
+                'ScanIndexForward': False
+            }
+        streams_by_patient, errors = report_table.iter_query_many(
+            queries, min(REPORT_STREAM_FIRST_LIMIT, page_size + 1), next_limit=page_size + 1
         )
 
+        # Failed patients are reported instead of failing the whole list,
+        # unless nothing succeeded
+        if errors and not streams_by_patient:
+            raise next(iter(errors.values()))
+
+        # 4. Lazy k-way merge of the sorted streams, stopping once the page
+        # (plus one report) is filled. ISO dates compare correctly as strings
+        position = (after['reportDate'], after['reportId']) if after else None
+        streams = [
+            feed_stream(patient_id, stream, position, errors)
+            for patient_id, stream in streams_by_patient.items()
+        ]
+        merged = list(islice(heapq.merge(*streams, key=feed_order, reverse=True), page_size + 1))
+        has_more = len(merged) > page_size
+        page = merged[:page_size]
+        for patient_id, error in errors.items():
+            logger.error(f"Report query failed for patient {patient_id}: {error}")
+
+        # 5. Combine patient and report data
+        patient_reports = [
+            {
+                **patient_map[report['patientId']],
+                'reportId': report.get('reportId'),
+                'currentStatus': report.get('currentStatus'),
+                'reportType': report.get('reportType'),
+                'updatedAt': report.get('updatedAt'),
+                'reportDate': report.get('reportDate')
+            } for report in page
+        ]
+
         response = {
-            'patientReports': sorted_patient_reports,
+            'patientReports': patient_reports,
             'pageSize': page_size,
-            'count': len(sorted_patient_reports)
+            'count': len(patient_reports),
+            'hasMore': has_more,
+            'nextCursor': encode_cursor(
+                {'reportDate': page[-1]['reportDate'], 'reportId': page[-1]['reportId']}, scope
+            ) if has_more else None
         }
+        if errors:
+            response['partial'] = True
+            response['failedPatientIds'] = sorted(errors)
 
-        if 'LastEvaluatedKey' in patient_response:
-            response['lastEvaluatedKey'] = patient_response['LastEvaluatedKey']
-            response['hasMore'] = True
-        else:
-            response['hasMore'] = False
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True
-            },
-            'body': json.dumps(response)
-        }
+        return generate_response(200, response, headers={'Access-Control-Allow-Credentials': True})
 
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True
-            },
-            'body': json.dumps({
-                'message': f'Internal server error: {str(e)}'
-            })
-        }
+        return generate_response(500, {
+            'message': f'Internal server error: {str(e)}'
+        }, headers={'Access-Control-Allow-Credentials': True})
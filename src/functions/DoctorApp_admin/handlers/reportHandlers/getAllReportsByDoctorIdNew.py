@@ -1,10 +1,28 @@
-import json
-import boto3
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
+from utils.dynamo_utils import DynamoDBTable
+from utils.doctor_feed import FEED_PATIENT_FIELDS, FEED_REPORT_FIELDS, FEED_LISTED_STATUS
+from utils.pagination import parse_page, encode_cursor
+from utils.projection import apply_projection
+from utils.response import generate_response
+from config.constants import (
+    PATIENT_TABLE,
+    REPORT_TABLE,
+    DOCTOR_FEED_TABLE,
+    DOCTOR_FEED_COMPLETE_INDEX,
+    DOCTOR_FEED_READS,
+    REPORT_FEED_DEFAULT_LIMIT,
+    REPORT_FEED_MAX_LIMIT,
+    TABLE_KEY_SCHEMAS,
+)
 
-dynamodb = boto3.resource('dynamodb')
-report_table = dynamodb.Table('DoctorApp_Reports')
-patient_table = dynamodb.Table('doctorApp_patients')
+# Reports GSI the listing is read from while the feed is not
+REPORT_DOCTOR_INDEX = 'doctorId-reportDate-index'
+
+def start_key_attributes(table_name, index_name):
+    # A LastEvaluatedKey from an index holds the table key and the index key
+    schema = TABLE_KEY_SCHEMAS[table_name]
+    attributes = set(schema['key']) | set(schema['indexes'][index_name])
+    return attributes - {None}
 
 def getAllReportsByDoctorIdNew(event, context):
     try:
@@ -12,94 +30,110 @@ def getAllReportsByDoctorIdNew(event, context):
         doctor_id = event.get('pathParameters', {}).get('doctorId')
 
         if not doctor_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Doctor ID is required."}),
-            }
-
-        page_size = int(event.get('pageSize', 1000))  # Default page size
-        last_evaluated_key = event.get('lastEvaluatedKey')
-
-        # Step 1: Query DoctorApp_Reports using GSI (doctorId, reportDate) - Sorted data
-        report_query_params = {
-            'IndexName': 'doctorId-reportDate-index',  # Ensure GSI exists
-            'KeyConditionExpression': Key('doctorId').eq(doctor_id),
-            'FilterExpression': Key('currentStatus').eq('Complete'),
-            'Limit': page_size,
-            'ScanIndexForward': False  # Retrieves latest reports first
-        }
-        if last_evaluated_key:
-            report_query_params['ExclusiveStartKey'] = last_evaluated_key
-
-        report_response = report_table.query(**report_query_params)
-        reports = report_response.get('Items', [])
-
-        if not reports:
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'patientReports': [],
-                    'count': 0,
-                    'hasMore': False
-                })
-            }
-
-        # Step 2: Fetch unique patient details using BatchGetItem
-        patient_ids = list({report['patientId'] for report in reports})
-        patient_data_map = {}
-
-        if patient_ids:
-            batch_keys = {'doctorApp_patients': {'Keys': [{'patientId': pid} for pid in patient_ids]}}
-            patient_response = dynamodb.batch_get_item(RequestItems=batch_keys)
-
-            for patient in patient_response.get('Responses', {}).get('doctorApp_patients', []):
-                patient_data_map[patient['patientId']] = {
-                    'patientId': patient.get('patientId'),
-                    'name': patient.get('name'),
-                    'gender': patient.get('gender'),
-                    'dateOfBirth': patient.get('dateOfBirth'),
-                    'email': patient.get('email'),
-                }
-
-        # Step 3: Merge report and patient data
-        patient_reports = []
-        for report in reports:
-            patient_info = patient_data_map.get(report['patientId'], {})
-            combined_record = {
-                **patient_info,
-                'reportId': report.get('reportId'),
-                'currentStatus': report.get('currentStatus'),
-                'reportType': report.get('reportType'),
-                'updatedAt': report.get('updatedAt'),
-                'reportDate': report.get('reportDate')
-            }
-            patient_reports.append(combined_record)
-
-        # Step 4: Construct response with pagination
+            return generate_response(400, {"message": "Doctor ID is required."})
+
+        # Page size and resume position; cursors are bound to the index
+        # they were issued for, so switching DOCTOR_FEED_READS rejects them
+        index_name = DOCTOR_FEED_COMPLETE_INDEX if DOCTOR_FEED_READS else REPORT_DOCTOR_INDEX
+        scope = {'doctorId': doctor_id, 'index': index_name}
+        try:
+            page_size, start_key = parse_page(
+                event, scope, int(event.get('pageSize', REPORT_FEED_DEFAULT_LIMIT)), REPORT_FEED_MAX_LIMIT
+            )
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
+        page_size = min(page_size or REPORT_FEED_DEFAULT_LIMIT, REPORT_FEED_MAX_LIMIT)
+
+        # Callers that predate cursors pass the previous response's
+        # lastEvaluatedKey on the event. It must come from the index now in
+        # use, or DynamoDB would reject it
+        if not start_key and event.get('lastEvaluatedKey'):
+            start_key = event['lastEvaluatedKey']
+            table_name = DOCTOR_FEED_TABLE if DOCTOR_FEED_READS else REPORT_TABLE
+            if not isinstance(start_key, dict) or set(start_key) != start_key_attributes(table_name, index_name):
+                return generate_response(400, {"message": "Invalid lastEvaluatedKey"})
+
+        if DOCTOR_FEED_READS:
+            patient_reports, last_evaluated_key = query_feed(doctor_id, page_size, start_key)
+        else:
+            patient_reports, last_evaluated_key = query_reports(doctor_id, page_size, start_key)
+
         response = {
             'patientReports': patient_reports,
+            'pageSize': page_size,
             'count': len(patient_reports),
-            'hasMore': 'LastEvaluatedKey' in report_response,
+            'hasMore': last_evaluated_key is not None,
+            'nextCursor': encode_cursor(last_evaluated_key, scope)
         }
+        if last_evaluated_key:
+            response['lastEvaluatedKey'] = last_evaluated_key
 
-        if 'LastEvaluatedKey' in report_response:
-            response['lastEvaluatedKey'] = report_response['LastEvaluatedKey']
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True
-            },
-            'body': json.dumps(response)
-        }
+        return generate_response(200, response, headers={'Access-Control-Allow-Credentials': True})
 
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Credentials': True
-            },
-            'body': json.dumps({'message': f'Internal server error: {str(e)}'})
-        }
+        return generate_response(500, {'message': f'Internal server error: {str(e)}'}, headers={'Access-Control-Allow-Credentials': True})
+
+def query_feed(doctor_id, page_size, start_key):
+    """
+    One query on the doctor feed, newest first. The index only holds
+    Complete reports, and each entry already carries the patient fields, so
+    there is no filter and no join.
+
+    :return: Tuple of (merged records, LastEvaluatedKey or None).
+    """
+    query_params = {
+        'IndexName': DOCTOR_FEED_COMPLETE_INDEX,
+        'KeyConditionExpression': Key('doctorId').eq(doctor_id),
+        'ScanIndexForward': False,
+        'Limit': page_size
+    }
+    if start_key:
+        query_params['ExclusiveStartKey'] = start_key
+    apply_projection(query_params, FEED_PATIENT_FIELDS + FEED_REPORT_FIELDS)
+
+    feed_response = DynamoDBTable(DOCTOR_FEED_TABLE).query(**query_params)
+    return feed_response.get('Items', []), feed_response.get('LastEvaluatedKey')
+
+def query_reports(doctor_id, page_size, start_key):
+    """
+    Queries the doctor's Complete reports from the reports table, newest
+    first, and joins in their patients with BatchGetItem. Unlike the feed
+    this sees every report write, including status changes made outside
+    this function.
+
+    :return: Tuple of (merged records, LastEvaluatedKey or None).
+    """
+    report_query_params = {
+        'IndexName': REPORT_DOCTOR_INDEX,
+        'KeyConditionExpression': Key('doctorId').eq(doctor_id),
+        'FilterExpression': Attr('currentStatus').eq(FEED_LISTED_STATUS),
+        'Limit': page_size,
+        'ScanIndexForward': False  # Retrieves latest reports first
+    }
+    if start_key:
+        report_query_params['ExclusiveStartKey'] = start_key
+    apply_projection(report_query_params, ['patientId'] + FEED_REPORT_FIELDS)
+
+    report_response = DynamoDBTable(REPORT_TABLE).query(**report_query_params)
+    reports = report_response.get('Items', [])
+    last_evaluated_key = report_response.get('LastEvaluatedKey')
+    if not reports:
+        return [], last_evaluated_key
+
+    patient_ids = list({report['patientId'] for report in reports})
+    patients = DynamoDBTable(PATIENT_TABLE).batch_get_items(
+        [{'patientId': patient_id} for patient_id in patient_ids],
+        ProjectionExpression='patientId, #name, gender, dateOfBirth, email',
+        ExpressionAttributeNames={'#name': 'name'}
+    )
+    patient_data_map = {
+        patient['patientId']: {field: patient.get(field) for field in FEED_PATIENT_FIELDS}
+        for patient in patients
+    }
+
+    patient_reports = []
+    for report in reports:
+        combined_record = dict(patient_data_map.get(report['patientId'], {}))
+        combined_record.update({field: report.get(field) for field in FEED_REPORT_FIELDS})
+        patient_reports.append(combined_record)
+    return patient_reports, last_evaluated_key
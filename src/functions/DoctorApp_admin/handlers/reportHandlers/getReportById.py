@@ -1,6 +1,8 @@
-import json
 import logging
 from utils.dynamo_utils import DynamoDBTable
+from utils.projection import parse_fields, apply_projection
+from utils.response import generate_response
+from utils.report_audio import audio_download_url
 from config.constants import REPORT_TABLE
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
@@ -19,10 +21,13 @@ def getReportById(event, context):
         report_id = event.get('pathParameters', {}).get('reportId')
         
         if not report_id:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Report ID is required."}),
-            }
+            return generate_response(400, {"message": "Report ID is required."})
+
+        # Requested fields, whole report by default
+        try:
+            fields = parse_fields(event, required=['reportId'])
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
 
         # Initialize DynamoDB table
         table = DynamoDBTable(REPORT_TABLE)
@@ -32,6 +37,7 @@ def getReportById(event, context):
             'KeyConditionExpression': Key('reportId').eq(report_id),
             'Limit': 1
         }
+        apply_projection(query_params, fields)
 
         try:
             logger.info(f"Querying DynamoDB for report_id: {report_id}")
@@ -41,44 +47,41 @@ def getReportById(event, context):
             
             # Check if we got any results
             if not items:
-                return {
-                    "statusCode": 404,
-                    "body": json.dumps({
-                        "message": "Report not found.",
-                        "reportId": report_id
-                    }),
-                }
+                return generate_response(404, {
+                    "message": "Report not found.",
+                    "reportId": report_id
+                })
+
+            report = items[0]
+
+            # The recording is fetched from the blob store with a
+            # short-lived URL; the report only holds its key
+            try:
+                audio_url = audio_download_url(report)
+            except Exception as e:
+                logger.error(f"Audio URL not issued for report {report_id}: {str(e)}")
+                audio_url = None
+            if audio_url:
+                report['audioUrl'] = audio_url
 
             logger.info(f"Successfully retrieved report: {report_id}")
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                },
-                "body": json.dumps({
-                    "message": "Report retrieved successfully",
-                    "reportId": report_id,
-                    "report": items[0]
-                }),
-            }
+            return generate_response(200, {
+                "message": "Report retrieved successfully",
+                "reportId": report_id,
+                "report": report
+            })
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
             logger.error(f"DynamoDB error: {error_code} - {str(e)}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": "Database error occurred",
-                    "error": error_code
-                }),
-            }
+            return generate_response(500, {
+                "message": "Database error occurred",
+                "error": error_code
+            })
 
     except Exception as e:
         logger.error(f"Error in getReportById: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            }),
-        }
\ No newline at end of file
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
\ No newline at end of file
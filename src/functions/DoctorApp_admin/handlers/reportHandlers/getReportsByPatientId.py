@@ -1,13 +1,28 @@
-import json
 import logging
-from utils.dynamo_utils import DynamoDBTable
-from config.constants import REPORT_TABLE
+import re
+from utils.dynamo_utils import DynamoDBTable, take
+from utils.projection import parse_fields, apply_projection
+from utils.pagination import parse_page, encode_cursor
+from utils.response import generate_response
+from config.constants import (
+    REPORT_TABLE,
+    QUERY_ITEM_BUDGET,
+    REPORT_LIST_FIELDS,
+    REPORT_TIMELINE_INDEX,
+    REPORT_TIMELINE_DEFAULT_LIMIT,
+    REPORT_TIMELINE_MAX_LIMIT,
+)
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# from/to accept a date or a full ISO timestamp, compared as strings like
+# the stored reportDate values ("2024-05-01T10:30:00.000Z")
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}(T[0-9:.]+Z?)?$')
+END_OF_DAY = 'T23:59:59.999Z'
+
 def getReportsByPatientId(event, context):
     """
     Retrieve all reports for a specific patient by patientId
@@ -19,13 +34,17 @@ def getReportsByPatientId(event, context):
         patient_id = event.get('pathParameters', {}).get('patientId')
         
         if not patient_id:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                },
-                "body": json.dumps({"message": "Patient ID is required."}),
-            }
+            return generate_response(400, {"message": "Patient ID is required."})
+
+        query_string_parameters = event.get('queryStringParameters', {}) or {}
+        if query_string_parameters.get('view') == 'timeline':
+            return get_report_timeline(event, patient_id)
+
+        # Requested fields, lean list view by default
+        try:
+            fields = parse_fields(event, default=REPORT_LIST_FIELDS, required=['reportId'])
+        except ValueError as e:
+            return generate_response(400, {"message": str(e)})
 
         # Initialize DynamoDB table
         table = DynamoDBTable(REPORT_TABLE)
@@ -35,53 +54,114 @@ def getReportsByPatientId(event, context):
             'IndexName': 'patientId-index',  # Name of your GSI
             'KeyConditionExpression': Key('patientId').eq(patient_id)
         }
+        apply_projection(query_params, fields)
 
         try:
             logger.info(f"Querying DynamoDB for patient_id: {patient_id}")
-            response = table.query(**query_params)
-            
-            items = response.get('Items', [])
+            items, has_more = take(table.iter_query(**query_params), QUERY_ITEM_BUDGET)
             
             # Check if we got any results
             if not items:
-                return {
-                    "statusCode": 404,
-                    "body": json.dumps({
-                        "message": "No reports found for the given patient.",
-                        "patientId": patient_id
-                    }),
-                }
+                return generate_response(404, {
+                    "message": "No reports found for the given patient.",
+                    "patientId": patient_id
+                })
 
             logger.info(f"Successfully retrieved reports for patient: {patient_id}")
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                },
-                "body": json.dumps({
-                    "message": "Reports retrieved successfully",
-                    "patientId": patient_id,
-                    "reports": items
-                }),
-            }
+            return generate_response(200, {
+                "message": "Reports retrieved successfully",
+                "patientId": patient_id,
+                "reports": items,
+                "count": len(items),
+                "hasMore": has_more
+            })
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
             logger.error(f"DynamoDB error: {error_code} - {str(e)}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({
-                    "message": "Database error occurred",
-                    "error": error_code
-                }),
-            }
+            return generate_response(500, {
+                "message": "Database error occurred",
+                "error": error_code
+            })
 
     except Exception as e:
         logger.error(f"Error in getReportsByPatientId: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": "Error processing request",
-                "error": str(e)
-            }),
-        }
\ No newline at end of file
+        return generate_response(500, {
+            "message": "Error processing request",
+            "error": str(e)
+        })
+
+def get_report_timeline(event, patient_id):
+    """
+    Timeline view (?view=timeline): the patient's reports ordered by
+    reportDate, newest first unless order=asc, one page at a time.
+    `from`/`to` bound reportDate in the key condition of the
+    patientId-reportDate index, so out-of-range reports are never read.
+    Items use the lean list projection unless `fields` says otherwise.
+    """
+    query_string_parameters = event.get('queryStringParameters', {}) or {}
+    order = query_string_parameters.get('order', 'desc')
+    date_from = query_string_parameters.get('from')
+    date_to = query_string_parameters.get('to')
+
+    if order not in ('asc', 'desc'):
+        return generate_response(400, {"message": "order must be asc or desc."})
+    for value in (date_from, date_to):
+        if value is not None and not DATE_PATTERN.match(value):
+            return generate_response(400, {"message": "from and to must be dates (YYYY-MM-DD) or ISO timestamps."})
+    # A bare date in `to` covers that whole day
+    if date_to is not None and 'T' not in date_to:
+        date_to += END_OF_DAY
+    if date_from is not None and date_to is not None and date_from > date_to:
+        return generate_response(400, {"message": "from must not be after to."})
+
+    try:
+        fields = parse_fields(event, default=REPORT_LIST_FIELDS, required=['reportId', 'reportDate'])
+        scope = {'patientId': patient_id, 'index': REPORT_TIMELINE_INDEX, 'order': order, 'from': date_from, 'to': date_to}
+        limit, start_key = parse_page(event, scope, REPORT_TIMELINE_DEFAULT_LIMIT, REPORT_TIMELINE_MAX_LIMIT)
+    except ValueError as e:
+        return generate_response(400, {"message": str(e)})
+
+    key_condition = Key('patientId').eq(patient_id)
+    if date_from is not None and date_to is not None:
+        key_condition = key_condition & Key('reportDate').between(date_from, date_to)
+    elif date_from is not None:
+        key_condition = key_condition & Key('reportDate').gte(date_from)
+    elif date_to is not None:
+        key_condition = key_condition & Key('reportDate').lte(date_to)
+
+    query_params = {
+        'IndexName': REPORT_TIMELINE_INDEX,
+        'KeyConditionExpression': key_condition,
+        'ScanIndexForward': order == 'asc',
+    }
+    if limit:
+        query_params['Limit'] = limit
+    if start_key:
+        query_params['ExclusiveStartKey'] = start_key
+    apply_projection(query_params, fields)
+
+    try:
+        logger.info(f"Querying report timeline for patient_id: {patient_id}")
+        response = DynamoDBTable(REPORT_TABLE).query(**query_params)
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        logger.error(f"DynamoDB error: {error_code} - {str(e)}")
+        return generate_response(500, {
+            "message": "Database error occurred",
+            "error": error_code
+        })
+
+    items = response.get('Items', [])
+    next_cursor = encode_cursor(response.get('LastEvaluatedKey'), scope)
+    return generate_response(200, {
+        "message": "Reports retrieved successfully",
+        "patientId": patient_id,
+        "reports": items,
+        "count": len(items),
+        "hasMore": next_cursor is not None,
+        "nextCursor": next_cursor,
+        "order": order,
+        "from": date_from,
+        "to": date_to
+    })
@@ -0,0 +1,19 @@
+import logging
+from utils.change_stream import process_batch
+from utils.derived_data import update_patient_aggregates, update_doctor_feed
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Applied in order to every batch; each must be idempotent
+PROCESSORS = [update_patient_aggregates, update_doctor_feed]
+
+def processChanges(event, context):
+    """
+    DynamoDB Streams consumer for the patients and reports tables. Keeps
+    derived data (patient report aggregates, the doctor feed) current off
+    the request path and reports the first change it could not apply, so
+    the event source mapping retries the batch from there.
+    """
+    logger.info(f"Processing {len(event.get('Records', []))} change records")
+    return process_batch(event, PROCESSORS)
@@ -1,75 +1,39 @@
 import json
-import boto3
 import logging
 from botocore.exceptions import ClientError
-
-# Set up DynamoDB client
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('reportTemplates')
+from utils.template_catalog import template_catalog
+from utils.response import generate_response
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 def getAlltemplates(event, context):
-    logger.info(f"Received event: {json.dumps(event)}")
-    
     try:
-        # Verify table exists and is accessible
-        table.table_status
-        logger.info("Successfully connected to DynamoDB table")
-        
-        # Scan DynamoDB table to retrieve all templates
-        logger.info("Starting table scan")
-        response = table.scan()
-        templates = response.get('Items', [])
-        logger.info(f"Retrieved {len(templates)} templates")
+        # Serve the catalog from the in-container cache; it only scans the
+        # table on first use, on TTL expiry or when the version marker changes
+        misses = template_catalog.misses
+        templates, body = template_catalog.get_catalog()
+        cache_status = "MISS" if template_catalog.misses != misses else "HIT"
+        logger.info(f"Template catalog {cache_status}: {json.dumps(template_catalog.stats(), default=str)}")
 
         if not templates:
             logger.info("No templates found in the database")
-            return {
-                "statusCode": 404,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*"
-                },
-                "body": json.dumps({"message": "No templates found"})
-            }
+            return generate_response(404, {"message": "No templates found"}, headers={"X-Cache": cache_status})
 
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
-            },
-            "body": json.dumps(templates)
-        }
+        return generate_response(200, body, headers={"X-Cache": cache_status})
 
     except ClientError as e:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
         logger.error(f"DynamoDB ClientError: {error_code} - {error_message}")
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
-            },
-            "body": json.dumps({
-                "message": "Database operation failed",
-                "error": error_message
-            })
-        }
+        return generate_response(500, {
+            "message": "Database operation failed",
+            "error": error_message
+        })
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
-            },
-            "body": json.dumps({
-                "message": "Internal Server Error",
-                "error": str(e)
-            })
-        }
\ No newline at end of file
+        return generate_response(500, {
+            "message": "Internal Server Error",
+            "error": str(e)
+        })
\ No newline at end of file
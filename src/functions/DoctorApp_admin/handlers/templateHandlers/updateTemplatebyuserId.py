@@ -1,41 +1,33 @@
 import json
-import boto3
 import logging
 from botocore.exceptions import ClientError
-
-# Set up DynamoDB client
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('DoctorApp_users')
+from utils.dynamo_utils import DynamoDBTable
+from utils.identity import resolve_user, prime_user
+from utils.request_log import request_logger, RedactedJson
+from utils.response import generate_response
+from config.constants import USER_TABLE
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 def updateTemplatebyuserId(event, context):
-    logger.info(f"Received event: {json.dumps(event)}")
-    
     try:
         # Parse the request body
         body = json.loads(event.get('body', '{}'))
-        logger.info(f"JSON Body: {body}")
+        request_logger.debug("JSON Body: %s", RedactedJson(body))
         
-        # Extract required fields
-        userId = body.get('userId')  # Assuming doctorId maps to userId
-        email = body.get('email')      # Extract the email (sort key)
+        # Extract required fields, falling back to the caller's identity
+        caller = resolve_user(event) or {}
+        userId = body.get('userId') or caller.get('userId')  # Assuming doctorId maps to userId
+        email = body.get('email') or caller.get('email')      # Extract the email (sort key)
         template = body.get('defaultTemplate')
         
         # Validate required fields
         if not userId or not email or template is None:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*"
-                },
-                "body": json.dumps({
-                    "message": "Missing required fields: userId, email, and template are required"
-                })
-            }
+            return generate_response(400, {
+                "message": "Missing required fields: userId, email, and template are required"
+            })
 
         # Prepare update expression and attribute values
         update_expression = "SET defaultTemplate = :defaultTemplate"
@@ -44,8 +36,9 @@ def updateTemplatebyuserId(event, context):
         }
 
         # Perform the UpdateItem operation
+        table = DynamoDBTable(USER_TABLE)
         response = table.update_item(
-            Key={
+            {
                 'email': email
             },
             UpdateExpression=update_expression,
@@ -53,59 +46,35 @@ def updateTemplatebyuserId(event, context):
             ReturnValues='ALL_NEW'  # Returns the item with its new values
         )
         
-        logger.info(f"UpdateItem successful: {json.dumps(response)}")
+        request_logger.debug("UpdateItem successful: %s", RedactedJson(response.get('Attributes', {})))
 
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
-            },
-            "body": json.dumps({
-                "message": "Template updated successfully",
-                "userId": userId,
-                "updatedItem": response.get('Attributes', {})
-            })
-        }
+        # Keep the identity cache in step with the new template
+        if response.get('Attributes'):
+            prime_user(response['Attributes'])
+
+        return generate_response(200, {
+            "message": "Template updated successfully",
+            "userId": userId,
+            "updatedItem": response.get('Attributes', {})
+        })
 
     except ClientError as e:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
         logger.error(f"DynamoDB ClientError: {error_code} - {error_message}")
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
-            },
-            "body": json.dumps({
-                "message": "Database operation failed",
-                "error": error_message
-            })
-        }
+        return generate_response(500, {
+            "message": "Database operation failed",
+            "error": error_message
+        })
     except json.JSONDecodeError as e:
         logger.error(f"JSON Decode Error: {str(e)}")
-        return {
-            "statusCode": 400,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
-            },
-            "body": json.dumps({
-                "message": "Invalid JSON in request body",
-                "error": str(e)
-            })
-        }
+        return generate_response(400, {
+            "message": "Invalid JSON in request body",
+            "error": str(e)
+        })
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
-            },
-            "body": json.dumps({
-                "message": "Internal Server Error",
-                "error": str(e)
-            })
-        }
+        return generate_response(500, {
+            "message": "Internal Server Error",
+            "error": str(e)
+        })
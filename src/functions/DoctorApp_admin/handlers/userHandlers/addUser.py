@@ -1,6 +1,7 @@
-import json
 import uuid
 from utils.dynamo_utils import DynamoDBTable
+from utils.identity import prime_user
+from utils.response import generate_response
 from config.constants import USER_TABLE, DEFAULT_TEMPLATE
 import logging
 from datetime import datetime
@@ -49,6 +50,7 @@ def addUser(emailid, event):
         # Save to DynamoDB
         table = DynamoDBTable(USER_TABLE)
         table.put_item(data)
+        prime_user(data)
 
         logger.info(f"User added successfully: {userId}")
         
@@ -57,13 +59,10 @@ def addUser(emailid, event):
             return event
             
         # For direct API calls, return success response
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": "User added successfully",
-                "userId": userId
-            })
-        }
+        return generate_response(200, {
+            "message": "User added successfully",
+            "userId": userId
+        })
 
     except Exception as e:
         logger.error(f"Error in addUser: {str(e)}")
@@ -72,9 +71,6 @@ def addUser(emailid, event):
             raise e
             
         # For direct API calls, return error response
-        return {
-            "statusCode": 500,
-            "body": json.dumps({
-                "message": f"Error processing request: {str(e)}"
-            })
-        }
+        return generate_response(500, {
+            "message": f"Error processing request: {str(e)}"
+        })
@@ -1,8 +1,6 @@
-import json
 import logging
-from utils.dynamo_utils import DynamoDBTable
-from config.constants import USER_TABLE
-from boto3.dynamodb.conditions import Key
+from utils.identity import get_claims, resolve_user, get_user_by_email
+from utils.response import generate_response
 
 # Initialize logger
 logger = logging.getLogger()
@@ -18,11 +16,7 @@ def get_cors_headers():
 def getUserByEmail(event, context):
     # Handle OPTIONS request for CORS preflight
     if event.get('httpMethod') == 'OPTIONS':
-        return {
-            "statusCode": 200,
-            "headers": get_cors_headers(),
-            "body": json.dumps({"message": "OK"})
-        }
+        return generate_response(200, {"message": "OK"}, headers=get_cors_headers())
 
     try:
         logger.info("Processing getUserByEmail request")
@@ -30,44 +24,25 @@ def getUserByEmail(event, context):
         email_id = event.get('pathParameters', {}).get('emailid')
 
         if not email_id:
-            return {
-                "statusCode": 400,
-                "headers": get_cors_headers(),
-                "body": json.dumps({"message": "Email parameter is required."}),
-            }
+            return generate_response(400, {"message": "Email parameter is required."}, headers=get_cors_headers())
 
         # Convert email to lowercase before querying
         email_id = email_id.lower()
 
-        # Query DynamoDB with the extracted 'emailid'
-        table = DynamoDBTable(USER_TABLE)
-
-        response = table.query(
-            IndexName='email-index',
-            KeyConditionExpression=Key('email').eq(email_id)
-        )
+        # The caller's own record resolves from the authorizer claims;
+        # both paths are served from the identity cache when warm
+        if (get_claims(event).get('email') or '').lower() == email_id:
+            user = resolve_user(event)
+        else:
+            user = get_user_by_email(email_id)
 
         # Check if user was found
-        if 'Items' not in response or len(response['Items']) == 0:
-            return {
-                "statusCode": 404,
-                "headers": get_cors_headers(),
-                "body": json.dumps({"message": "User not found."}),
-            }
-
-        user = response['Items'][0]
+        if not user:
+            return generate_response(404, {"message": "User not found."}, headers=get_cors_headers())
 
         logger.info(f"User found successfully: {user['userId']}")
-        return {
-            "statusCode": 200,
-            "headers": get_cors_headers(),
-            "body": json.dumps(user),
-        }
+        return generate_response(200, user, headers=get_cors_headers())
 
     except Exception as e:
         logger.error(f"Error in getUserByEmail: {str(e)}")
-        return {
-            "statusCode": 500,
-            "headers": get_cors_headers(),
-            "body": json.dumps({"message": f"Error processing request: {str(e)}"}),
-        }
\ No newline at end of file
+        return generate_response(500, {"message": f"Error processing request: {str(e)}"}, headers=get_cors_headers())
\ No newline at end of file
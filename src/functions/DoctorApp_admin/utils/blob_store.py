@@ -0,0 +1,188 @@
+import hashlib
+import hmac
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+from config.constants import (
+    BLOB_BACKEND,
+    AUDIO_BUCKET,
+    BLOB_LOCAL_DIR,
+    BLOB_LOCAL_BASE_URL,
+    BLOB_URL_SECRET,
+)
+
+class S3BlobStore:
+    def __init__(self, bucket, client=None):
+        """
+        Blob store on an S3 bucket. Uploads and downloads go straight
+        between the client and S3 through presigned URLs, so audio never
+        passes through the Lambda. The S3 client shares the DynamoDB
+        registry's boto3 session and is created on first use.
+
+        :param bucket: The bucket name.
+        :param client: Optional boto3 S3 client.
+        """
+        self.bucket = bucket
+        self._client = client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from botocore.config import Config
+                    from utils.dynamo_utils import registry
+                    self._client = registry.session().client('s3', config=Config(signature_version='s3v4'))
+        return self._client
+
+    def upload_url(self, key, content_type, expires_in):
+        """
+        Presigned PUT URL for `key`; the upload must send the same
+        Content-Type.
+        """
+        return self.client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': self.bucket, 'Key': key, 'ContentType': content_type},
+            ExpiresIn=expires_in
+        )
+
+    def download_url(self, key, expires_in):
+        """
+        Presigned GET URL for `key`.
+        """
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': key}, ExpiresIn=expires_in
+        )
+
+    def head(self, key):
+        """
+        Size and content type of a stored blob.
+
+        :return: Dict with size and contentType, or None if there is none.
+        """
+        from botocore.exceptions import ClientError
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {'size': response['ContentLength'], 'contentType': response.get('ContentType')}
+
+    def put(self, key, data, content_type):
+        """
+        Stores a blob from the function itself, for audio that still
+        arrives inline.
+        """
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+
+class LocalBlobStore:
+    def __init__(self, root, base_url, secret):
+        """
+        Filesystem stand-in for S3, for local runs and benchmarks. URLs
+        point at `base_url` and carry an expiry and an HMAC signature like
+        presigned URLs do; whatever serves them checks them with
+        verify_url().
+
+        :param root: Directory the blobs are stored under.
+        :param base_url: Base URL of the local blob server.
+        :param secret: Secret the URLs are signed with.
+        :raises ValueError: If the secret is empty.
+        """
+        if not secret:
+            raise ValueError("LocalBlobStore needs a URL signing secret")
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip('/')
+        self._secret = secret.encode('utf-8')
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid blob key: {key}")
+        return path
+
+    def _sign(self, method, key, expires, content_type=''):
+        message = f"{method}\n{key}\n{expires}\n{content_type}".encode('utf-8')
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest()
+
+    def _url(self, method, key, expires_in, content_type=''):
+        expires = int(time.time()) + expires_in
+        query = urllib.parse.urlencode({
+            'method': method, 'expires': expires, 'signature': self._sign(method, key, expires, content_type)
+        })
+        return f"{self.base_url}/{urllib.parse.quote(key)}?{query}"
+
+    def upload_url(self, key, content_type, expires_in):
+        return self._url('PUT', key, expires_in, content_type)
+
+    def download_url(self, key, expires_in):
+        return self._url('GET', key, expires_in)
+
+    def verify_url(self, url, method, content_type=''):
+        """
+        Checks a URL issued by upload_url()/download_url().
+
+        :return: The blob key.
+        :raises ValueError: If the URL is for another method, expired or
+                            was tampered with.
+        """
+        parsed = urllib.parse.urlsplit(url)
+        query = dict(urllib.parse.parse_qsl(parsed.query))
+        key = urllib.parse.unquote(parsed.path[len(urllib.parse.urlsplit(self.base_url).path):].lstrip('/'))
+        expected = self._sign(method, key, query.get('expires', ''), content_type if method == 'PUT' else '')
+        if query.get('method') != method or not hmac.compare_digest(query.get('signature', ''), expected):
+            raise ValueError("Invalid blob URL")
+        if int(query['expires']) < time.time():
+            raise ValueError("Blob URL expired")
+        return key
+
+    def head(self, key):
+        try:
+            return {'size': os.path.getsize(self._path(key)), 'contentType': None}
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data, content_type=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name, so readers never see a partial blob
+        descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(descriptor, 'wb') as blob_file:
+            blob_file.write(data)
+        os.replace(temporary_path, path)
+
+    def get(self, key):
+        with open(self._path(key), 'rb') as blob_file:
+            return blob_file.read()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_blob_store():
+    """
+    The blob store selected by BLOB_BACKEND, created on first use and kept
+    for the life of the container.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if BLOB_BACKEND == 'local':
+                    _store = LocalBlobStore(BLOB_LOCAL_DIR, BLOB_LOCAL_BASE_URL, BLOB_URL_SECRET)
+                else:
+                    _store = S3BlobStore(AUDIO_BUCKET)
+    return _store
+
+def use_blob_store(store):
+    """
+    Replaces the blob store, e.g. with a LocalBlobStore in benchmarks.
+
+    :return: The store.
+    """
+    global _store
+    with _store_lock:
+        _store = store
+    return store
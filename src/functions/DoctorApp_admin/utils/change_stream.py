@@ -0,0 +1,83 @@
+import logging
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+logger = logging.getLogger()
+
+_deserializer = TypeDeserializer()
+_serializer = TypeSerializer()
+
+def to_attribute_values(item):
+    """
+    Converts a plain item to DynamoDB's typed attribute value form, as
+    found in stream records ({'name': {'S': 'Ann'}}).
+    """
+    return {name: _serializer.serialize(value) for name, value in item.items()}
+
+def from_attribute_values(image):
+    """
+    Converts a typed stream image back to a plain item, with numbers as
+    Decimal like the boto3 Table API returns them.
+    """
+    return {name: _deserializer.deserialize(value) for name, value in image.items()}
+
+class ChangeRecord:
+    def __init__(self, record):
+        """
+        One item change from a DynamoDB Streams event (or the local stand-in
+        in utils/local_stream.py, which writes the same format).
+
+        :param record: A record from the event's "Records" list.
+        """
+        change = record['dynamodb']
+        self.record = record
+        self.event_name = record['eventName']
+        # arn:aws:dynamodb:<region>:<account>:table/<name>/stream/<label>
+        self.table_name = record['eventSourceARN'].split(':table/', 1)[1].split('/', 1)[0]
+        self.sequence_number = change['SequenceNumber']
+        self.keys = from_attribute_values(change.get('Keys', {}))
+        self.new_image = from_attribute_values(change['NewImage']) if 'NewImage' in change else None
+        self.old_image = from_attribute_values(change['OldImage']) if 'OldImage' in change else None
+
+    @property
+    def image(self):
+        """
+        The item after the change, or before it for a REMOVE.
+        """
+        return self.new_image if self.new_image is not None else (self.old_image or {})
+
+    def changed(self, fields):
+        """
+        Whether any of `fields` differs between the old and new image.
+        """
+        old, new = self.old_image or {}, self.new_image or {}
+        return any(old.get(field) != new.get(field) for field in fields)
+
+def process_batch(event, processors):
+    """
+    Runs a batch of stream records through every processor, for a Lambda
+    event source mapping with ReportBatchItemFailures. Each processor gets
+    the whole batch, in stream order, and returns the records whose changes
+    it could not apply. The earliest of those is reported, so the batch is
+    retried from there; processors must therefore be idempotent, since
+    records after it are seen again.
+
+    :param event: DynamoDB Streams event ({"Records": [...]}).
+    :param processors: Callables taking a list of ChangeRecord and
+                       returning a list of failed ChangeRecord.
+    :return: Response with batchItemFailures, empty when all succeeded.
+    """
+    records = [ChangeRecord(record) for record in event.get('Records', [])]
+    failed = []
+    for processor in processors:
+        try:
+            failed.extend(processor(records))
+        except Exception as e:
+            # A processor that fails outright fails the whole batch
+            logger.error(f"Change processor {processor.__name__} failed: {e}", exc_info=True)
+            failed.extend(records[:1])
+
+    if not failed:
+        return {'batchItemFailures': []}
+    first = min(failed, key=lambda record: int(record.sequence_number))
+    logger.warning(f"{len(records)} changes processed, retrying from sequence {first.sequence_number}")
+    return {'batchItemFailures': [{'itemIdentifier': first.sequence_number}]}
@@ -0,0 +1,215 @@
+import logging
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from utils import doctor_feed
+from utils.dynamo_utils import DynamoDBTable
+from utils.timestamps import MS_SUFFIX, now_ms, to_epoch_ms, to_iso
+from config.constants import PATIENT_TABLE, REPORT_TABLE
+
+logger = logging.getLogger()
+
+# Report attributes the patient aggregates are computed from; changes to
+# anything else (transcription, reportData, ...) leave them as they are
+AGGREGATE_SOURCE_FIELDS = ['patientId', 'currentStatus', 'createdAt', 'createdAt' + MS_SUFFIX]
+COMPLETE_STATUS = 'Complete'
+
+# Report attributes a feed entry depends on, keys included
+FEED_SOURCE_FIELDS = ['doctorId', 'patientId'] + doctor_feed.FEED_REPORT_FIELDS
+
+def created_ms(report):
+    """
+    The report's creation time in epoch ms, or None when unknown.
+    """
+    if report.get('createdAt' + MS_SUFFIX) is not None:
+        return int(report['createdAt' + MS_SUFFIX])
+    try:
+        return to_epoch_ms(report.get('createdAt'))
+    except ValueError:
+        return None
+
+def patient_aggregates(reports):
+    """
+    Derives a patient's aggregate attributes from all of their reports:
+    reportCount, completeReportCount and the latest report by creation
+    time (latestReportId, latestReportDate, latestReportDateMs), the same
+    values addNewReport sets when it updates the patient itself.
+
+    :param reports: The patient's reports.
+    :return: Dict of attribute values; the latestReport* ones are absent
+             when no report has a creation time.
+    """
+    aggregates = {
+        'reportCount': len(reports),
+        'completeReportCount': sum(1 for report in reports if report.get('currentStatus') == COMPLETE_STATUS),
+    }
+    dated = [(created_ms(report), report['reportId']) for report in reports]
+    dated = [entry for entry in dated if entry[0] is not None]
+    if dated:
+        latest_ms, latest_id = max(dated)
+        aggregates['latestReportId'] = latest_id
+        aggregates['latestReportDate'] = to_iso(latest_ms)
+        aggregates['latestReportDateMs'] = latest_ms
+    return aggregates
+
+def overlay_changes(patient_id, reports, records):
+    """
+    Applies a batch's own report changes over a patient's reports as read
+    from the patientId index. The index is eventually consistent and can
+    lag the stream, missing the report a record is about or still holding
+    a removed one; the record images are authoritative for their reports.
+
+    :param patient_id: The patient.
+    :param reports: The patient's reports from the index.
+    :param records: ChangeRecords touching the patient, in stream order.
+    :return: The patient's reports with the changes applied.
+    """
+    by_id = {report['reportId']: report for report in reports}
+    for record in records:
+        report_id = record.keys.get('reportId')
+        if record.new_image is not None and record.new_image.get('patientId') == patient_id:
+            by_id[report_id] = record.new_image
+        else:
+            # Removed, or moved to another patient
+            by_id.pop(report_id, None)
+    return list(by_id.values())
+
+def write_patient_aggregates(patient_id, aggregates, computed_at):
+    """
+    Stores aggregates on the patient. The write is skipped when the patient
+    does not exist (no stub is created) or already holds aggregates
+    computed later, so concurrent batches cannot roll them back.
+
+    :return: True if the patient was updated.
+    """
+    names = {}
+    values = {':computedAt': computed_at}
+    assignments = ['aggregatedAtMs = :computedAt']
+    for index, (attribute, value) in enumerate(sorted(aggregates.items())):
+        names[f'#a{index}'] = attribute
+        values[f':v{index}'] = value
+        assignments.append(f'#a{index} = :v{index}')
+    update_expression = 'SET ' + ', '.join(assignments)
+    missing = [name for name in ('latestReportId', 'latestReportDate', 'latestReportDateMs') if name not in aggregates]
+    if missing:
+        update_expression += ' REMOVE ' + ', '.join(missing)
+
+    try:
+        DynamoDBTable(PATIENT_TABLE).update_item(
+            {'patientId': patient_id},
+            UpdateExpression=update_expression,
+            ConditionExpression=Attr('patientId').exists() & (
+                Attr('aggregatedAtMs').not_exists() | Attr('aggregatedAtMs').lte(computed_at)
+            ),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return False
+        raise
+    return True
+
+def update_patient_aggregates(records):
+    """
+    Change processor keeping the patients' report aggregates current. The
+    aggregates of every patient touched by the batch are recomputed from
+    the patient's reports (one query each, run concurrently, with the
+    batch's own changes laid over the results) rather than adjusted by the
+    changes, so replays, retries and out-of-order batches all converge on
+    the right values.
+
+    :param records: ChangeRecord list of a batch.
+    :return: The records whose patients could not be updated.
+    """
+    by_patient = {}
+    for record in records:
+        if record.table_name != REPORT_TABLE or not record.changed(AGGREGATE_SOURCE_FIELDS):
+            continue
+        for image in (record.old_image, record.new_image):
+            if image and image.get('patientId'):
+                by_patient.setdefault(image['patientId'], []).append(record)
+    if not by_patient:
+        return []
+
+    computed_at = now_ms()
+    queries = {
+        patient_id: {
+            'IndexName': 'patientId-index',
+            'KeyConditionExpression': Key('patientId').eq(patient_id),
+            'ProjectionExpression': 'reportId, currentStatus, createdAt, createdAtMs',
+        } for patient_id in by_patient
+    }
+    reports_by_patient, errors = DynamoDBTable(REPORT_TABLE).query_many(queries)
+
+    failed = []
+    for patient_id, error in errors.items():
+        logger.error(f"Reports of patient {patient_id} not read: {error}")
+        failed.extend(by_patient[patient_id])
+    for patient_id, reports in reports_by_patient.items():
+        try:
+            reports = overlay_changes(patient_id, reports, by_patient[patient_id])
+            write_patient_aggregates(patient_id, patient_aggregates(reports), computed_at)
+        except Exception as e:
+            logger.error(f"Aggregates of patient {patient_id} not updated: {e}")
+            failed.extend(by_patient[patient_id])
+    return failed
+
+def update_doctor_feed(records):
+    """
+    Change processor keeping the doctor feed (utils/doctor_feed.py) in step
+    with the reports and patients tables: report changes put, move or
+    delete the report's entry, and changes to a patient's feed fields are
+    copied onto the patient's entries. Changes made by this module, such
+    as the patient aggregates, touch no feed field and are passed over.
+
+    :param records: ChangeRecord list of a batch.
+    :return: The records that could not be applied.
+    """
+    report_records = [
+        record for record in records
+        if record.table_name == REPORT_TABLE and record.changed(FEED_SOURCE_FIELDS)
+    ]
+    patient_records = [
+        record for record in records
+        if record.table_name == PATIENT_TABLE and record.new_image is not None
+        and record.old_image is not None and record.changed(doctor_feed.FEED_PATIENT_FIELDS)
+    ]
+
+    failed = []
+    patients = {}
+    patient_ids = {record.new_image['patientId'] for record in report_records if record.new_image and record.new_image.get('patientId')}
+    if patient_ids:
+        try:
+            patients = {
+                patient['patientId']: patient
+                for patient in DynamoDBTable(PATIENT_TABLE).batch_get_items(
+                    [{'patientId': patient_id} for patient_id in patient_ids],
+                    ProjectionExpression='patientId, #name, gender, dateOfBirth, email',
+                    ExpressionAttributeNames={'#name': 'name'}
+                )
+            }
+        except Exception as e:
+            logger.error(f"Patients of the feed changes not read: {e}")
+            return list(report_records[:1])
+
+    for record in report_records:
+        old, new = record.old_image, record.new_image
+        try:
+            old_placed = old and all(old.get(field) for field in ('doctorId', 'reportDate', 'reportId'))
+            new_placed = new and all(new.get(field) for field in ('doctorId', 'reportDate', 'reportId', 'patientId'))
+            if old_placed and (not new_placed or (old['doctorId'], doctor_feed.feed_key(old)) != (new['doctorId'], doctor_feed.feed_key(new))):
+                doctor_feed.delete_report(old)
+            if new_placed:
+                doctor_feed.put_report(new, patients.get(new['patientId'], {}))
+        except Exception as e:
+            logger.error(f"Feed entry of report {record.keys.get('reportId')} not updated: {e}")
+            failed.append(record)
+
+    for record in patient_records:
+        try:
+            if doctor_feed.update_patient(record.new_image):
+                failed.append(record)
+        except Exception as e:
+            logger.error(f"Feed entries of patient {record.keys.get('patientId')} not updated: {e}")
+            failed.append(record)
+    return failed
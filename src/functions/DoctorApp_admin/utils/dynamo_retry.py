@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+from config.constants import (
+    DYNAMODB_RETRY_MAX_ATTEMPTS,
+    DYNAMODB_RETRY_BASE_DELAY,
+    DYNAMODB_RETRY_MAX_DELAY,
+    DYNAMODB_RATE_LIMIT_MAX,
+    DYNAMODB_RATE_LIMIT_MIN,
+    DYNAMODB_RATE_DECREASE_FACTOR,
+    DYNAMODB_RATE_INCREASE_STEP,
+)
+
+# Errors that mean the table is over its capacity; they shrink the rate
+THROTTLE_ERROR_CODES = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+}
+
+# Errors worth retrying that say nothing about capacity
+TRANSIENT_ERROR_CODES = {
+    'InternalServerError',
+    'ServiceUnavailable',
+}
+
+# Connection failures and timeouts (EndpointConnectionError,
+# ConnectTimeoutError, ReadTimeoutError, ConnectionClosedError, ...);
+# botocore's own retries are off, so they are retried here
+TRANSIENT_CONNECTION_ERRORS = (BotoConnectionError, HTTPClientError)
+
+class TokenBucket:
+    def __init__(self, rate, min_rate, max_rate):
+        """
+        Thread-safe token bucket whose refill rate adapts to throttling:
+        it is cut multiplicatively on every throttle and grows back
+        additively on every success (AIMD).
+
+        :param rate: Initial rate in requests per second.
+        :param min_rate: Lowest rate the bucket will shrink to.
+        :param max_rate: Highest rate the bucket will grow back to.
+        """
+        self._lock = threading.Lock()
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def _refill(self):
+        now = time.monotonic()
+        # Allow a burst of up to one second worth of requests
+        self._tokens = min(self._rate, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+    def on_throttle(self):
+        with self._lock:
+            self._refill()
+            self._rate = max(self.min_rate, self._rate * DYNAMODB_RATE_DECREASE_FACTOR)
+            self._tokens = min(self._tokens, self._rate)
+
+    def on_success(self):
+        with self._lock:
+            self._rate = min(self.max_rate, self._rate + DYNAMODB_RATE_INCREASE_STEP)
+
+
+class AdaptiveRetry:
+    def __init__(self, bucket, max_attempts=None, base_delay=None, max_delay=None):
+        """
+        Runs DynamoDB calls through a shared token bucket and retries
+        throttled or transient failures, connection errors and timeouts
+        included, with full-jitter exponential backoff.
+
+        :param bucket: The TokenBucket shared by every caller of a table.
+        :param max_attempts: Total attempts per call, including the first.
+        :param base_delay: Backoff base in seconds.
+        :param max_delay: Upper bound on a single backoff in seconds.
+        """
+        self.bucket = bucket
+        self.max_attempts = max_attempts or DYNAMODB_RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else DYNAMODB_RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else DYNAMODB_RETRY_MAX_DELAY
+
+    def backoff(self, attempt):
+        """
+        Returns the delay before retry number `attempt` (1-based).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, operation, *args, **kwargs):
+        """
+        Calls `operation`, retrying throttling, transient and connection
+        errors.
+
+        :param operation: A boto3 Table or resource method.
+        :return: The operation's response.
+        :raises ClientError: Non-retryable errors, or the last error once
+                 max_attempts is exhausted.
+        :raises BotoCoreError: The last connection error once max_attempts
+                 is exhausted.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            self.bucket.acquire()
+            try:
+                response = operation(*args, **kwargs)
+            except ClientError as e:
+                error_code = e.response.get('Error', {}).get('Code')
+                if error_code in THROTTLE_ERROR_CODES:
+                    self.bucket.on_throttle()
+                elif error_code not in TRANSIENT_ERROR_CODES:
+                    raise
+                if attempt >= self.max_attempts:
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            except TRANSIENT_CONNECTION_ERRORS:
+                if attempt >= self.max_attempts:
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            self.bucket.on_success()
+            return response
+
+
+_retriers = {}
+_retriers_lock = threading.Lock()
+
+def get_retrier(table_name):
+    """
+    Returns the AdaptiveRetry shared by all DynamoDBTable instances and
+    threads working on a table, so they all back off together.
+
+    :param table_name: The name of the DynamoDB table.
+    """
+    retrier = _retriers.get(table_name)
+    if retrier is None:
+        with _retriers_lock:
+            retrier = _retriers.get(table_name)
+            if retrier is None:
+                bucket = TokenBucket(DYNAMODB_RATE_LIMIT_MAX, DYNAMODB_RATE_LIMIT_MIN, DYNAMODB_RATE_LIMIT_MAX)
+                retrier = AdaptiveRetry(bucket)
+                _retriers[table_name] = retrier
+    return retrier
+
+def is_throttle_error(error):
+    """
+    Tells whether an exception is a DynamoDB throttling error.
+    """
+    return isinstance(error, ClientError) and error.response.get('Error', {}).get('Code') in THROTTLE_ERROR_CODES
@@ -1,42 +1,307 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 import boto3
+from botocore.config import Config
+from config.constants import (
+    DYNAMODB_MAX_POOL_CONNECTIONS,
+    DYNAMODB_CONNECT_TIMEOUT,
+    DYNAMODB_READ_TIMEOUT,
+    DYNAMODB_TCP_KEEPALIVE,
+    DYNAMODB_MAX_ATTEMPTS,
+    DYNAMODB_BACKEND,
+    SCAN_TOTAL_SEGMENTS,
+    SCAN_MAX_WORKERS,
+    BATCH_GET_MAX_WORKERS,
+    BATCH_WRITE_MAX_WORKERS,
+    BATCH_MAX_RETRIES,
+    QUERY_FANOUT_MAX_WORKERS,
+)
+from utils.dynamo_retry import get_retrier
+from utils.dynamo_cache import get_table_cache
+
+# DynamoDB hard limits on keys/items per batch request
+BATCH_GET_CHUNK_SIZE = 100
+BATCH_WRITE_CHUNK_SIZE = 25
+
+class DynamoDBRegistry:
+    def __init__(self, **settings):
+        """
+        Process-wide holder for the boto3 session, DynamoDB client, resource
+        and Table handles. Everything is built lazily on first use and then
+        reused for the life of the Lambda container, so warm invocations skip
+        credential resolution and keep their HTTP connections open.
+
+        boto3 resources are not thread-safe, so every thread gets its own
+        resource and Table handles. They are thin wrappers around the one
+        shared low-level client, which is thread-safe, so all threads still
+        share its connection pool.
+
+        With DYNAMODB_BACKEND=memory, or after use_backend(), the resource is
+        an in-memory stand-in instead of AWS.
+
+        :param settings: Optional overrides for max_pool_connections,
+                         connect_timeout, read_timeout, tcp_keepalive and
+                         max_attempts.
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._backend = None
+        self._settings = {
+            'max_pool_connections': DYNAMODB_MAX_POOL_CONNECTIONS,
+            'connect_timeout': DYNAMODB_CONNECT_TIMEOUT,
+            'read_timeout': DYNAMODB_READ_TIMEOUT,
+            'tcp_keepalive': DYNAMODB_TCP_KEEPALIVE,
+            'max_attempts': DYNAMODB_MAX_ATTEMPTS,
+        }
+        self._settings.update(settings)
+        self._reset()
+
+    def _reset(self):
+        self._session = None
+        self._resource = None
+        # Per-thread handles built before a reset are discarded by this
+        self._generation = getattr(self, '_generation', 0) + 1
+
+    def configure(self, **settings):
+        """
+        Updates the connection settings. Cached handles are dropped so the
+        next call rebuilds them with the new configuration.
+
+        :param settings: Any of the settings accepted by the constructor.
+        """
+        with self._lock:
+            self._settings.update(settings)
+            self._reset()
+
+    def use_backend(self, backend):
+        """
+        Routes every DynamoDBTable through a resource-like backend, such as
+        an InMemoryDynamoDB, instead of AWS. None restores the backend
+        selected by DYNAMODB_BACKEND.
+
+        :param backend: The backend, or None.
+        :return: The backend.
+        """
+        with self._lock:
+            self._backend = backend
+            self._reset()
+        return backend
+
+    @property
+    def backend(self):
+        return self._backend
+
+    @property
+    def settings(self):
+        return dict(self._settings)
+
+    def botocore_config(self):
+        """
+        Builds the botocore Config used for the DynamoDB resource.
+
+        :return: botocore.config.Config instance.
+        """
+        return Config(
+            max_pool_connections=self._settings['max_pool_connections'],
+            connect_timeout=self._settings['connect_timeout'],
+            read_timeout=self._settings['read_timeout'],
+            tcp_keepalive=self._settings['tcp_keepalive'],
+            retries={
+                'max_attempts': self._settings['max_attempts'],
+                'mode': 'standard',
+            },
+        )
+
+    def session(self):
+        """
+        Returns the shared boto3 session.
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = boto3.session.Session()
+        return self._session
+
+    def _base_resource(self):
+        if self._resource is None:
+            if self._backend is not None or DYNAMODB_BACKEND == 'memory':
+                with self._lock:
+                    if self._backend is None:
+                        # Imported here so production cold starts skip the test double
+                        from utils.dynamo_memory import InMemoryDynamoDB
+                        self._backend = InMemoryDynamoDB()
+                    self._resource = self._backend
+                return self._resource
+            session = self.session()
+            with self._lock:
+                if self._resource is None:
+                    self._resource = session.resource('dynamodb', config=self.botocore_config())
+        return self._resource
+
+    def _handles(self):
+        handles = getattr(self._local, 'handles', None)
+        if handles is None or handles['generation'] != self._generation:
+            generation = self._generation
+            base = self._base_resource()
+            if base is self._backend:
+                # The in-memory backend is thread-safe itself
+                resource = base
+            else:
+                resource = type(base)(client=base.meta.client)
+            handles = {'generation': generation, 'resource': resource, 'tables': {}}
+            self._local.handles = handles
+        return handles
+
+    def resource(self):
+        """
+        Returns the calling thread's DynamoDB service resource.
+        """
+        return self._handles()['resource']
+
+    def client(self):
+        """
+        Returns the shared low-level client, which all threads' resources
+        wrap, so they share a single connection pool.
+        """
+        return self._base_resource().meta.client
+
+    def table(self, table_name):
+        """
+        Returns the calling thread's Table handle for a table name.
+
+        :param table_name: The name of the DynamoDB table.
+        """
+        handles = self._handles()
+        table = handles['tables'].get(table_name)
+        if table is None:
+            table = handles['resource'].Table(table_name)
+            handles['tables'][table_name] = table
+        return table
+
+
+# Shared for the life of the container
+registry = DynamoDBRegistry()
+
+class BatchIncompleteError(Exception):
+    def __init__(self, message, unprocessed):
+        """
+        Raised when a batch operation still has unprocessed keys or items
+        after all retries.
+
+        :param message: Error message.
+        :param unprocessed: The keys or items DynamoDB never processed.
+        """
+        super().__init__(message)
+        self.unprocessed = unprocessed
 
 class DynamoDBTable:
-    def __init__(self, table_name):
+    def __init__(self, table_name, cache=None):
         """
-        Initializes the DynamoDB table using a constant table name.
+        Initializes the DynamoDB table using a constant table name. The
+        underlying resource and Table handle come from the shared registry,
+        looked up on every call, so an instance can be used from any thread.
+        Every call goes through the table's shared adaptive retry and rate
+        limiter, which backs off on throttling.
 
         :param table_name: The name of the DynamoDB table.
+        :param cache: Optional TableCache for get_item/query; defaults to
+                      the table's configured cache, if any.
         """
-        self.dynamodb = boto3.resource('dynamodb')
-        self.table = self.dynamodb.Table(table_name)
+        self.table_name = table_name
+        self.retry = get_retrier(table_name)
+        self.cache = cache if cache is not None else get_table_cache(table_name)
+
+    @property
+    def dynamodb(self):
+        return registry.resource()
+
+    @property
+    def table(self):
+        return registry.table(self.table_name)
 
     def put_item(self, item):
         """
-        Puts an item into the DynamoDB table.
+        Puts an item into the DynamoDB table. With a cache attached, the old
+        image is requested (ALL_OLD) so cached reads of both the old and
+        new item are invalidated.
 
         :param item: The item to put into the table.
         :return: Response from DynamoDB.
         """
-        return self.table.put_item(Item=item)
+        if not self.cache:
+            return self.retry.call(self.table.put_item, Item=item)
+        response = self.retry.call(self.table.put_item, Item=item, ReturnValues='ALL_OLD')
+        self.cache.invalidate(item, response.get('Attributes'))
+        return response
 
-    def get_item(self, key):
+    def get_item(self, key, **kwargs):
         """
         Gets an item from the DynamoDB table by its key.
 
         :param key: The primary key of the item to retrieve.
+        :param kwargs: Optional parameters such as ProjectionExpression,
+                     ExpressionAttributeNames or ConsistentRead.
+        :return: Response from DynamoDB.
+        """
+        if self.cache:
+            params = dict(kwargs, Key=key)
+            return self.cache.get_item(params, lambda: self.retry.call(self.table.get_item, **params))
+        return self.retry.call(self.table.get_item, Key=key, **kwargs)
+
+    def update_item(self, key, **kwargs):
+        """
+        Updates an item in the DynamoDB table. With a cache attached,
+        NONE/UPDATED_NEW requests are upgraded to ALL_NEW so the new image
+        can invalidate every affected cached read; the response then
+        carries the whole item.
+
+        :param key: The primary key of the item to update.
+        :param kwargs: Update parameters including UpdateExpression,
+                     ExpressionAttributeValues, ReturnValues, etc.
+        :return: Response from DynamoDB.
+        """
+        if not self.cache:
+            return self.retry.call(self.table.update_item, Key=key, **kwargs)
+        if kwargs.get('ReturnValues', 'NONE') in ('NONE', 'UPDATED_NEW'):
+            kwargs['ReturnValues'] = 'ALL_NEW'
+        response = self.retry.call(self.table.update_item, Key=key, **kwargs)
+        # Without the new image the item's new partitions are unknown, so
+        # every cached query of the table is dropped
+        self.cache.invalidate(
+            key, response.get('Attributes'),
+            all_queries=kwargs['ReturnValues'] != 'ALL_NEW'
+        )
+        return response
+
+    def delete_item(self, key, **kwargs):
+        """
+        Deletes an item from the DynamoDB table by its key. With a cache
+        attached, the old image is requested (ALL_OLD) so cached reads of
+        the item are invalidated.
+
+        :param key: The primary key of the item to delete.
+        :param kwargs: Optional parameters such as ConditionExpression.
         :return: Response from DynamoDB.
         """
-        return self.table.get_item(Key=key)
+        if not self.cache:
+            return self.retry.call(self.table.delete_item, Key=key, **kwargs)
+        kwargs['ReturnValues'] = 'ALL_OLD'
+        response = self.retry.call(self.table.delete_item, Key=key, **kwargs)
+        self.cache.invalidate(key, response.get('Attributes'))
+        return response
 
     def query(self, **kwargs):
         """
         Queries the DynamoDB table with support for all query parameters.
-        
-        :param kwargs: Query parameters including KeyConditionExpression, 
+
+        :param kwargs: Query parameters including KeyConditionExpression,
                      IndexName, FilterExpression, etc.
         :return: Response from DynamoDB.
         """
-        return self.table.query(**kwargs)
+        return self._query(**kwargs)
 
     def scan(self, filter_expression=None):
         """
@@ -46,5 +311,356 @@ class DynamoDBTable:
         :return: Response from DynamoDB.
         """
         if filter_expression:
-            return self.table.scan(FilterExpression=filter_expression)
-        return self.table.scan()
\ No newline at end of file
+            return self._scan(FilterExpression=filter_expression)
+        return self._scan()
+
+    def _query(self, **kwargs):
+        if self.cache:
+            return self.cache.query(kwargs, lambda: self.retry.call(self.table.query, **kwargs))
+        return self.retry.call(self.table.query, **kwargs)
+
+    def _scan(self, **kwargs):
+        return self.retry.call(self.table.scan, **kwargs)
+
+    def iter_query_pages(self, max_pages=None, **kwargs):
+        """
+        Lazily yields raw query responses, following LastEvaluatedKey.
+
+        :param max_pages: Optional maximum number of pages to request.
+        :param kwargs: Query parameters, as for query().
+        :return: Generator of responses from DynamoDB.
+        """
+        return _paginate(self._query, max_pages, kwargs)
+
+    def iter_scan_pages(self, max_pages=None, **kwargs):
+        """
+        Lazily yields raw scan responses, following LastEvaluatedKey.
+
+        :param max_pages: Optional maximum number of pages to request.
+        :param kwargs: Scan parameters including FilterExpression,
+                     ProjectionExpression, Limit, etc.
+        :return: Generator of responses from DynamoDB.
+        """
+        return _paginate(self._scan, max_pages, kwargs)
+
+    def iter_query(self, max_items=None, max_pages=None, **kwargs):
+        """
+        Lazily yields items from a query across all result pages. The next
+        page is only requested once the current one has been consumed.
+
+        :param max_items: Optional maximum number of items to yield.
+        :param max_pages: Optional maximum number of pages to request.
+        :param kwargs: Query parameters, as for query().
+        :return: Generator of items.
+        """
+        return _iter_items(self.iter_query_pages(max_pages, **kwargs), max_items)
+
+    def iter_scan(self, max_items=None, max_pages=None, **kwargs):
+        """
+        Lazily yields items from a scan across all result pages.
+
+        :param max_items: Optional maximum number of items to yield.
+        :param max_pages: Optional maximum number of pages to request.
+        :param kwargs: Scan parameters, as for iter_scan_pages().
+        :return: Generator of items.
+        """
+        return _iter_items(self.iter_scan_pages(max_pages, **kwargs), max_items)
+
+    def iter_parallel_scan(self, total_segments=None, max_workers=None, segment_stats=None, **kwargs):
+        """
+        Scans the table as `total_segments` parallel segments on a thread
+        pool and yields items as soon as any segment returns a page. Pages
+        are handed over through a bounded queue, so memory stays flat no
+        matter how large the table is. Closing the generator early stops
+        the remaining segments.
+
+        :param total_segments: Number of scan segments (TotalSegments).
+        :param max_workers: Number of threads; defaults to total_segments.
+        :param segment_stats: Optional list that receives one dict per
+                     segment with pages, items, scannedCount and durationMs.
+        :param kwargs: Scan parameters, as for iter_scan_pages().
+        :return: Generator of items.
+        """
+        total_segments = total_segments or SCAN_TOTAL_SEGMENTS
+        max_workers = max_workers or min(total_segments, SCAN_MAX_WORKERS)
+        return _parallel_scan(self._scan, total_segments, max_workers, segment_stats, kwargs)
+
+    def query_many(self, queries, max_workers=None, max_items=None):
+        """
+        Runs many independent queries concurrently on a bounded thread
+        pool, e.g. one per patient. Each query follows its own
+        LastEvaluatedKey. A failing query does not cancel the others: its
+        exception is returned alongside the results that did succeed.
+
+        :param queries: Dict of label -> query parameters, as for query().
+        :param max_workers: Queries in flight at once; defaults to
+                     QUERY_FANOUT_MAX_WORKERS.
+        :param max_items: Optional maximum number of items per query.
+        :return: Tuple of ({label: items}, {label: exception}).
+        """
+        results = {}
+        errors = {}
+        if not queries:
+            return results, errors
+
+        def run(params):
+            return list(self.iter_query(max_items=max_items, **params))
+
+        max_workers = min(max_workers or QUERY_FANOUT_MAX_WORKERS, len(queries))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run, params): label for label, params in queries.items()}
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    results[label] = future.result()
+                except Exception as e:
+                    errors[label] = e
+        return results, errors
+
+    def iter_query_many(self, queries, first_limit, next_limit=None, max_workers=None):
+        """
+        Opens many independent queries as lazy item streams, e.g. one per
+        patient for a k-way merge. Only the first page of each query, of
+        `first_limit` items, is read up front, concurrently as in
+        query_many(). A stream requests its next page, of `next_limit`
+        items, only once a consumer has used up the previous one.
+
+        :param queries: Dict of label -> query parameters, as for query().
+        :param first_limit: Limit for the first page of each query.
+        :param next_limit: Limit for later pages; defaults to first_limit.
+        :param max_workers: First pages in flight at once; defaults to
+                     QUERY_FANOUT_MAX_WORKERS.
+        :return: Tuple of ({label: item generator}, {label: exception}).
+                     Errors on later pages are raised by the generator.
+        """
+        first_pages, errors = {}, {}
+        if not queries:
+            return first_pages, errors
+
+        max_workers = min(max_workers or QUERY_FANOUT_MAX_WORKERS, len(queries))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._query, **dict(params, Limit=first_limit)): label
+                for label, params in queries.items()
+            }
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    first_pages[label] = future.result()
+                except Exception as e:
+                    errors[label] = e
+
+        def stream(first_page, params):
+            yield from first_page.get('Items', [])
+            if first_page.get('LastEvaluatedKey'):
+                yield from self.iter_query(**dict(
+                    params,
+                    Limit=next_limit or first_limit,
+                    ExclusiveStartKey=first_page['LastEvaluatedKey'],
+                ))
+
+        streams = {label: stream(page, queries[label]) for label, page in first_pages.items()}
+        return streams, errors
+
+    def batch_get_items(self, keys, max_workers=None, **kwargs):
+        """
+        Fetches many items by primary key. Keys are deduplicated, split into
+        100-key BatchGetItem chunks that run concurrently, and any
+        UnprocessedKeys are retried with jittered exponential backoff and count
+        as throttling for the table's rate limiter.
+
+        :param keys: Iterable of primary key dicts.
+        :param max_workers: Number of chunks fetched concurrently.
+        :param kwargs: Extra per-table request parameters such as
+                     ProjectionExpression, ExpressionAttributeNames or
+                     ConsistentRead.
+        :return: List of items found, in no particular order.
+        :raises BatchIncompleteError: If keys remain unprocessed after
+                     BATCH_MAX_RETRIES retries.
+        """
+        unique_keys = list({_key_signature(key): key for key in keys}.values())
+        if not unique_keys:
+            return []
+
+        chunks = [
+            unique_keys[i:i + BATCH_GET_CHUNK_SIZE]
+            for i in range(0, len(unique_keys), BATCH_GET_CHUNK_SIZE)
+        ]
+        if len(chunks) == 1:
+            return self._batch_get_chunk(chunks[0], kwargs)
+
+        items = []
+        max_workers = min(max_workers or BATCH_GET_MAX_WORKERS, len(chunks))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk_items in executor.map(lambda chunk: self._batch_get_chunk(chunk, kwargs), chunks):
+                items.extend(chunk_items)
+        return items
+
+    def batch_put_items(self, items, max_workers=None):
+        """
+        Writes many items with BatchWriteItem. Items are split into 25-item
+        chunks that run concurrently, and any UnprocessedItems are retried
+        with jittered exponential backoff; unprocessed items also count as
+        throttling for the table's rate limiter. A failing chunk does not
+        stop the others.
+
+        :param items: List of items to put. Primary keys must be unique.
+        :param max_workers: Number of chunks written concurrently.
+        :return: List of (item, error message) tuples for items that could
+                 not be written; empty when everything succeeded.
+        """
+        chunks = [
+            items[i:i + BATCH_WRITE_CHUNK_SIZE]
+            for i in range(0, len(items), BATCH_WRITE_CHUNK_SIZE)
+        ]
+        if not chunks:
+            return []
+
+        failures = []
+        max_workers = min(max_workers or BATCH_WRITE_MAX_WORKERS, len(chunks))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk_failures in executor.map(self._batch_put_chunk, chunks):
+                failures.extend(chunk_failures)
+        if self.cache:
+            self.cache.invalidate(*items)
+        return failures
+
+    def _batch_put_chunk(self, items):
+        pending = [{'PutRequest': {'Item': item}} for item in items]
+        try:
+            for attempt in range(BATCH_MAX_RETRIES + 1):
+                if attempt:
+                    time.sleep(self.retry.backoff(attempt))
+                response = self.retry.call(self.dynamodb.batch_write_item, RequestItems={self.table_name: pending})
+                pending = response.get('UnprocessedItems', {}).get(self.table_name, [])
+                if not pending:
+                    return []
+                self.retry.bucket.on_throttle()
+        except Exception as e:
+            # Only what is still pending failed; earlier attempts wrote the rest
+            return [(request['PutRequest']['Item'], str(e)) for request in pending]
+        return [
+            (request['PutRequest']['Item'], f"Unprocessed after {BATCH_MAX_RETRIES} retries")
+            for request in pending
+        ]
+
+    def _batch_get_chunk(self, keys, request_params):
+        items = []
+        pending = keys
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(self.retry.backoff(attempt))
+            response = self.retry.call(
+                self.dynamodb.batch_get_item,
+                RequestItems={self.table_name: dict(request_params, Keys=pending)}
+            )
+            items.extend(response.get('Responses', {}).get(self.table_name, []))
+            pending = response.get('UnprocessedKeys', {}).get(self.table_name, {}).get('Keys', [])
+            if not pending:
+                return items
+            self.retry.bucket.on_throttle()
+        raise BatchIncompleteError(
+            f"{len(pending)} keys unprocessed in {self.table_name} after {BATCH_MAX_RETRIES} retries",
+            pending
+        )
+
+
+def _paginate(operation, max_pages, kwargs):
+    kwargs = dict(kwargs)
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        response = operation(**kwargs)
+        pages += 1
+        yield response
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return
+        kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+def _iter_items(pages, max_items):
+    if max_items is not None and max_items <= 0:
+        return
+    count = 0
+    for page in pages:
+        for item in page.get('Items', []):
+            yield item
+            count += 1
+            if max_items is not None and count >= max_items:
+                return
+
+def _key_signature(key):
+    return tuple(sorted(key.items()))
+
+_SEGMENT_DONE = object()
+
+def _parallel_scan(operation, total_segments, max_workers, segment_stats, kwargs):
+    pages = queue.Queue(maxsize=max_workers * 2)
+    stop = threading.Event()
+    stats = [
+        {'segment': segment, 'pages': 0, 'items': 0, 'scannedCount': 0, 'durationMs': None}
+        for segment in range(total_segments)
+    ]
+    if segment_stats is not None:
+        segment_stats.extend(stats)
+
+    def publish(entry):
+        while not stop.is_set():
+            try:
+                pages.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan_segment(segment):
+        if stop.is_set():
+            return
+        stat = stats[segment]
+        started = time.perf_counter()
+        try:
+            segment_kwargs = dict(kwargs, Segment=segment, TotalSegments=total_segments)
+            for page in _paginate(operation, None, segment_kwargs):
+                items = page.get('Items', [])
+                stat['pages'] += 1
+                stat['items'] += len(items)
+                stat['scannedCount'] += page.get('ScannedCount', 0)
+                if not publish(items):
+                    return
+        except Exception as e:
+            publish(e)
+        finally:
+            stat['durationMs'] = round((time.perf_counter() - started) * 1000, 2)
+            publish(_SEGMENT_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for segment in range(total_segments):
+            executor.submit(scan_segment, segment)
+
+        remaining = total_segments
+        while remaining:
+            entry = pages.get()
+            if entry is _SEGMENT_DONE:
+                remaining -= 1
+            elif isinstance(entry, Exception):
+                raise entry
+            else:
+                yield from entry
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def take(items, limit):
+    """
+    Collects at most `limit` items from an iterator, reading one extra item
+    to tell whether the source had more.
+
+    :param items: Iterable of items, e.g. from iter_query().
+    :param limit: Maximum number of items to collect.
+    :return: Tuple of (list of items, whether more items were available).
+    """
+    collected = list(islice(items, limit + 1))
+    close = getattr(items, 'close', None)
+    if close:
+        close()
+    return collected[:limit], len(collected) > limit
@@ -0,0 +1,86 @@
+import logging
+from boto3.dynamodb.conditions import Key
+from utils.dynamo_utils import DynamoDBTable
+from utils.ttl_cache import TTLCache
+from config.constants import USER_TABLE, USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger()
+
+# DoctorApp_users records keyed by "email:<email>"; "sub:<cognito sub>"
+# entries hold the email only, so refreshing the record under its email
+# refreshes it for every sub that maps to it
+user_cache = TTLCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+
+def get_claims(event):
+    """
+    Returns the Cognito authorizer claims of an API Gateway event, for both
+    REST (authorizer.claims) and HTTP APIs (authorizer.jwt.claims).
+    """
+    authorizer = (event.get('requestContext') or {}).get('authorizer') or {}
+    return authorizer.get('claims') or (authorizer.get('jwt') or {}).get('claims') or {}
+
+def prime_user(user):
+    """
+    Caches a user record under its email and, if known, maps its Cognito
+    sub to that email.
+    """
+    if not user.get('email'):
+        return
+    email = user['email'].lower()
+    user_cache.set(f"email:{email}", user)
+    if user.get('cognitoUserId'):
+        user_cache.set(f"sub:{user['cognitoUserId']}", email)
+
+def invalidate_user(email=None, sub=None):
+    if email:
+        user_cache.delete(f"email:{email.lower()}")
+    if sub:
+        user_cache.delete(f"sub:{sub}")
+
+def get_user_by_email(email):
+    """
+    Returns the user record for an email, querying the email-index GSI only
+    on a cache miss.
+
+    :param email: The user's email address.
+    :return: User record, or None if no user has this email.
+    """
+    email = email.lower()
+    user = user_cache.get(f"email:{email}")
+    if user is not None:
+        return user
+
+    table = DynamoDBTable(USER_TABLE)
+    response = table.query(
+        IndexName='email-index',
+        KeyConditionExpression=Key('email').eq(email)
+    )
+    items = response.get('Items', [])
+    if not items:
+        return None
+
+    prime_user(items[0])
+    return items[0]
+
+def resolve_user(event):
+    """
+    Maps the caller's authorizer claims (sub, email) to their
+    DoctorApp_users record through the in-container cache.
+
+    :param event: API Gateway event.
+    :return: User record, or None if the request carries no claims or the
+             user does not exist.
+    """
+    claims = get_claims(event)
+    sub = claims.get('sub')
+    email = claims.get('email')
+
+    if sub:
+        email = user_cache.get(f"sub:{sub}") or email
+    if not email:
+        return None
+
+    user = get_user_by_email(email)
+    if user is not None and sub:
+        user_cache.set(f"sub:{sub}", user['email'].lower())
+    return user
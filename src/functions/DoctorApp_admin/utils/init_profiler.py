@@ -0,0 +1,298 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from importlib.abc import MetaPathFinder
+
+logger = logging.getLogger()
+
+# Read straight from the environment: the profiler is imported before
+# config.constants so that it can time that import too
+INIT_PROFILE_ENABLED = os.environ.get("INIT_PROFILE", "false").lower() == "true"
+INIT_PROFILE_TOP_MODULES = int(os.environ.get("INIT_PROFILE_TOP_MODULES", "25"))
+
+class _TimedLoader:
+    def __init__(self, loader, fullname, profiler):
+        """
+        Wraps a module loader so that executing the module is timed.
+        Everything else is delegated to the original loader.
+        """
+        self._loader = loader
+        self._fullname = fullname
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter_import()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit_import(self._fullname)
+
+
+class _ImportTimer(MetaPathFinder):
+    def __init__(self, profiler):
+        self._profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        # Ask the finders behind this one, without recursing into ourselves
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, fullname, self._profiler)
+        return spec
+
+
+class InitProfiler:
+    def __init__(self, enabled):
+        """
+        Opt-in profiler for the Lambda init phase (INIT_PROFILE=true).
+
+        Once started it records the time spent executing every imported
+        module (self and cumulative, like `python -X importtime`), botocore
+        data file loading, boto3 resource/client creation (resource times
+        include the client they build) and lazily loaded handlers, plus
+        named marks such as the route table being built. The first
+        invocation of the container logs one structured JSON breakdown
+        and the profiler then removes its hooks.
+
+        :param enabled: Whether to profile at all; when False every method
+                        is a no-op.
+        """
+        self.enabled = enabled
+        self.started_at = None
+        self.marks = []
+        self.modules = {}
+        self.botocore_files = {}
+        self.boto3_calls = {}
+        self.reported = False
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._finder = None
+        self._patched = []
+
+    def start(self):
+        if not self.enabled or self.started_at is not None:
+            return
+        self.started_at = time.perf_counter()
+        self._finder = _ImportTimer(self)
+        sys.meta_path.insert(0, self._finder)
+        # boto3/botocore may already be loaded, e.g. by the Lambda runtime
+        for fullname in ('botocore.loaders', 'boto3.session'):
+            if fullname in sys.modules:
+                self._patch_module(fullname)
+
+    def mark(self, name):
+        """
+        Records a named point in the init timeline.
+        """
+        if self.enabled and self.started_at is not None and not self.reported:
+            self.marks.append((name, time.perf_counter()))
+
+    def profile_first_invocation(self, handler):
+        """
+        Decorator for lambda_handler: the first invocation emits the init
+        breakdown once it finishes. Without profiling the handler is
+        returned unchanged.
+        """
+        if not self.enabled:
+            return handler
+        self.mark('module_loaded')
+
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            if self.reported:
+                return handler(event, context)
+            self.mark('first_invocation_start')
+            try:
+                return handler(event, context)
+            finally:
+                self.mark('first_invocation_end')
+                self.report(context)
+        return wrapper
+
+    def report(self, context=None):
+        """
+        Logs the init breakdown as one JSON line and removes the hooks.
+
+        :param context: Lambda context, for the function's memory size.
+        :return: The breakdown dict, or None if already reported.
+        """
+        if not self.enabled or self.started_at is None or self.reported:
+            return None
+        self.reported = True
+        self.stop()
+        breakdown = self.breakdown(context)
+        logger.info(json.dumps(breakdown, default=str))
+        return breakdown
+
+    def stop(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        for owner, name, original in self._patched:
+            setattr(owner, name, original)
+        self._patched = []
+
+    def breakdown(self, context=None):
+        phases = []
+        previous = self.started_at
+        for name, at in self.marks:
+            phases.append({
+                'phase': name,
+                'ms': round((at - previous) * 1000, 2),
+                'sinceStartMs': round((at - self.started_at) * 1000, 2),
+            })
+            previous = at
+
+        with self._lock:
+            modules = dict(self.modules)
+            botocore_files = dict(self.botocore_files)
+            boto3_calls = dict(self.boto3_calls)
+
+        packages = {}
+        for name, stats in modules.items():
+            package = packages.setdefault(name.split('.')[0], {'modules': 0, 'selfMs': 0.0})
+            package['modules'] += 1
+            package['selfMs'] += stats['selfMs']
+        for package in packages.values():
+            package['selfMs'] = round(package['selfMs'], 2)
+
+        top_modules = sorted(modules.items(), key=lambda entry: entry[1]['selfMs'], reverse=True)
+        # Lazily loaded route handlers, where the function has a route table
+        handler_loader = sys.modules.get('utils.handler_loader')
+        return {
+            'type': 'initProfile',
+            'functionName': os.environ.get('AWS_LAMBDA_FUNCTION_NAME'),
+            'initializationType': os.environ.get('AWS_LAMBDA_INITIALIZATION_TYPE'),
+            'memoryLimitMb': getattr(context, 'memory_limit_in_mb', None),
+            'maxRssMb': _max_rss_mb(),
+            'pythonVersion': sys.version.split()[0],
+            'processAgeAtStartMs': self._process_age_ms(),
+            'phases': phases,
+            'imports': {
+                'count': len(modules),
+                'totalMs': round(sum(stats['selfMs'] for stats in modules.values()), 2),
+                'byPackage': dict(sorted(packages.items(), key=lambda entry: entry[1]['selfMs'], reverse=True)),
+                'topModules': [
+                    {'module': name, **stats} for name, stats in top_modules[:INIT_PROFILE_TOP_MODULES]
+                ],
+            },
+            'botocoreLoader': {
+                'files': len(botocore_files),
+                'totalMs': round(sum(stats['ms'] for stats in botocore_files.values()), 2),
+                'byFile': dict(sorted(botocore_files.items(), key=lambda entry: entry[1]['ms'], reverse=True)),
+            },
+            'boto3': boto3_calls,
+            'handlerLoadMs': handler_loader.load_stats() if handler_loader else {},
+        }
+
+    # Import timing
+
+    def _enter_import(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append([time.perf_counter(), 0.0])
+
+    def _exit_import(self, fullname):
+        stack = self._local.stack
+        started, children = stack.pop()
+        cumulative = time.perf_counter() - started
+        if stack:
+            stack[-1][1] += cumulative
+        with self._lock:
+            self.modules[fullname] = {
+                'selfMs': round((cumulative - children) * 1000, 3),
+                'cumulativeMs': round(cumulative * 1000, 3),
+            }
+        if fullname in ('botocore.loaders', 'boto3.session') and fullname in sys.modules:
+            self._patch_module(fullname)
+
+    # boto3/botocore hooks
+
+    def _patch_module(self, fullname):
+        module = sys.modules[fullname]
+        if fullname == 'botocore.loaders':
+            self._wrap(module.JSONFileLoader, 'load_file', self._record_file)
+        else:
+            for name in ('resource', 'client'):
+                self._wrap(module.Session, name, self._record_boto3_call)
+
+    def _wrap(self, owner, name, record):
+        original = getattr(owner, name)
+        if getattr(original, '_init_profiler', False):
+            return
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                record(name, args, kwargs, (time.perf_counter() - started) * 1000)
+        timed._init_profiler = True
+        setattr(owner, name, timed)
+        self._patched.append((owner, name, original))
+
+    def _record_file(self, name, args, kwargs, ms):
+        file_path = kwargs.get('file_path') or (args[1] if len(args) > 1 else '?')
+        # Keep the path below botocore/data, e.g. "dynamodb/2012-08-10/service-2"
+        key = file_path.split(os.sep + 'data' + os.sep)[-1]
+        with self._lock:
+            stats = self.botocore_files.setdefault(key, {'calls': 0, 'ms': 0.0})
+            stats['calls'] += 1
+            stats['ms'] = round(stats['ms'] + ms, 3)
+
+    def _record_boto3_call(self, name, args, kwargs, ms):
+        service = kwargs.get('service_name') or (args[1] if len(args) > 1 else '?')
+        with self._lock:
+            stats = self.boto3_calls.setdefault(f"{name}:{service}", {'calls': 0, 'ms': 0.0})
+            stats['calls'] += 1
+            stats['ms'] = round(stats['ms'] + ms, 3)
+
+    def _process_age_ms(self):
+        # Linux only: time between process start and the profiler starting,
+        # which is the runtime's own bootstrap
+        try:
+            with open('/proc/self/stat') as stat_file:
+                start_ticks = int(stat_file.read().rsplit(')', 1)[1].split()[19])
+            with open('/proc/uptime') as uptime_file:
+                uptime = float(uptime_file.read().split()[0])
+            age = uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+            return round((age - (time.perf_counter() - self.started_at)) * 1000, 1)
+        except (OSError, ValueError, IndexError):
+            return None
+
+
+def _max_rss_mb():
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        return None
+
+
+# Shared for the life of the container; starts timing as soon as it is imported
+init_profiler = InitProfiler(INIT_PROFILE_ENABLED)
+init_profiler.start()
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from utils.change_stream import to_attribute_values
+from config.constants import CHANGE_STREAM_BATCH_SIZE, CHANGE_STREAM_MAX_ATTEMPTS
+
+logger = logging.getLogger()
+
+# Local sequence numbers are zero-padded so they also sort as strings
+SEQUENCE_DIGITS = 21
+
+class LocalChangeStream:
+    def __init__(self, path=None):
+        """
+        Local stand-in for DynamoDB Streams, fed by the in-memory backend
+        (InMemoryDynamoDB.enable_stream). Records have the exact shape of
+        a DynamoDB Streams Lambda event record with NEW_AND_OLD_IMAGES, so
+        the same processor consumes both.
+
+        :param path: Optional JSON lines file the records are appended to,
+                     so a stream outlives the process; records are kept in
+                     memory otherwise. An existing file is continued.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = []
+        self._sequence = 0
+        if path and os.path.exists(path):
+            with open(path) as stream_file:
+                self._records = [json.loads(line) for line in stream_file if line.strip()]
+            if self._records:
+                self._sequence = int(self._records[-1]['dynamodb']['SequenceNumber'])
+
+    def publish(self, table_name, keys, old, new):
+        """
+        Appends the change of one item.
+
+        :param table_name: Table the item belongs to.
+        :param keys: The item's primary key.
+        :param old: Item before the change, or None for an insert.
+        :param new: Item after the change, or None for a removal.
+        :return: The stream record.
+        """
+        change = {'Keys': to_attribute_values(keys), 'StreamViewType': 'NEW_AND_OLD_IMAGES'}
+        if new is not None:
+            change['NewImage'] = to_attribute_values(new)
+        if old is not None:
+            change['OldImage'] = to_attribute_values(old)
+        with self._lock:
+            self._sequence += 1
+            change['SequenceNumber'] = str(self._sequence).zfill(SEQUENCE_DIGITS)
+            record = {
+                'eventID': uuid.uuid4().hex,
+                'eventName': 'INSERT' if old is None else ('REMOVE' if new is None else 'MODIFY'),
+                'eventSource': 'aws:dynamodb',
+                'eventSourceARN': f"arn:aws:dynamodb:local:000000000000:table/{table_name}/stream/local",
+                'dynamodb': change,
+            }
+            self._records.append(record)
+            if self.path:
+                with open(self.path, 'a') as stream_file:
+                    stream_file.write(json.dumps(record) + '\n')
+        return record
+
+    def read(self, after=None, limit=None):
+        """
+        Reads records in order.
+
+        :param after: Sequence number to read after, or None for the start.
+        :param limit: Maximum number of records.
+        :return: List of stream records.
+        """
+        position = int(after) if after else 0
+        with self._lock:
+            # Sequence numbers are 1..n without gaps, so they index the list
+            return list(self._records[position:position + limit if limit else None])
+
+    @property
+    def last_sequence(self):
+        """
+        Sequence number of the newest record, 0 while the stream is empty.
+        """
+        return self._sequence
+
+    def __len__(self):
+        return len(self._records)
+
+class MemoryCheckpointStore:
+    """
+    Keeps each consumer's last processed sequence number in memory.
+    """
+    def __init__(self):
+        self._checkpoints = {}
+
+    def get(self, consumer):
+        return self._checkpoints.get(consumer)
+
+    def put(self, consumer, sequence_number):
+        self._checkpoints[consumer] = sequence_number
+
+class FileCheckpointStore:
+    def __init__(self, path):
+        """
+        Keeps each consumer's last processed sequence number in a JSON
+        file, replaced atomically on every checkpoint.
+
+        :param path: The checkpoint file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as checkpoint_file:
+            return json.load(checkpoint_file)
+
+    def get(self, consumer):
+        with self._lock:
+            return self._load().get(consumer)
+
+    def put(self, consumer, sequence_number):
+        with self._lock:
+            checkpoints = self._load()
+            checkpoints[consumer] = sequence_number
+            temporary_path = f"{self.path}.tmp"
+            with open(temporary_path, 'w') as checkpoint_file:
+                json.dump(checkpoints, checkpoint_file)
+            os.replace(temporary_path, self.path)
+
+class LocalStreamPoller:
+    def __init__(self, stream, handler, checkpoints=None, consumer='changes', batch_size=None, max_attempts=None):
+        """
+        Feeds a LocalChangeStream to a stream handler the way a Lambda
+        event source mapping with ReportBatchItemFailures does: batches of
+        records after the consumer's checkpoint go to the handler, and the
+        checkpoint moves to the end of the batch, or to just before the
+        record the handler reports as failed, which is retried on the next
+        poll. A record that keeps failing is set aside in `dead_letters`
+        after `max_attempts`, like an on-failure destination, so it cannot
+        block the stream.
+
+        :param stream: The LocalChangeStream to read.
+        :param handler: Callable (event, context) returning
+                        {"batchItemFailures": [...]}.
+        :param checkpoints: MemoryCheckpointStore or FileCheckpointStore.
+        :param consumer: Name the checkpoint is stored under.
+        :param batch_size: Records per batch; defaults to CHANGE_STREAM_BATCH_SIZE.
+        :param max_attempts: Attempts per record; defaults to CHANGE_STREAM_MAX_ATTEMPTS.
+        """
+        self.stream = stream
+        self.handler = handler
+        self.checkpoints = checkpoints or MemoryCheckpointStore()
+        self.consumer = consumer
+        self.batch_size = batch_size or CHANGE_STREAM_BATCH_SIZE
+        self.max_attempts = max_attempts or CHANGE_STREAM_MAX_ATTEMPTS
+        self.dead_letters = []
+        self._attempts = {}
+
+    def poll(self):
+        """
+        Processes one batch.
+
+        :return: Number of records the checkpoint moved past.
+        """
+        checkpoint = self.checkpoints.get(self.consumer)
+        records = self.stream.read(after=checkpoint, limit=self.batch_size)
+        if not records:
+            return 0
+
+        response = self.handler({'Records': records}, None) or {}
+        failures = response.get('batchItemFailures') or []
+        if not failures:
+            self.checkpoints.put(self.consumer, records[-1]['dynamodb']['SequenceNumber'])
+            return len(records)
+
+        failed_sequence = failures[0]['itemIdentifier']
+        position = next(
+            (index for index, record in enumerate(records) if record['dynamodb']['SequenceNumber'] == failed_sequence),
+            0
+        )
+        attempts = self._attempts.get(failed_sequence, 0) + 1
+        if attempts >= self.max_attempts:
+            # Give up on the record and move past it
+            logger.error(f"Stream record {failed_sequence} failed {attempts} times, setting it aside")
+            self.dead_letters.append(records[position])
+            self._attempts.pop(failed_sequence, None)
+            position += 1
+        else:
+            self._attempts[failed_sequence] = attempts
+        if position:
+            self.checkpoints.put(self.consumer, records[position - 1]['dynamodb']['SequenceNumber'])
+        return position
+
+    def drain(self, max_polls=None):
+        """
+        Polls until the consumer has caught up with the stream.
+
+        :param max_polls: Optional limit on the number of polls.
+        :return: Dict with polls, records (checkpointed) and deadLetters.
+        """
+        polls = records = 0
+        while max_polls is None or polls < max_polls:
+            if int(self.checkpoints.get(self.consumer) or 0) >= self.stream.last_sequence:
+                break
+            records += self.poll()
+            polls += 1
+        return {'polls': polls, 'records': records, 'deadLetters': len(self.dead_letters)}
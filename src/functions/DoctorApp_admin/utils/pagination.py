@@ -0,0 +1,84 @@
+import json
+import re
+import secrets
+import time
+from utils.dynamo_utils import DynamoDBTable
+from config.constants import CURSOR_TABLE, CURSOR_TTL_SECONDS
+
+# Cursor ids are 128 random bits, URL-safe base64 without padding
+CURSOR_ID_BYTES = 16
+CURSOR_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{22}$')
+
+def scope_key(scope):
+    return json.dumps(scope, sort_keys=True, separators=(',', ':'))
+
+def encode_cursor(last_evaluated_key, scope):
+    """
+    Stores a DynamoDB LastEvaluatedKey server-side and returns a random
+    cursor id for it. The key itself never reaches the client, since index
+    keys such as a patient's name must not show up in URLs, browser history
+    and access logs. The entry records `scope`, so a cursor replayed
+    against another doctor, index or sort order is rejected by
+    decode_cursor(), and expires after CURSOR_TTL_SECONDS (a DynamoDB TTL
+    on expiresAt removes it).
+
+    :param last_evaluated_key: LastEvaluatedKey from a query response.
+    :param scope: Dict identifying the listing, e.g. doctor and sort index.
+    :return: Cursor string, or None when there is no next page.
+    """
+    if not last_evaluated_key:
+        return None
+    cursor = secrets.token_urlsafe(CURSOR_ID_BYTES)
+    DynamoDBTable(CURSOR_TABLE).put_item({
+        'cursorId': cursor,
+        'scope': scope_key(scope),
+        'startKey': last_evaluated_key,
+        'expiresAt': int(time.time()) + CURSOR_TTL_SECONDS,
+    })
+    return cursor
+
+def decode_cursor(cursor, scope):
+    """
+    Looks up a cursor from encode_cursor().
+
+    :param cursor: Cursor string from the client.
+    :param scope: The same scope the cursor was issued for.
+    :return: The ExclusiveStartKey to resume the query from.
+    :raises ValueError: If the cursor is malformed, unknown, expired or
+                        belongs to a different listing.
+    """
+    if not isinstance(cursor, str) or not CURSOR_ID_PATTERN.match(cursor):
+        raise ValueError("Invalid cursor")
+    entry = DynamoDBTable(CURSOR_TABLE).get_item({'cursorId': cursor}).get('Item')
+    # TTL deletion lags expiry, so expiresAt is checked here too
+    if not entry or entry.get('scope') != scope_key(scope) or entry.get('expiresAt', 0) < time.time():
+        raise ValueError("Invalid cursor")
+    return entry['startKey']
+
+def parse_page(event, scope, default_limit, max_limit):
+    """
+    Reads the `limit` and `cursor` query parameters.
+
+    :param event: API Gateway event.
+    :param scope: Scope the cursor must have been issued for.
+    :param default_limit: Page size when `limit` is absent; 0 for no Limit.
+    :param max_limit: Largest accepted `limit`.
+    :return: Tuple of (limit or None, ExclusiveStartKey or None).
+    :raises ValueError: If limit is not a number in range or the cursor is
+                        invalid.
+    """
+    query_string_parameters = event.get('queryStringParameters', {}) or {}
+    raw_limit = query_string_parameters.get('limit')
+    if raw_limit is None:
+        limit = default_limit or None
+    else:
+        try:
+            limit = int(raw_limit)
+        except ValueError:
+            raise ValueError("limit must be a number")
+        if not 1 <= limit <= max_limit:
+            raise ValueError(f"limit must be between 1 and {max_limit}")
+
+    cursor = query_string_parameters.get('cursor')
+    start_key = decode_cursor(cursor, scope) if cursor else None
+    return limit, start_key
@@ -0,0 +1,79 @@
+import re
+
+# Attribute names (and dotted map paths) accepted in ?fields=
+FIELD_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_-]*(\.[A-Za-z_][A-Za-z0-9_-]*)*$')
+MAX_FIELDS = 50
+
+# ?fields=all returns whole items, bypassing a route's default projection
+ALL_FIELDS = 'all'
+
+def parse_fields(event, default=None, required=()):
+    """
+    Reads the comma-separated `fields` query parameter.
+
+    :param event: API Gateway event.
+    :param default: Fields to use when the parameter is absent, or None to
+                    return whole items.
+    :param required: Fields always included, e.g. the item's key.
+    :return: List of field paths, or None when whole items are wanted.
+    :raises ValueError: If a field name is invalid or too many are given.
+    """
+    query_string_parameters = event.get('queryStringParameters', {}) or {}
+    raw_fields = query_string_parameters.get('fields')
+
+    if raw_fields is None:
+        fields = list(default) if default is not None else None
+    elif raw_fields.strip().lower() == ALL_FIELDS:
+        fields = None
+    else:
+        fields = [field.strip() for field in raw_fields.split(',') if field.strip()]
+        if not fields:
+            raise ValueError("fields must list at least one attribute")
+        if len(fields) > MAX_FIELDS:
+            raise ValueError(f"At most {MAX_FIELDS} fields may be requested")
+        invalid = [field for field in fields if not FIELD_PATTERN.match(field)]
+        if invalid:
+            raise ValueError(f"Invalid field names: {', '.join(invalid)}")
+
+    if fields is None:
+        return None
+    for field in required:
+        if field not in fields:
+            fields.insert(0, field)
+    # Keep the first occurrence of each field
+    return list(dict.fromkeys(fields))
+
+def apply_projection(params, fields):
+    """
+    Adds a ProjectionExpression for `fields` to DynamoDB request
+    parameters. Every path segment is aliased through
+    ExpressionAttributeNames, so reserved words such as `name` or `status`
+    are safe.
+
+    :param params: Query/GetItem parameters, updated in place.
+    :param fields: Field paths from parse_fields(); None leaves params as is.
+    :return: The same params dict.
+    """
+    if not fields:
+        return params
+
+    names = dict(params.get('ExpressionAttributeNames', {}))
+    aliases = {value: key for key, value in names.items()}
+    paths = []
+    for field in fields:
+        segments = []
+        for segment in field.split('.'):
+            alias = aliases.get(segment)
+            if alias is None:
+                index = len(names)
+                while f"#p{index}" in names:
+                    index += 1
+                alias = f"#p{index}"
+                aliases[segment] = alias
+                names[alias] = segment
+            segments.append(alias)
+        paths.append('.'.join(segments))
+
+    params['ProjectionExpression'] = ', '.join(paths)
+    params['ExpressionAttributeNames'] = names
+    return params
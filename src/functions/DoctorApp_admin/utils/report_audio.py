@@ -0,0 +1,111 @@
+import base64
+import binascii
+import uuid
+from utils.blob_store import get_blob_store
+from config.constants import (
+    AUDIO_KEY_PREFIX,
+    AUDIO_CONTENT_TYPES,
+    AUDIO_MAX_BYTES,
+    AUDIO_INLINE_MIN_CHARS,
+    BLOB_DOWNLOAD_URL_EXPIRES_SECONDS,
+)
+
+# Used for inline audio without a data: URI content type
+DEFAULT_AUDIO_CONTENT_TYPE = 'audio/mp4'
+
+# audioFile values with these prefixes are references to stored audio,
+# however long (presigned URLs with a security token exceed 1 KiB)
+AUDIO_REFERENCE_PREFIXES = ('http://', 'https://', 's3://')
+
+# Key extensions; mimetypes is not used as its table depends on the host
+AUDIO_EXTENSIONS = {
+    'audio/mp4': '.m4a',
+    'audio/m4a': '.m4a',
+    'audio/x-m4a': '.m4a',
+    'audio/aac': '.aac',
+    'audio/mpeg': '.mp3',
+    'audio/wav': '.wav',
+    'audio/x-wav': '.wav',
+    'audio/webm': '.webm',
+    'audio/ogg': '.ogg',
+}
+
+def doctor_prefix(doctor_id):
+    return f"{AUDIO_KEY_PREFIX}/{doctor_id}/"
+
+def new_audio_key(doctor_id, content_type):
+    """
+    A fresh blob key for a doctor's recording, e.g.
+    "audio/<doctorId>/<uuid>.m4a".
+    """
+    extension = AUDIO_EXTENSIONS.get(content_type, '')
+    return f"{doctor_prefix(doctor_id)}{uuid.uuid4()}{extension}"
+
+def check_content_type(content_type):
+    """
+    :raises ValueError: If the content type is not an accepted audio type.
+    """
+    if content_type not in AUDIO_CONTENT_TYPES:
+        raise ValueError(f"contentType must be one of: {', '.join(AUDIO_CONTENT_TYPES)}")
+
+def check_audio_key(doctor_id, audio_key):
+    """
+    Checks that an uploaded recording belongs to the doctor and is in the
+    blob store within the size limit.
+
+    :raises ValueError: If the key is foreign, missing or too large.
+    """
+    if not isinstance(audio_key, str) or not audio_key.startswith(doctor_prefix(doctor_id)) or '..' in audio_key:
+        raise ValueError("audioKey does not belong to this doctor")
+    blob = get_blob_store().head(audio_key)
+    if blob is None:
+        raise ValueError("audioKey has not been uploaded")
+    if blob['size'] > AUDIO_MAX_BYTES:
+        raise ValueError(f"Audio is larger than {AUDIO_MAX_BYTES} bytes")
+    if blob.get('contentType') and blob['contentType'] not in AUDIO_CONTENT_TYPES:
+        raise ValueError(f"Audio content type {blob['contentType']} is not accepted")
+
+def is_inline_audio(audio_file):
+    """
+    Whether an audioFile value is the recording itself (a data: URI or a
+    long base64 string) rather than a reference such as an S3 URI or URL.
+    """
+    if not isinstance(audio_file, str) or audio_file.lower().startswith(AUDIO_REFERENCE_PREFIXES):
+        return False
+    return audio_file.startswith('data:') or len(audio_file) >= AUDIO_INLINE_MIN_CHARS
+
+def store_inline_audio(doctor_id, audio_file):
+    """
+    Moves inline audio, as older clients send it in audioFile, to the blob
+    store.
+
+    :return: The new audioKey.
+    :raises ValueError: If the data is not valid base64 audio.
+    """
+    content_type = DEFAULT_AUDIO_CONTENT_TYPE
+    data = audio_file
+    if audio_file.startswith('data:'):
+        header, _, data = audio_file.partition(',')
+        if not header.endswith(';base64'):
+            raise ValueError("audioFile data URIs must be base64 encoded")
+        content_type = header[len('data:'):-len(';base64')] or DEFAULT_AUDIO_CONTENT_TYPE
+    check_content_type(content_type)
+    try:
+        audio = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("audioFile is neither a reference nor base64 audio")
+    if len(audio) > AUDIO_MAX_BYTES:
+        raise ValueError(f"Audio is larger than {AUDIO_MAX_BYTES} bytes")
+
+    audio_key = new_audio_key(doctor_id, content_type)
+    get_blob_store().put(audio_key, audio, content_type)
+    return audio_key
+
+def audio_download_url(report):
+    """
+    A short-lived download URL for the report's recording, or None when the
+    report has no audioKey.
+    """
+    if not report.get('audioKey'):
+        return None
+    return get_blob_store().download_url(report['audioKey'], BLOB_DOWNLOAD_URL_EXPIRES_SECONDS)
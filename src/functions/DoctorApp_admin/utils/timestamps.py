@@ -0,0 +1,75 @@
+import decimal
+import time
+from datetime import datetime, timezone
+
+# Epoch-millisecond companions of the ISO string attributes; the string is
+# kept, rewritten in the canonical form below, for existing readers and GSIs
+MS_SUFFIX = 'Ms'
+CANONICAL_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# Numbers below this are taken as epoch seconds rather than milliseconds
+# (1e11 ms is March 1973; 1e11 s is far in the future)
+SECONDS_THRESHOLD = 10 ** 11
+
+def now_ms():
+    """
+    The current time as epoch milliseconds.
+    """
+    return time.time_ns() // 1_000_000
+
+def to_epoch_ms(value):
+    """
+    Converts a timestamp to epoch milliseconds (UTC). Accepts numbers
+    (epoch seconds or milliseconds, including Decimal from DynamoDB) and
+    ISO 8601 strings with or without a "Z"/offset; naive strings, such as
+    those written by datetime.utcnow().isoformat(), are taken as UTC.
+
+    :param value: Timestamp to convert.
+    :return: Epoch milliseconds as an int.
+    :raises ValueError: If the value is not a recognizable timestamp.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if isinstance(value, (int, float, decimal.Decimal)):
+        number = decimal.Decimal(value)
+        if not number.is_finite() or number < 0:
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        return int(number * 1000) if number < SECONDS_THRESHOLD else int(number)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"Invalid timestamp: {value!r}")
+
+    text = value.strip()
+    if text.endswith(('Z', 'z')):
+        text = text[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return round(parsed.timestamp() * 1000)
+
+def to_iso(epoch_ms):
+    """
+    Formats epoch milliseconds as the canonical UTC string
+    "YYYY-MM-DDTHH:MM:SS.mmmZ", whose string order is time order.
+    """
+    epoch_ms = int(epoch_ms)
+    moment = datetime.fromtimestamp(epoch_ms // 1000, timezone.utc)
+    return f"{moment.strftime(CANONICAL_FORMAT)}.{epoch_ms % 1000:03d}Z"
+
+def stamp(item, attribute, value):
+    """
+    Sets `attribute` to the canonical string and `attribute + "Ms"` to the
+    epoch milliseconds of `value`.
+
+    :param item: Item dict, updated in place.
+    :param attribute: Attribute name, e.g. "reportDate".
+    :param value: Timestamp accepted by to_epoch_ms().
+    :return: The epoch milliseconds.
+    :raises ValueError: If the value is not a recognizable timestamp.
+    """
+    epoch_ms = to_epoch_ms(value)
+    item[attribute] = to_iso(epoch_ms)
+    item[attribute + MS_SUFFIX] = epoch_ms
+    return epoch_ms
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    def __init__(self, max_entries, ttl_seconds):
+        """
+        Thread-safe in-process cache with per-entry expiry and LRU eviction.
+        It lives at module level, so entries survive across warm invocations
+        of the same Lambda container.
+
+        :param max_entries: Maximum number of entries before the least
+                            recently used one is evicted.
+        :param ttl_seconds: Default time to live of an entry.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value, or `default` if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl_seconds=None):
+        """
+        Stores a value, evicting the least recently used entry if full.
+        """
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current size.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
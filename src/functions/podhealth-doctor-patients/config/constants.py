@@ -1,2 +1,106 @@
+import os
+
 USER_TABLE= "DoctorApp_users"
-PATIENT_TABLE_ENV_VAR = "DYNAMODB_PATIENT_TABLE"
\ No newline at end of file
+PATIENT_TABLE_ENV_VAR = "DYNAMODB_PATIENT_TABLE"
+PATIENT_TABLE = os.environ.get(PATIENT_TABLE_ENV_VAR, "doctorApp_patients")
+PATIENT_RECORD_TABLE = "DoctorAppPatients"
+
+# DynamoDB connection tuning (override through the Lambda environment)
+DYNAMODB_MAX_POOL_CONNECTIONS = int(os.environ.get("DYNAMODB_MAX_POOL_CONNECTIONS", "50"))
+DYNAMODB_CONNECT_TIMEOUT = float(os.environ.get("DYNAMODB_CONNECT_TIMEOUT", "2"))
+DYNAMODB_READ_TIMEOUT = float(os.environ.get("DYNAMODB_READ_TIMEOUT", "5"))
+DYNAMODB_TCP_KEEPALIVE = os.environ.get("DYNAMODB_TCP_KEEPALIVE", "true").lower() == "true"
+# botocore-level attempts; retries, connection errors and timeouts
+# included, are handled by utils/dynamo_retry.py so they are not
+# multiplied by a second retry loop
+DYNAMODB_MAX_ATTEMPTS = int(os.environ.get("DYNAMODB_MAX_ATTEMPTS", "1"))
+
+# Adaptive retry and client-side rate limiting for DynamoDB calls
+DYNAMODB_RETRY_MAX_ATTEMPTS = int(os.environ.get("DYNAMODB_RETRY_MAX_ATTEMPTS", "8"))
+DYNAMODB_RETRY_BASE_DELAY = float(os.environ.get("DYNAMODB_RETRY_BASE_DELAY", "0.05"))
+DYNAMODB_RETRY_MAX_DELAY = float(os.environ.get("DYNAMODB_RETRY_MAX_DELAY", "2"))
+DYNAMODB_RATE_LIMIT_MAX = float(os.environ.get("DYNAMODB_RATE_LIMIT_MAX", "1000"))
+DYNAMODB_RATE_LIMIT_MIN = float(os.environ.get("DYNAMODB_RATE_LIMIT_MIN", "5"))
+DYNAMODB_RATE_DECREASE_FACTOR = float(os.environ.get("DYNAMODB_RATE_DECREASE_FACTOR", "0.5"))
+DYNAMODB_RATE_INCREASE_STEP = float(os.environ.get("DYNAMODB_RATE_INCREASE_STEP", "5"))
+
+# Upper bound on items a single list response will collect across pages
+QUERY_ITEM_BUDGET = int(os.environ.get("QUERY_ITEM_BUDGET", "5000"))
+
+# Parallel scan fan-out for full-table reads
+SCAN_TOTAL_SEGMENTS = int(os.environ.get("SCAN_TOTAL_SEGMENTS", "4"))
+SCAN_MAX_WORKERS = int(os.environ.get("SCAN_MAX_WORKERS", "8"))
+
+# Batch read/write tuning
+BATCH_GET_MAX_WORKERS = int(os.environ.get("BATCH_GET_MAX_WORKERS", "4"))
+BATCH_WRITE_MAX_WORKERS = int(os.environ.get("BATCH_WRITE_MAX_WORKERS", "8"))
+BATCH_MAX_RETRIES = int(os.environ.get("BATCH_MAX_RETRIES", "5"))
+
+# Primary key attributes per table
+TABLE_PRIMARY_KEYS = {
+    USER_TABLE: ['email'],
+    PATIENT_TABLE: ['patientId'],
+}
+
+# Optional read-through cache under DynamoDBTable.get_item/query. Off unless
+# tables are listed: the default backend is per container, so keep the TTL short
+DYNAMODB_CACHE_TABLES = [name for name in os.environ.get("DYNAMODB_CACHE_TABLES", "").split(",") if name]
+DYNAMODB_CACHE_TTL_SECONDS = int(os.environ.get("DYNAMODB_CACHE_TTL_SECONDS", "30"))
+DYNAMODB_CACHE_MAX_ENTRIES = int(os.environ.get("DYNAMODB_CACHE_MAX_ENTRIES", "2000"))
+
+# Key schema of every table and of the GSIs the handlers query, as
+# (partition key, sort key); used by the in-memory DynamoDB backend
+TABLE_KEY_SCHEMAS = {
+    USER_TABLE: {
+        'key': ('email', None),
+    },
+    PATIENT_TABLE: {
+        'key': ('patientId', None),
+    },
+    PATIENT_RECORD_TABLE: {
+        'key': ('doctorId', 'patientId'),
+    },
+}
+
+# DynamoDB backend: "aws", or "memory" for the in-memory stand-in used by
+# benchmarks and load tests, with simulated per-request latency
+DYNAMODB_BACKEND = os.environ.get("DYNAMODB_BACKEND", "aws")
+DYNAMODB_MEMORY_LATENCY_MS = float(os.environ.get("DYNAMODB_MEMORY_LATENCY_MS", "0"))
+DYNAMODB_MEMORY_LATENCY_JITTER_MS = float(os.environ.get("DYNAMODB_MEMORY_LATENCY_JITTER_MS", "0"))
+DYNAMODB_MEMORY_LATENCY_PER_KB_MS = float(os.environ.get("DYNAMODB_MEMORY_LATENCY_PER_KB_MS", "0"))
+DYNAMODB_MEMORY_THROTTLE_RATE = float(os.environ.get("DYNAMODB_MEMORY_THROTTLE_RATE", "0"))
+
+# Request logging (utils/request_log.py): level of the "request" logger, the
+# share of requests whose event is logged (overridable per "METHOD /resource",
+# e.g. "POST /patients/addpatient=0,GET /patients=0.1"), size caps, and
+# fields redacted at any depth of the event
+REQUEST_LOG_LEVEL = os.environ.get("REQUEST_LOG_LEVEL", "INFO").upper()
+REQUEST_LOG_SAMPLE_RATE = float(os.environ.get("REQUEST_LOG_SAMPLE_RATE", "1"))
+REQUEST_LOG_ROUTE_SAMPLE_RATES = {
+    route.strip(): float(rate)
+    for route, _, rate in (entry.rpartition("=") for entry in os.environ.get("REQUEST_LOG_ROUTE_SAMPLE_RATES", "").split(",") if entry)
+}
+REQUEST_LOG_MAX_CHARS = int(os.environ.get("REQUEST_LOG_MAX_CHARS", "8192"))
+REQUEST_LOG_MAX_FIELD_CHARS = int(os.environ.get("REQUEST_LOG_MAX_FIELD_CHARS", "256"))
+REQUEST_LOG_REDACT_FIELDS = os.environ.get(
+    "REQUEST_LOG_REDACT_FIELDS",
+    "body,Authorization,Cookie,email,name,phone,phone_number,phoneNumber,dob,dateOfBirth,address,gender"
+).split(",")
+
+# Response JSON encoding (utils/response.py): "auto" uses orjson when it is
+# packaged with the function, "json" forces the stdlib encoder
+RESPONSE_JSON_BACKEND = os.environ.get("RESPONSE_JSON_BACKEND", "auto")
+RESPONSE_DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+}
+
+# Response compression, negotiated from Accept-Encoding (br needs the
+# brotli package); bodies under the threshold are sent as is. Compressed
+# bodies are returned base64 encoded with isBase64Encoded set, which a REST
+# API proxy integration only decodes when the API's binaryMediaTypes
+# include the response types (e.g. "*/*"); clients get base64 text labelled
+# as gzip otherwise. Configure that before enabling it.
+RESPONSE_COMPRESSION_ENABLED = os.environ.get("RESPONSE_COMPRESSION_ENABLED", "false").lower() == "true"
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.environ.get("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_BROTLI_QUALITY = int(os.environ.get("RESPONSE_BROTLI_QUALITY", "5"))
@@ -1,11 +1,10 @@
 import json
-import boto3
 import uuid
 from botocore.exceptions import ClientError
 import logging
-
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('doctorApp_patients')
+from utils.dynamo_utils import DynamoDBTable
+from utils.response import generate_response
+from config.constants import PATIENT_TABLE
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -16,10 +15,7 @@ def addNewPatient(event):
         
         required_fields = ['doctorId', 'name', 'address', 'dateOfBirth', 'email', 'gender']
         if not all(field in body for field in required_fields):
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Bad Request: Missing required fields"})
-            }
+            return generate_response(400, {"message": "Bad Request: Missing required fields"})
 
         patientId = body.get('patientId', str(uuid.uuid4()))
 
@@ -33,24 +29,16 @@ def addNewPatient(event):
             'gender': body['gender'],
         }
 
-        table.put_item(Item=patient_item)
+        table = DynamoDBTable(PATIENT_TABLE)
+        table.put_item(patient_item)
 
-        return {
-            "statusCode": 201,
-            "body": json.dumps({
-                "message": "Patient created successfully",
-                "patient": patient_item
-            })
-        }
+        return generate_response(201, {
+            "message": "Patient created successfully",
+            "patient": patient_item
+        })
     except ClientError as e:
         logger.error(f"Error inserting patient into DynamoDB: {e}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"message": "Internal Server Error", "error": str(e)})
-        }
+        return generate_response(500, {"message": "Internal Server Error", "error": str(e)})
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"message": "Internal Server Error", "error": str(e)})
-        }
+        return generate_response(500, {"message": "Internal Server Error", "error": str(e)})
@@ -1,6 +1,7 @@
 import json
 import uuid
 from utils.dynamo_utils import DynamoDBTable
+from utils.response import generate_response
 from config.constants import USER_TABLE
 import logging
 
@@ -14,10 +15,7 @@ def addUser(event, context):
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         if not body:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Invalid request body."}),
-            }
+            return generate_response(400, {"message": "Invalid request body."})
 
 
         # Assign a unique userId if not provided
@@ -29,18 +27,8 @@ def addUser(event, context):
         table.put_item(body)
 
         logger.info(f"User added successfully: {body['userId']}")
-        return {
-            "statusCode": 200,
-             headers: {
-      "Access-Control-Allow-Origin": "*", 
-      "Access-Control-Allow-Credentials": true, 
-    },
-            "body": json.dumps(body),
-        }
+        return generate_response(200, body, headers={"Access-Control-Allow-Credentials": True})
 
     except Exception as e:
         logger.error(f"Error in addUser: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"message": f"Error processing request: {str(e)}"}),
-        }
\ No newline at end of file
+        return generate_response(500, {"message": f"Error processing request: {str(e)}"})
\ No newline at end of file
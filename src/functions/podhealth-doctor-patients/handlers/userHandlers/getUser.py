@@ -1,3 +1,12 @@
+import json
+import logging
+from utils.dynamo_utils import DynamoDBTable
+from utils.response import generate_response
+from config.constants import USER_TABLE
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
 def getUser(event, context):
     try:
         # Parse the request body
@@ -6,34 +15,22 @@ def getUser(event, context):
 
         # Validate email input
         if not email:
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"message": "Email is required in the request body"})
-            }
+            return generate_response(400, {"message": "Email is required in the request body"})
         
         # Log the request
         logger.info(f"Fetching user with email: {email}")
         
         # Query DynamoDB with the correct key
-        response = table.get_item(Key={"email": email})
+        response = DynamoDBTable(USER_TABLE).get_item({"email": email})
         user_data = response.get("Item")
 
         # Handle if user data is not found
         if not user_data:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"message": f"User with email {email} not found"})
-            }
+            return generate_response(404, {"message": f"User with email {email} not found"})
         
         # Successfully retrieved user data
-        return {
-            "statusCode": 200,
-            "body": json.dumps({"message": "User retrieved successfully", "data": user_data})
-        }
+        return generate_response(200, {"message": "User retrieved successfully", "data": user_data})
 
     except Exception as e:
         logger.error(f"Error retrieving user: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"message": "An error occurred", "error": str(e)})
-        }
+        return generate_response(500, {"message": "An error occurred", "error": str(e)})
@@ -1,49 +1,50 @@
-import json
+# First import: with INIT_PROFILE=true it times every import after it
+from utils.init_profiler import init_profiler
 import logging
-from handlers.userHandlers.addUser import addUser
-from handlers.userHandlers.getUser import getUser
-from handlers.patientHandlers.addNewPatient import addNewPatient
-from handlers.patientHandlers.getAllPatients import getAllPatients
+from utils.handler_loader import load_handler
+from utils.request_log import log_request
+from utils.response import compress_response, generate_response
+
+init_profiler.mark('imports')
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Define route handlers
+# Define route handlers as "module:function" targets; each handler module is
+# imported on first use, so a cold start only pays for the route it serves
 route_handlers = {
-    "/user/{emailId}": {"GET": getUser},
-    "/user": {"POST": addUser},
-    "/patients": {"GET": getAllPatients},
-    "/patients/addpatient": {"POST": addNewPatient},
+    "/user/{emailId}": {"GET": "handlers.userHandlers.getUser:getUser"},
+    "/user": {"POST": "handlers.userHandlers.addUser:addUser"},
+    "/patients": {"GET": "handlers.patientHandlers.getAllPatients:getAllPatients"},
+    "/patients/addpatient": {"POST": "handlers.patientHandlers.addNewPatient:addNewPatient"},
 }
 
+init_profiler.mark('route_table')
+
+@init_profiler.profile_first_invocation
 def lambda_handler(event, context):
-    logger.info(f"Received event: {json.dumps(event)}")
+    log_request(event)
 
     resource = event.get('resource')
     method = event.get('httpMethod')
 
     if not resource or not method:
         logger.error("Invalid request: Missing resource or method.")
-        return {
-            "statusCode": 400,
-            "body": json.dumps({"message": "Invalid request. Resource or method missing."}),
-        }
+        return generate_response(400, {"message": "Invalid request. Resource or method missing."})
 
     handlers = route_handlers.get(resource, {})
-    handler = handlers.get(method)
+    target = handlers.get(method)
 
-    if handler:
+    if target:
         try:
-            return handler(event, context)
+            return compress_response(load_handler(target)(event, context), event)
         except Exception as e:
             logger.error(f"Handler error: {e}")
-            return {
-                "statusCode": 500,
-                "body": json.dumps({"message": "Internal server error."}),
-            }
+            # Imported here: by now the handler has already loaded botocore
+            from utils.dynamo_retry import is_throttle_error
+            if is_throttle_error(e):
+                return generate_response(503, {"message": "Service is busy, please retry."}, headers={"Retry-After": "1"})
+            return generate_response(500, {"message": "Internal server error."})
 
     logger.warning(f"No route found for resource: {resource}, method: {method}")
-    return {
-        "statusCode": 404,
-        "body": json.dumps({"message": "Route not found"}),
-    }
+    return generate_response(404, {"message": "Route not found"})
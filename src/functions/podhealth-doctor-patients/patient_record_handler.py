@@ -1,10 +1,9 @@
-import boto3
 import json
 import logging
 from boto3.dynamodb.conditions import Key
-
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('DoctorAppPatients')
+from utils.dynamo_utils import DynamoDBTable, take
+from utils.response import generate_response
+from config.constants import PATIENT_RECORD_TABLE, QUERY_ITEM_BUDGET
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -31,7 +30,8 @@ def add_patient_record(event):
                 item[field] = body[field]
         
         # Store in DynamoDB
-        table.put_item(Item=item)
+        table = DynamoDBTable(PATIENT_RECORD_TABLE)
+        table.put_item(item)
         logger.info(f"Successfully added record for patientId: {body['patientId']}")
         
         return {
@@ -86,13 +86,17 @@ def fetch_patient_records(event):
                 'body': json.dumps('Missing doctorId in query parameters')
             }
         
-        response = table.query(
-            KeyConditionExpression=Key('doctorId').eq(doctorId)
+        table = DynamoDBTable(PATIENT_RECORD_TABLE)
+        items, has_more = take(
+            table.iter_query(KeyConditionExpression=Key('doctorId').eq(doctorId)),
+            QUERY_ITEM_BUDGET
         )
+        if has_more:
+            logger.warning(f"Patient records for doctorId {doctorId} truncated at {QUERY_ITEM_BUDGET} items")
         
         # Return all fields for each patient
         records = []
-        for item in response['Items']:
+        for item in items:
             patient_record = {
                 'id': item['patientId'],
                 'name': item['name'],
@@ -111,15 +115,11 @@ def fetch_patient_records(event):
         
         logger.info(f"Successfully fetched {len(records)} patient records for doctorId: {doctorId}")
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST,GET'
-            },
-            'body': json.dumps(records)
-        }
+        return generate_response(200, records, headers={
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
+            'Access-Control-Allow-Methods': 'OPTIONS,POST,GET'
+        })
     except Exception as e:
         logger.error(f"Error fetching patient records: {str(e)}")
         return {
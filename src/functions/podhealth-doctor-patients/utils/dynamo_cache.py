@@ -0,0 +1,349 @@
+import copy
+import json
+import pickle
+import threading
+import time
+from decimal import Decimal
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder, Equals
+from utils.ttl_cache import TTLCache
+from config.constants import (
+    DYNAMODB_CACHE_TABLES,
+    DYNAMODB_CACHE_TTL_SECONDS,
+    DYNAMODB_CACHE_MAX_ENTRIES,
+    TABLE_PRIMARY_KEYS,
+)
+
+# Tag invalidated by every write to a table; used for results whose
+# partitions cannot be worked out
+WILDCARD_TAG = '*'
+
+# Tag carried by every cached query result of a table
+QUERY_TAG = 'query'
+
+
+class CacheBackend:
+    """
+    Interface for DynamoDBTable cache storage. Entries carry tags, and
+    invalidate_tags() drops every entry carrying any of the given tags.
+    """
+
+    def get(self, key):
+        """
+        :return: The cached value, or None on a miss.
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl_seconds, tags=()):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags):
+        raise NotImplementedError
+
+
+class LocalCacheBackend(CacheBackend):
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        """
+        In-process LRU+TTL backend, private to one Lambda container. Values
+        are copied in and out so callers cannot mutate cached responses.
+
+        :param max_entries: Maximum number of cached responses.
+        :param ttl_seconds: Default time to live.
+        """
+        self._entries = TTLCache(
+            max_entries or DYNAMODB_CACHE_MAX_ENTRIES,
+            ttl_seconds or DYNAMODB_CACHE_TTL_SECONDS
+        )
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self._entries.get(key)
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, key, value, ttl_seconds, tags=()):
+        self._entries.set(key, copy.deepcopy(value), ttl_seconds)
+        with self._lock:
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            # Entries expire or get evicted without notice; drop their
+            # keys from the tag index once it grows well past the cache
+            if len(self._tags) > 2 * self._entries.max_entries:
+                live_keys = set(self._entries.keys())
+                self._tags = {
+                    tag: keys & live_keys
+                    for tag, keys in self._tags.items()
+                    if keys & live_keys
+                }
+
+    def delete(self, key):
+        self._entries.delete(key)
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.pop(tag, ()))
+        for key in keys:
+            self._entries.delete(key)
+
+    def stats(self):
+        return self._entries.stats()
+
+
+class KeyValueCacheBackend(CacheBackend):
+    def __init__(self, client, prefix='dynamo-cache:'):
+        """
+        Backend for an external key-value cache shared by all containers,
+        such as Redis or ElastiCache. `client` needs Redis-style
+        get, set(ex=), delete, sadd, smembers and expire. InMemoryKeyValueClient
+        is a local stand-in with the same methods.
+
+        :param client: The key-value client.
+        :param prefix: Prefix for every key written by this backend.
+        """
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl_seconds, tags=()):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl_seconds)
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            self.client.sadd(tag_key, key)
+            self.client.expire(tag_key, ttl_seconds)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def invalidate_tags(self, tags):
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = self.client.smembers(tag_key)
+            self.client.delete(tag_key, *[self.prefix + _decode(key) for key in keys])
+
+
+class InMemoryKeyValueClient:
+    """
+    Local stand-in for the Redis client used by KeyValueCacheBackend.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._values.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry is not None else None
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ex if ex else None)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def sadd(self, key, *members):
+        with self._lock:
+            entry = self._live(key)
+            members_set = entry[0] if entry is not None else set()
+            members_set.update(members)
+            self._values[key] = (members_set, entry[1] if entry is not None else None)
+
+    def smembers(self, key):
+        with self._lock:
+            entry = self._live(key)
+            return set(entry[0]) if entry is not None else set()
+
+    def expire(self, key, seconds):
+        with self._lock:
+            entry = self._live(key)
+            if entry is not None:
+                self._values[key] = (entry[0], time.monotonic() + seconds)
+
+
+class TableCache:
+    def __init__(self, table_name, backend, ttl_seconds=None):
+        """
+        Read-through cache for one table's GetItem and Query responses.
+
+        Cached responses are tagged with the `attribute=value` pairs they
+        depend on: the key of a GetItem, the equality conditions of a
+        KeyConditionExpression, and the primary key of every item a query
+        returned. A write to an item invalidates the tags built from its
+        old and new images, which drops exactly the responses that item
+        could appear in.
+
+        :param table_name: The name of the DynamoDB table.
+        :param backend: A CacheBackend.
+        :param ttl_seconds: Time to live of cached responses.
+        """
+        self.table_name = table_name
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds or DYNAMODB_CACHE_TTL_SECONDS
+        self.key_attributes = TABLE_PRIMARY_KEYS.get(table_name)
+        self.hits = 0
+        self.misses = 0
+
+    def get_item(self, params, loader):
+        """
+        Returns a cached GetItem response, calling `loader` on a miss.
+        """
+        if params.get('ConsistentRead'):
+            return loader()
+        cache_key = self._cache_key('get_item', params)
+        response = self.backend.get(cache_key)
+        if response is not None:
+            self.hits += 1
+            return response
+
+        self.misses += 1
+        response = loader()
+        tags = [self._tag(attribute, value) for attribute, value in params['Key'].items()]
+        self.backend.set(cache_key, response, self.ttl_seconds, tags)
+        return response
+
+    def query(self, params, loader):
+        """
+        Returns a cached Query response, calling `loader` on a miss.
+        """
+        if params.get('ConsistentRead'):
+            return loader()
+        cache_key = self._cache_key('query', params)
+        response = self.backend.get(cache_key)
+        if response is not None:
+            self.hits += 1
+            return response
+
+        self.misses += 1
+        response = loader()
+        self.backend.set(cache_key, response, self.ttl_seconds, self._query_tags(params, response))
+        return response
+
+    def invalidate(self, *images, all_queries=False):
+        """
+        Drops every cached response that depends on the given item images.
+
+        :param images: Old and/or new images (or just keys) of written items.
+        :param all_queries: Also drop every cached query of the table, for
+                            writes whose new image is unknown.
+        """
+        tags = {self._tag(WILDCARD_TAG)}
+        if all_queries:
+            tags.add(self._tag(QUERY_TAG))
+        for image in images:
+            for attribute, value in (image or {}).items():
+                if _is_scalar(value):
+                    tags.add(self._tag(attribute, value))
+        self.backend.invalidate_tags(tags)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def _tag(self, attribute, value=None):
+        if value is None:
+            return f"{self.table_name}|{attribute}"
+        return f"{self.table_name}|{attribute}={value}"
+
+    def _query_tags(self, params, response):
+        conditions = _key_equalities(params.get('KeyConditionExpression'))
+        if conditions is None:
+            return [self._tag(QUERY_TAG), self._tag(WILDCARD_TAG)]
+
+        tags = {self._tag(QUERY_TAG)}
+        tags.update(self._tag(attribute, value) for attribute, value in conditions)
+        for item in response.get('Items', []):
+            if not self.key_attributes or any(attribute not in item for attribute in self.key_attributes):
+                return [self._tag(QUERY_TAG), self._tag(WILDCARD_TAG)]
+            tags.update(self._tag(attribute, item[attribute]) for attribute in self.key_attributes)
+        return list(tags)
+
+    def _cache_key(self, operation, params):
+        canonical = {}
+        builder = ConditionExpressionBuilder()
+        for name, value in params.items():
+            if isinstance(value, ConditionBase):
+                built = builder.build_expression(value, is_key_condition=(name == 'KeyConditionExpression'))
+                value = [built.condition_expression, built.attribute_name_placeholders, built.attribute_value_placeholders]
+            canonical[name] = value
+        return f"{self.table_name}|{operation}|{json.dumps(canonical, sort_keys=True, default=str)}"
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, int, float, Decimal)) and not isinstance(value, bool)
+
+def _decode(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def _key_equalities(condition):
+    """
+    Returns the (attribute, value) equality pairs of a boto3 key
+    condition, or None if the condition is not a boto3 condition object.
+    """
+    if not isinstance(condition, ConditionBase):
+        return None
+    expression = condition.get_expression()
+    if isinstance(condition, Equals):
+        key, value = expression['values']
+        return [(key.name, value)]
+    if expression['operator'] == 'AND':
+        pairs = []
+        for part in expression['values']:
+            part_pairs = _key_equalities(part)
+            if part_pairs is None:
+                return None
+            pairs.extend(part_pairs)
+        return pairs
+    # Range conditions on the sort key add no partition information
+    return []
+
+
+_table_caches = {}
+_table_caches_lock = threading.Lock()
+_default_backend = None
+
+def configure_table_cache(table_name, backend=None, ttl_seconds=None):
+    """
+    Enables (or with backend=None, disables) caching for a table in this
+    container, e.g. to plug in a KeyValueCacheBackend.
+
+    :param table_name: The name of the DynamoDB table.
+    :param backend: A CacheBackend, or None to disable caching.
+    :param ttl_seconds: Time to live of cached responses.
+    """
+    with _table_caches_lock:
+        _table_caches[table_name] = TableCache(table_name, backend, ttl_seconds) if backend else None
+
+def get_table_cache(table_name):
+    """
+    Returns the TableCache for a table, or None if caching is disabled.
+    Tables listed in DYNAMODB_CACHE_TABLES share a LocalCacheBackend unless
+    configure_table_cache() set something else.
+    """
+    global _default_backend
+    if table_name in _table_caches:
+        return _table_caches[table_name]
+    with _table_caches_lock:
+        if table_name not in _table_caches:
+            cache = None
+            if table_name in DYNAMODB_CACHE_TABLES:
+                if _default_backend is None:
+                    _default_backend = LocalCacheBackend()
+                cache = TableCache(table_name, _default_backend)
+            _table_caches[table_name] = cache
+        return _table_caches[table_name]
@@ -0,0 +1,43 @@
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger()
+
+_handlers = {}
+_load_ms = {}
+_lock = threading.Lock()
+
+def load_handler(target):
+    """
+    Returns the handler function for a "package.module:function" target.
+    The module is imported on first use and the function cached for the
+    life of the container, so a cold start only imports the route it
+    serves.
+
+    :param target: Import path of the handler, e.g.
+                   "handlers.userHandlers.addUser:addUser".
+    :return: The handler function.
+    """
+    handler = _handlers.get(target)
+    if handler is not None:
+        return handler
+
+    with _lock:
+        handler = _handlers.get(target)
+        if handler is None:
+            module_name, function_name = target.split(':')
+            started = time.perf_counter()
+            handler = getattr(importlib.import_module(module_name), function_name)
+            _load_ms[target] = round((time.perf_counter() - started) * 1000, 2)
+            _handlers[target] = handler
+            logger.info(f"Loaded handler {target} in {_load_ms[target]} ms")
+    return handler
+
+def load_stats():
+    """
+    Returns the import time in milliseconds of every handler loaded so far.
+    A handler's figure also covers the shared modules it was first to import.
+    """
+    return dict(_load_ms)
@@ -1,12 +1,208 @@
+import base64
+import datetime
+import decimal
+import gzip
 import json
+import logging
+import threading
+import time
+from config.constants import (
+    RESPONSE_JSON_BACKEND,
+    RESPONSE_DEFAULT_HEADERS,
+    RESPONSE_COMPRESSION_ENABLED,
+    RESPONSE_COMPRESSION_MIN_BYTES,
+    RESPONSE_GZIP_LEVEL,
+    RESPONSE_BROTLI_QUALITY,
+)
+
+logger = logging.getLogger()
+
+# Optional native encoder; the stdlib json module is used when it is not
+# packaged with the function or RESPONSE_JSON_BACKEND is "json"
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_use_orjson = orjson is not None and RESPONSE_JSON_BACKEND in ("auto", "orjson")
+
+# Brotli is optional too; without it only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ('application/json', 'text/')
+
+_compression_lock = threading.Lock()
+_compression_stats = {
+    'responses': 0,
+    'compressed': 0,
+    'bytesIn': 0,
+    'bytesOut': 0,
+    'compressMs': 0.0,
+}
+
+def json_default(value):
+    """
+    Converts the values boto3 hands back that JSON has no type for:
+    Decimal numbers (to int when integral, float otherwise), string/number
+    sets (to lists), binary values (to base64) and dates.
+    """
+    if isinstance(value, decimal.Decimal):
+        if value.is_finite() and value == value.to_integral_value():
+            return int(value)
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    # boto3.dynamodb.types.Binary, without importing boto3 here
+    if isinstance(getattr(value, 'value', None), (bytes, bytearray)):
+        return base64.b64encode(value.value).decode('ascii')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_bytes(value):
+    """
+    Serializes value to UTF-8 JSON bytes in one pass. orjson writes bytes
+    directly; values it rejects (e.g. integers beyond 64 bits, which
+    DynamoDB numbers can reach) fall back to the stdlib encoder.
+    """
+    if _use_orjson:
+        try:
+            return orjson.dumps(value, default=json_default)
+        except TypeError:
+            pass
+    return json.dumps(value, default=json_default, separators=(',', ':')).encode('utf-8')
+
+def dumps(value):
+    """
+    Serializes value to a JSON string, the form API Gateway proxy
+    responses carry their body in.
+    """
+    if _use_orjson:
+        try:
+            return orjson.dumps(value, default=json_default).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(value, default=json_default, separators=(',', ':'))
 
 def generate_response(status_code, body, headers=None):
-    headers = headers or {}
-    headers.update({
-        "Content-Type": "application/json"
-    })
+    """
+    Builds an API Gateway proxy response.
+
+    :param status_code: HTTP status code.
+    :param body: Value to serialize as JSON; strings are encoded too.
+    :param headers: Extra headers, merged over RESPONSE_DEFAULT_HEADERS.
+    :return: The response dict.
+    """
+    response_headers = dict(RESPONSE_DEFAULT_HEADERS)
+    if headers:
+        response_headers.update(headers)
     return {
         'statusCode': status_code,
-        'body': json.dumps(body),
-        'headers': headers,
-    }
\ No newline at end of file
+        'headers': response_headers,
+        'body': dumps(body),
+    }
+
+def accepted_encoding(event):
+    """
+    Picks the response encoding from the request's Accept-Encoding header:
+    br when brotli is available and accepted, else gzip, else None.
+    Encodings with q=0 are treated as refused.
+    """
+    headers = event.get('headers') or {}
+    accept = next((value for name, value in headers.items() if name.lower() == 'accept-encoding'), None)
+    if not accept:
+        return None
+
+    accepted = {}
+    for entry in accept.split(','):
+        name, _, params = entry.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get('*', 0.0)
+    if brotli is not None and accepted.get('br', wildcard) > 0:
+        return 'br'
+    if accepted.get('gzip', wildcard) > 0:
+        return 'gzip'
+    return None
+
+def compress_response(response, event):
+    """
+    Compresses an API Gateway proxy response body when the client accepts
+    gzip or br and the body is at least RESPONSE_COMPRESSION_MIN_BYTES.
+    The compressed body is base64 encoded with isBase64Encoded set, as the
+    proxy integration requires for binary bodies; on a REST API this needs
+    binaryMediaTypes configured (see RESPONSE_COMPRESSION_ENABLED).
+
+    :param response: Response dict returned by a handler.
+    :param event: The API Gateway event, for its Accept-Encoding header.
+    :return: The response, compressed in place or unchanged.
+    """
+    if not RESPONSE_COMPRESSION_ENABLED or not isinstance(response, dict):
+        return response
+    body = response.get('body')
+    if not isinstance(body, str) or response.get('isBase64Encoded'):
+        return response
+
+    headers = response.setdefault('headers', {})
+    lower_headers = {name.lower(): value for name, value in headers.items()}
+    if 'content-encoding' in lower_headers:
+        return response
+    content_type = lower_headers.get('content-type', 'application/json')
+    if not content_type.startswith(_COMPRESSIBLE_TYPES):
+        return response
+
+    # The same URL can now be served in several encodings
+    headers['Vary'] = 'Accept-Encoding'
+    with _compression_lock:
+        _compression_stats['responses'] += 1
+
+    encoding = accepted_encoding(event)
+    raw = body.encode('utf-8')
+    if encoding is None or len(raw) < RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+
+    started = time.perf_counter()
+    if encoding == 'br':
+        compressed = brotli.compress(raw, quality=RESPONSE_BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(raw, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    headers['Content-Encoding'] = encoding
+
+    with _compression_lock:
+        _compression_stats['compressed'] += 1
+        _compression_stats['bytesIn'] += len(raw)
+        _compression_stats['bytesOut'] += len(compressed)
+        _compression_stats['compressMs'] += elapsed_ms
+    logger.info(
+        f"Compressed response with {encoding}: {len(raw)} -> {len(compressed)} bytes "
+        f"(ratio {len(raw) / max(len(compressed), 1):.2f}) in {elapsed_ms:.2f} ms"
+    )
+    return response
+
+def compression_stats():
+    """
+    Compression counters for the life of the container: responses
+    considered, responses compressed, bytes before and after, overall
+    ratio and time spent compressing.
+    """
+    with _compression_lock:
+        stats = dict(_compression_stats)
+    stats['ratio'] = round(stats['bytesIn'] / stats['bytesOut'], 2) if stats['bytesOut'] else None
+    stats['compressMs'] = round(stats['compressMs'], 2)
+    return stats